@@ -1,72 +1,219 @@
 # app.py
-from flask import Flask, jsonify
+import argparse
+import hashlib
+import json
+
+from flask import Flask, Response, jsonify, request
 from flask_cors import CORS  # Para permitir la comunicación entre el backend y el frontend
-import pandas as pd
 import numpy as np
-import os
-from astroquery.jplhorizons import Horizons
-from astropy.time import Time
+from modules.catalog_store import DEFAULT_RESPONSE_CACHE, QUERY_FIELDS, CatalogStore, ResponseCache
+from modules.horizons_client import FixtureBackend, HorizonsClient
+from modules.orbits import generate_orbits_2d
+from modules.propagator import julian_date, julian_date_now
 
 app = Flask(__name__)
 CORS(app)  # Habilita CORS para todas las rutas
 
+# --- CATÁLOGO EN MEMORIA ---
+# Se carga una sola vez (al arrancar el servidor o en la primera petición) y
+# todas las rutas lo comparten. Las respuestas ya serializadas se guardan en
+# una caché LRU y se sirven con ETag, así un GET condicional devuelve 304.
+CATALOGO = "jpl_catalog.csv"
+_store = None
+RESPUESTAS = ResponseCache(DEFAULT_RESPONSE_CACHE)
+# Cliente de Horizons con caché en disco y consultas en paralelo (?fuente=horizons)
+HORIZONS = HorizonsClient()
+
+
+def configurar(catalogo=None, store=None, cache=None, horizons=None):
+    """
+    Cambia el catálogo (o el store ya construido), el tamaño de la caché de
+    respuestas y el cliente de Horizons.
+    """
+    global CATALOGO, _store, RESPUESTAS, HORIZONS
+    if catalogo is not None:
+        CATALOGO, _store = catalogo, None
+    if store is not None:
+        _store = store
+    if cache is not None:
+        RESPUESTAS = ResponseCache(cache)
+    elif catalogo is not None or store is not None:
+        # Las respuestas guardadas son del catálogo anterior
+        RESPUESTAS.clear()
+    if horizons is not None:
+        HORIZONS = horizons
+
+
+def get_store():
+    global _store
+    if _store is None:
+        _store = CatalogStore.from_catalog(CATALOGO)
+    return _store
+
+
+def respuesta_json(generar, cacheable=True):
+    """
+    Devuelve el JSON de 'generar()' con ETag. Si la respuesta es cacheable, el
+    ETag sale de la versión del catálogo y de la petición (ruta y parámetros),
+    así que un GET condicional se responde con 304 sin generar nada. La clave
+    de la caché lleva también la versión, de modo que un catálogo nuevo nunca
+    recibe las respuestas del anterior.
+    """
+    store = get_store()
+    peticion = f"{request.path}?{sorted(request.args.items(multi=True))}"
+    clave = f"{store.version}:{peticion}"
+    cuerpo = None
+    if cacheable:
+        etag = f"{store.version}-{hashlib.sha1(peticion.encode()).hexdigest()[:16]}"
+        if request.if_none_match.contains(etag):
+            return _no_modificado(etag)
+        cuerpo = RESPUESTAS.get(clave)
+    if cuerpo is None:
+        cuerpo = json.dumps(generar(), separators=(',', ':')).encode('utf-8')
+        if cacheable:
+            RESPUESTAS.put(clave, cuerpo)
+    if not cacheable:
+        etag = hashlib.sha1(cuerpo).hexdigest()[:16]
+        if request.if_none_match.contains(etag):
+            return _no_modificado(etag)
+    respuesta = Response(cuerpo, mimetype='application/json')
+    respuesta.set_etag(etag)
+    respuesta.headers['Cache-Control'] = 'no-cache'  # el navegador revalida con If-None-Match
+    return respuesta
+
+
+def _no_modificado(etag):
+    respuesta = Response(status=304)
+    respuesta.set_etag(etag)
+    return respuesta
+
+
+def _ids_param():
+    """SPK-IDs del parámetro 'ids' (separados por comas)."""
+    return [int(valor) for valor in request.args.get('ids', '').split(',') if valor.strip()]
+
+
+@app.errorhandler(ValueError)
+def parametro_invalido(e):
+    return jsonify({"error": f"Parámetro inválido: {e}"}), 400
+
+
+# --- CONSULTA DEL CATÁLOGO ---
+@app.route('/api/asteroids')
+def get_asteroids():
+    """
+    Página filtrada del catálogo en el formato del JSON de la web.
+    Parámetros: pagina, por_pagina, orden (campo, '-campo' descendente),
+    nombre (subcadena) y min_<campo> / max_<campo> para los campos de
+    QUERY_FIELDS (p. ej. ?es_peligroso=1 equivale a min y max 1).
+    """
+    filtros = {}
+    for campo in QUERY_FIELDS:
+        minimo = request.args.get(f"min_{campo}", request.args.get(campo))
+        maximo = request.args.get(f"max_{campo}", request.args.get(campo))
+        if minimo is not None or maximo is not None:
+            filtros[campo] = (None if minimo is None else float(minimo), None if maximo is None else float(maximo))
+    orden = request.args.get('orden')
+    if orden and orden.lstrip('-') not in QUERY_FIELDS:
+        raise ValueError(f"orden={orden!r} (campos: {', '.join(QUERY_FIELDS)})")
+    return respuesta_json(lambda: get_store().query(
+        filtros, request.args.get('nombre'), orden,
+        int(request.args.get('pagina', 1)), int(request.args.get('por_pagina', 100)),
+    ))
+
+
 # --- DATOS ESTÁTICOS (ÓRBITAS) ---
 def generar_orbita_2d(a, e, w_deg):
-    w = np.radians(w_deg if pd.notna(w_deg) else 0)
-    theta = np.linspace(0, 2 * np.pi, 180) # 180 puntos es suficiente
-    r = a * (1 - e**2) / (1 + e * np.cos(theta))
-    x_plano = r * np.cos(theta)
-    y_plano = r * np.sin(theta)
-    x_rotado = x_plano * np.cos(w) - y_plano * np.sin(w)
-    y_rotado = x_plano * np.sin(w) + y_plano * np.cos(w)
-    return np.stack((x_rotado, y_rotado), axis=-1).tolist()
+    # 180 puntos es suficiente
+    return generate_orbits_2d(a, e, w_deg, n_puntos=180, dtype=np.float64)[0].tolist()
 
 @app.route('/api/orbits')
 def get_orbits():
-    """Devuelve las trayectorias orbitales completas para la visualización inicial."""
+    """
+    Devuelve las trayectorias orbitales completas para la visualización.
+    Con ?ids=spkid1,spkid2 devuelve esos asteroides (?dim=3 para 3D y
+    ?puntos=N); sin 'ids', la Tierra y los 20 primeros del catálogo.
+    """
     print("Petición recibida para /api/orbits")
-    try:
-        df = pd.read_csv("jpl_catalog.csv", skipinitialspace=True)
-        df['identificador'] = df['full_name'].fillna(df['spkid'].astype(str))
-        df_orbitas = df.dropna(subset=['a', 'e', 'w', 'identificador']).head(20) # Primeros 20
-
-        sistema_solar_2d = {}
-        # Tierra
-        sistema_solar_2d["Tierra"] = generar_orbita_2d(a=1.0, e=0.0167, w_deg=102.9)
-        # Asteroides
-        for _, asteroide in df_orbitas.iterrows():
-            sistema_solar_2d[asteroide['identificador']] = generar_orbita_2d(asteroide['a'], asteroide['e'], asteroide['w'])
-            
-        return jsonify(sistema_solar_2d)
-    except Exception as e:
-        return jsonify({"error": str(e)}), 500
+    ids = _ids_param()
+    dimensiones = int(request.args.get('dim', 2))
+    n_puntos = min(int(request.args.get('puntos', 180)), 3600)
+
+    def generar():
+        store = get_store()
+        if ids:
+            return store.orbits(ids, n_puntos, dimensiones)
+        primeros = store.df.dropna(subset=['a', 'e', 'w'])['spkid'].head(20).tolist()
+        sistema_solar_2d = {"Tierra": generar_orbita_2d(a=1.0, e=0.0167, w_deg=102.9)}
+        sistema_solar_2d.update(store.orbits(primeros, n_puntos=180))
+        return sistema_solar_2d
+
+    return respuesta_json(generar)
 
 # --- DATOS EN TIEMPO REAL (POSICIONES) ---
+# IDs para Horizons: '399' es la Tierra, los otros son SPK IDs de asteroides
+OBJETOS_POSICIONES = {
+    'Tierra': {'id': '399', 'type': 'majorbody'},
+    '433 Eros': {'id': '2000433', 'type': 'smallbody'},
+    '1566 Icarus': {'id': '2001566', 'type': 'smallbody'},
+    '1036 Ganymed': {'id': '2001036', 'type': 'smallbody'}
+}
+
 @app.route('/api/positions')
 def get_positions():
-    """Calcula y devuelve la posición actual de la Tierra y algunos asteroides."""
+    """
+    Calcula y devuelve la posición de la Tierra y algunos asteroides.
+    Por defecto se propagan los elementos del catálogo en local (sin red);
+    con ?fuente=horizons se consulta JPL Horizons (todos los objetos a la vez
+    y con caché en disco).
+    ?epoch= acepta un día juliano o una fecha ('YYYY-MM-DD'); sin él se usa
+    el instante actual. ?ids=spkid1,spkid2 cambia los asteroides.
+    """
     print("Petición recibida para /api/positions (tiempo real)")
-    ahora = Time.now()
+    if request.args.get('fuente') == 'horizons':
+        return jsonify(posiciones_horizons(OBJETOS_POSICIONES))
+    epoch = request.args.get('epoch')
+    ids = _ids_param()
+    jd = julian_date_now() if epoch is None else (julian_date(epoch) if '-' in epoch[1:] else float(epoch))
+    if ids:
+        return respuesta_json(lambda: get_store().positions(ids, jd), cacheable=epoch is not None)
+    return respuesta_json(lambda: posiciones_locales(OBJETOS_POSICIONES, jd), cacheable=epoch is not None)
+
+def posiciones_locales(objetos, jd=None):
+    """Posiciones (x, y, z) en AU propagando los elementos del catálogo."""
+    spkids = {int(info['id']): nombre for nombre, info in objetos.items() if info['type'] == 'smallbody'}
+    return get_store().positions(list(spkids), julian_date_now() if jd is None else jd, nombres=spkids)
+
+def posiciones_horizons(objetos):
+    """Posiciones (x, y) en AU consultando JPL Horizons (los objetos en paralelo)."""
+    vectores = HORIZONS.positions({info['id']: info['type'] for info in objetos.values()}, julian_date_now())
     posiciones = {}
-    
-    # IDs para Horizons: '399' es la Tierra, los otros son SPK IDs de asteroides
-    objetos = {
-        'Tierra': {'id': '399', 'type': 'majorbody'},
-        '433 Eros': {'id': '2000433', 'type': 'smallbody'},
-        '1566 Icarus': {'id': '2001566', 'type': 'smallbody'},
-        '1036 Ganymed': {'id': '2001036', 'type': 'smallbody'}
-    }
-    
     for nombre, info in objetos.items():
-        try:
-            obj = Horizons(id=info['id'], location='@sun', epochs=ahora.jd, id_type=info['type'])
-            vectores = obj.vectors()
-            # Solo nos interesan las coordenadas X e Y para la visualización 2D
-            posiciones[nombre] = {'x': vectores['x'][0], 'y': vectores['y'][0]}
-        except Exception as e:
-            print(f"No se pudo obtener la posición de {nombre}: {e}")
-            
-    return jsonify(posiciones)
+        # Solo nos interesan las coordenadas X e Y para la visualización 2D
+        if vectores.get(info['id']) is not None:
+            posiciones[nombre] = {'x': vectores[info['id']]['x'], 'y': vectores[info['id']]['y']}
+        else:
+            print(f"No se pudo obtener la posición de {nombre}")
+    return posiciones
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="API local del catálogo de asteroides.")
+    parser.add_argument('--catalogo', default=CATALOGO, help="CSV del catálogo de JPL.")
+    parser.add_argument('--puerto', type=int, default=5001)  # Usamos el puerto 5001
+    parser.add_argument('--cache', type=int, default=DEFAULT_RESPONSE_CACHE,
+                        help="Respuestas que guarda la caché LRU (0 la desactiva).")
+    parser.add_argument('--horizons-fixture',
+                        help="Responde ?fuente=horizons con un fixture grabado (sin red) en vez de JPL Horizons; "
+                             "las épocas no grabadas se propagan desde sus elementos.")
+    parser.add_argument('--debug', action='store_true')
+    args = parser.parse_args(argv)
+
+    configurar(catalogo=args.catalogo, cache=args.cache,
+               horizons=HorizonsClient(FixtureBackend.from_fixture(args.horizons_fixture, propagar=True))
+               if args.horizons_fixture else None)
+    get_store()  # El catálogo se carga una sola vez, antes de aceptar peticiones
+    app.run(debug=args.debug, port=args.puerto, threaded=True)
+
 
 if __name__ == '__main__':
-    app.run(debug=True, port=5001) # Usamos el puerto 5001
\ No newline at end of file
+    main()
@@ -0,0 +1,131 @@
+# benchmarks/bench_catalog_shards.py
+"""
+Simula las consultas típicas de los dashboards sobre el catálogo exportado
+en shards y compara los bytes que descargaría el navegador (manifiesto +
+shards que cortan el filtro) con el JSON monolítico. También comprueba que
+los shards elegidos contienen todas las filas que cumplen el filtro.
+
+Uso (desde la raíz del proyecto):
+    python3 -m benchmarks.bench_catalog_shards --tamanos 10000 100000
+"""
+import argparse
+import json
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from modules.catalog_shards import DEFAULT_SHARD_ROWS, MANIFEST_NAME, SHARD_ORDER, select_shards, write_catalog_shards
+from modules.json_export import write_records_json
+
+# Filtros {campo: (mínimo, máximo)} como los que aplican los dashboards
+CONSULTAS = {
+    'peligrosos': {'es_peligroso': (True, True)},
+    'moid < 0.05 AU': {'distancia_min_orbita_au': (None, 0.05)},
+    'peligrosos y moid < 0.01 AU': {'es_peligroso': (True, True), 'distancia_min_orbita_au': (None, 0.01)},
+    'diámetro > 10 km': {'diameter': (10, None)},
+    'a entre 0.9 y 1.1 AU': {'a': (0.9, 1.1)},
+}
+# Órdenes de las filas antes de partirlas
+ORDENES = {
+    'pha+moid': SHARD_ORDER,
+    'a': [('a', True)],
+}
+
+
+def catalogo_aleatorio(n, seed=42):
+    rng = np.random.default_rng(seed)
+    a = rng.uniform(0.6, 4.0, n)
+    e = rng.beta(2, 6, n)
+    moid = np.abs(a * (1 - e) - 1) * rng.uniform(0.2, 1, n)
+    return pd.DataFrame({
+        'spkid': 2000000 + np.arange(n),
+        'full_name': [f"{k} Asteroide {k}" for k in range(n)],
+        'is_pha': (moid < 0.05) & (rng.random(n) < 0.3),
+        'H': rng.uniform(10, 25, n),
+        'diameter': np.where(rng.random(n) < 0.4, rng.lognormal(0, 1.2, n), np.nan),
+        'albedo': rng.uniform(0, 0.5, n),
+        'moid': np.where(rng.random(n) < 0.1, np.nan, moid),
+        'a': a, 'e': e, 'i': rng.gamma(2, 5, n),
+        'om': rng.uniform(0, 360, n), 'w': rng.uniform(0, 360, n), 'ma': rng.uniform(0, 360, n),
+        'q': a * (1 - e), 'ad': a * (1 + e), 'per_y': a ** 1.5,
+    })
+
+
+def filas_que_cumplen(registros, filtros):
+    """
+    Aplica el filtro a los registros de la web (como haría el navegador).
+    Los nulos nunca cumplen un filtro de rango.
+    """
+    mascara = np.ones(len(registros), dtype=bool)
+    for campo, (minimo, maximo) in filtros.items():
+        valores = registros[campo]
+        mascara &= valores.notna().to_numpy()
+        if minimo is not None:
+            mascara &= (valores >= minimo).fillna(False).to_numpy()
+        if maximo is not None:
+            mascara &= (valores <= maximo).fillna(False).to_numpy()
+    return set(registros.loc[mascara, 'identificador'])
+
+
+def ejecutar(tamanos, carpeta, filas_por_shard):
+    resultados = []
+    for n in tamanos:
+        df = catalogo_aleatorio(n)
+        monolitico = os.path.join(carpeta, f"catalogo_{n}.json")
+        write_records_json(df, monolitico, indent=None)
+        bytes_monolitico = os.path.getsize(monolitico)
+        registros = pd.read_json(monolitico, orient='records')
+
+        for nombre_orden, orden in ORDENES.items():
+            destino = os.path.join(carpeta, f"shards_{n}_{nombre_orden}")
+            manifiesto = write_catalog_shards(df, destino, filas_por_shard, orden)
+            bytes_manifiesto = os.path.getsize(os.path.join(destino, MANIFEST_NAME))
+            for consulta, filtros in CONSULTAS.items():
+                shards = select_shards(manifiesto, filtros)
+                encontrados = set()
+                for shard in shards:
+                    with open(os.path.join(destino, shard['archivo'])) as f:
+                        encontrados |= filas_que_cumplen(pd.DataFrame(json.load(f)), filtros)
+                esperados = filas_que_cumplen(registros, filtros)
+                resultados.append({
+                    'filas': n,
+                    'orden': nombre_orden,
+                    'consulta': consulta,
+                    'coincidencias': len(esperados),
+                    'completo': encontrados == esperados,
+                    'shards': len(shards),
+                    'shards_total': len(manifiesto['shards']),
+                    'bytes': bytes_manifiesto + sum(shard['bytes'] for shard in shards),
+                    'bytes_monolitico': bytes_monolitico,
+                })
+    return resultados
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark de consultas sobre el catálogo en shards.")
+    parser.add_argument('--tamanos', type=int, nargs='+', default=[10_000, 100_000])
+    parser.add_argument('--filas-por-shard', type=int, default=DEFAULT_SHARD_ROWS)
+    parser.add_argument('--salida', help="Guarda los resultados en este archivo JSON.")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as carpeta:
+        resultados = ejecutar(args.tamanos, carpeta, args.filas_por_shard)
+
+    print(f"\n{'filas':>8} {'orden':>9} {'consulta':>28} {'filas ok':>9} {'shards':>9} "
+          f"{'MB':>7} {'MB mono':>8} {'ahorro':>7}")
+    for r in resultados:
+        print(f"{r['filas']:>8} {r['orden']:>9} {r['consulta']:>28} "
+              f"{r['coincidencias']:>8}{'' if r['completo'] else '!'} "
+              f"{r['shards']:>4}/{r['shards_total']:<4} {r['bytes'] / 1e6:>7.2f} "
+              f"{r['bytes_monolitico'] / 1e6:>8.2f} {1 - r['bytes'] / r['bytes_monolitico']:>7.0%}")
+    if not all(r['completo'] for r in resultados):
+        print("⚠️ Alguna consulta no encontró todas sus filas en los shards elegidos (marcadas con '!').")
+    if args.salida:
+        with open(args.salida, 'w') as f:
+            json.dump(resultados, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
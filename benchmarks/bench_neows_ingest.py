@@ -0,0 +1,106 @@
+# benchmarks/bench_neows_ingest.py
+"""
+Mide la ingesta de feeds de NeoWs (modules/neows_ingest.py) sobre varias
+semanas sintéticas construidas a partir de 'neows_data_7dpppp.json': objetos
+por segundo y pico de memoria de Python (tracemalloc) del parser en streaming
+frente a cargar cada feed con json.load.
+
+Uso (desde la raíz del proyecto):
+    python3 -m benchmarks.bench_neows_ingest --semanas 1 10 50
+"""
+import argparse
+import copy
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+
+from modules.neows_ingest import _approach_rows, ingest_neows_feeds
+
+FEED = "neows_data_7dpppp.json"
+# Para que cada semana sintética tenga objetos y acercamientos distintos
+SEMANA_MS = 7 * 86400000
+
+
+def escribir_semanas(feed, semanas, carpeta, copias=20):
+    """
+    Escribe 'semanas' feeds sintéticos. Cada uno repite 'copias' veces los
+    objetos del feed original con SPK-ID y épocas desplazados, para que el
+    archivo tenga el tamaño de una descarga grande.
+    """
+    rutas = []
+    for semana in range(semanas):
+        nuevo = {'links': feed['links'], 'element_count': 0, 'near_earth_objects': {}}
+        for fecha, objetos in feed['near_earth_objects'].items():
+            lista = []
+            for copia in range(copias):
+                for objeto in objetos:
+                    objeto = copy.deepcopy(objeto)
+                    objeto['neo_reference_id'] = str(int(objeto['neo_reference_id']) + (semana * copias + copia) * 10**8)
+                    for ca in objeto['close_approach_data']:
+                        ca['epoch_date_close_approach'] += semana * SEMANA_MS
+                    lista.append(objeto)
+            nuevo['near_earth_objects'][fecha] = lista
+            nuevo['element_count'] += len(lista)
+        ruta = os.path.join(carpeta, f"feed_{semana:03d}.json")
+        with open(ruta, 'w') as f:
+            json.dump(nuevo, f)
+        rutas.append(ruta)
+    return rutas
+
+
+def con_json_load(rutas):
+    filas = []
+    for ruta in rutas:
+        with open(ruta) as f:
+            feed = json.load(f)
+        for fecha, objetos in feed['near_earth_objects'].items():
+            for objeto in objetos:
+                filas.extend(_approach_rows(fecha, objeto))
+    return filas
+
+
+def medir(funcion, *args):
+    tracemalloc.start()
+    inicio = time.perf_counter()
+    funcion(*args)
+    duracion = time.perf_counter() - inicio
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return duracion, pico
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark de la ingesta de feeds de NeoWs.")
+    parser.add_argument('--semanas', type=int, nargs='+', default=[1, 10, 50])
+    parser.add_argument('--copias', type=int, default=20, help="Copias de cada objeto por feed sintético.")
+    parser.add_argument('--salida', help="Guarda los resultados en este archivo JSON.")
+    args = parser.parse_args(argv)
+
+    with open(FEED) as f:
+        feed = json.load(f)
+    resultados = []
+    with tempfile.TemporaryDirectory() as carpeta:
+        for semanas in args.semanas:
+            rutas = escribir_semanas(feed, semanas, carpeta, args.copias)
+            objetos = semanas * args.copias * feed['element_count']
+            megas = sum(os.path.getsize(ruta) for ruta in rutas) / 1e6
+            for metodo, funcion in (("streaming", ingest_neows_feeds), ("json.load", con_json_load)):
+                duracion, pico = medir(funcion, rutas)
+                resultados.append({'semanas': semanas, 'objetos': objetos, 'mb_feeds': megas, 'metodo': metodo,
+                                   'segundos': duracion, 'pico_mb': pico / 1e6})
+            for ruta in rutas:
+                os.remove(ruta)
+
+    print(f"\n{'semanas':>8} {'objetos':>9} {'feeds (MB)':>11} {'método':>10} {'objetos/s':>10} {'pico (MB)':>10}")
+    for r in resultados:
+        print(f"{r['semanas']:>8} {r['objetos']:>9} {r['mb_feeds']:>11.1f} {r['metodo']:>10} "
+              f"{r['objetos'] / r['segundos']:>10,.0f} {r['pico_mb']:>10.1f}")
+    if args.salida:
+        with open(args.salida, 'w') as f:
+            json.dump(resultados, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
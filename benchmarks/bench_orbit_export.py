@@ -0,0 +1,112 @@
+# benchmarks/bench_orbit_export.py
+"""
+Compara el JSON de órbitas actual con el formato binario (Float32 e Int16):
+tamaño en disco (también comprimido con gzip, como lo serviría un hosting
+estático) y tiempo de lectura.
+
+Uso (desde la raíz del proyecto):
+    python3 -m benchmarks.bench_orbit_export --tamanos 100 10000 100000
+
+Ojo: con 100k órbitas el JSON ocupa más de 2 GB en el directorio temporal.
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+import zlib
+
+import numpy as np
+
+from generar_coordenadas_3D import guardar_orbitas_json
+from modules.orbit_export import read_orbit_binary, write_orbit_binary
+from modules.orbits import iter_orbit_blocks
+
+
+def elementos_aleatorios(n, seed=42):
+    rng = np.random.default_rng(seed)
+    a = rng.uniform(0.6, 4.0, n)
+    e = rng.beta(2, 6, n)
+    i = rng.gamma(2, 5, n)
+    om = rng.uniform(0, 360, n)
+    w = rng.uniform(0, 360, n)
+    return a, e, i, om, w
+
+
+def bloques_de_orbitas(elementos, dtype):
+    nombres = [f"Asteroide {k}" for k in range(len(elementos[0]))]
+    for inicio, bloque in iter_orbit_blocks(*elementos, dtype=dtype):
+        yield nombres[inicio:inicio + len(bloque)], bloque
+
+
+def tamano_gzip(ruta):
+    # Se comprime por trozos para no cargar en memoria los JSON grandes
+    compresor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    total = 0
+    with open(ruta, 'rb') as f:
+        for trozo in iter(lambda: f.read(16 * 1024 * 1024), b''):
+            total += len(compresor.compress(trozo))
+    return total + len(compresor.flush())
+
+
+def medir(funcion, repeticiones=3):
+    mejor = float('inf')
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        mejor = min(mejor, time.perf_counter() - inicio)
+    return mejor
+
+
+def ejecutar(tamanos, carpeta):
+    resultados = []
+    for n in tamanos:
+        elementos = elementos_aleatorios(n)
+        base = os.path.join(carpeta, f"orbitas_{n}")
+
+        guardar_orbitas_json(bloques_de_orbitas(elementos, np.float64), f"{base}.json")
+        rutas = {'json': [f"{base}.json"]}
+        for formato, cuantizar in (('float32', False), ('int16', True)):
+            indice = write_orbit_binary(bloques_de_orbitas(elementos, np.float32), f"{base}_{formato}", cuantizar)
+            rutas[formato] = [indice, f"{base}_{formato}.bin"]
+
+        def leer_json():
+            with open(f"{base}.json") as f:
+                json.load(f)
+
+        lectores = {
+            'json': leer_json,
+            'float32': lambda: read_orbit_binary(rutas['float32'][0]),
+            'int16': lambda: read_orbit_binary(rutas['int16'][0]),
+        }
+        for formato, archivos in rutas.items():
+            resultados.append({
+                'orbitas': n,
+                'formato': formato,
+                'bytes': sum(os.path.getsize(r) for r in archivos),
+                'bytes_gzip': sum(tamano_gzip(r) for r in archivos),
+                'lectura_s': medir(lectores[formato], repeticiones=1 if formato == 'json' and n >= 10000 else 3),
+            })
+    return resultados
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark del export de órbitas: JSON vs binario.")
+    parser.add_argument('--tamanos', type=int, nargs='+', default=[100, 10_000, 100_000])
+    parser.add_argument('--salida', help="Guarda los resultados en este archivo JSON.")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as carpeta:
+        resultados = ejecutar(args.tamanos, carpeta)
+
+    print(f"{'órbitas':>9} {'formato':>8} {'tamaño (MB)':>12} {'gzip (MB)':>10} {'lectura (ms)':>13}")
+    for r in resultados:
+        print(f"{r['orbitas']:>9} {r['formato']:>8} {r['bytes'] / 1e6:>12.2f} "
+              f"{r['bytes_gzip'] / 1e6:>10.2f} {r['lectura_s'] * 1000:>13.1f}")
+    if args.salida:
+        with open(args.salida, 'w') as f:
+            json.dump(resultados, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
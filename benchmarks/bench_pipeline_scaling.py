@@ -0,0 +1,101 @@
+# benchmarks/bench_pipeline_scaling.py
+"""
+Escalado de las etapas particionadas del pipeline (modules/pipeline.py) con
+el número de procesos: MOID, export JSON de la web y órbitas 3D en binario,
+sobre un catálogo sintético. Para cada etapa imprime el tiempo y la
+aceleración respecto a un proceso, y comprueba que la salida es idéntica.
+
+Uso (desde la raíz del proyecto):
+    python3 -m benchmarks.bench_pipeline_scaling --filas 200000 --workers 1 2 4 8
+"""
+import argparse
+import hashlib
+import json
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.bench_catalog_shards import catalogo_aleatorio
+from generar_coordenadas_3D import guardar_orbitas_3d, preparar_asteroides_para_orbitas
+from modules.json_export import web_source_columns, write_records_json, write_records_json_partitioned
+from modules.moid import compute_moid_catalog
+from modules.pipeline import PartitionExecutor
+
+
+def huella(*rutas):
+    digest = hashlib.sha1()
+    for ruta in rutas:
+        with open(ruta, 'rb') as f:
+            for trozo in iter(lambda: f.read(1 << 20), b""):
+                digest.update(trozo)
+    return digest.hexdigest()
+
+
+def etapa_moid(df, ejecutor):
+    valores = compute_moid_catalog(df, ejecutor=ejecutor)['moid'].to_numpy()
+    return hashlib.sha1(valores.tobytes()).hexdigest()
+
+
+def etapa_export(df, ejecutor):
+    if ejecutor.paralelo:
+        with ejecutor.share(df, web_source_columns(df)) as frame:
+            write_records_json_partitioned(frame, np.arange(len(df)), "web.json", ejecutor, indent=None)
+    else:
+        write_records_json(df, "web.json", indent=None)
+    return huella("web.json")
+
+
+def etapa_orbitas(df, ejecutor):
+    guardar_orbitas_3d(preparar_asteroides_para_orbitas(df, limite=0), formato="bin", ejecutor=ejecutor)
+    return huella("orbitas_3d.index.json", "orbitas_3d.bin")
+
+
+ETAPAS = {'moid': etapa_moid, 'export': etapa_export, 'orbitas': etapa_orbitas}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Escalado de las etapas del pipeline con el número de procesos.")
+    parser.add_argument('--filas', type=int, default=200_000)
+    parser.add_argument('--filas-moid', type=int, default=20_000,
+                        help="La MOID es mucho más cara por fila: se mide sobre las primeras N.")
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, os.cpu_count() or 1])
+    parser.add_argument('--etapas', nargs='+', choices=list(ETAPAS), default=list(ETAPAS))
+    parser.add_argument('--salida', help="Guarda los resultados en este archivo JSON.")
+    args = parser.parse_args(argv)
+
+    df = catalogo_aleatorio(args.filas)
+    df['epoch'] = 2460000.5
+    print(f"🧪 Catálogo sintético de {len(df):,} filas; {os.cpu_count()} núcleos disponibles.")
+    resultados = []
+    origen = os.getcwd()
+    with tempfile.TemporaryDirectory() as carpeta:
+        os.chdir(carpeta)
+        try:
+            for etapa in args.etapas:
+                datos = df.head(args.filas_moid) if etapa == 'moid' else df
+                referencia = None
+                for workers in sorted(set(args.workers)):
+                    with PartitionExecutor(workers) as ejecutor:
+                        inicio = time.perf_counter()
+                        firma = ETAPAS[etapa](datos, ejecutor)
+                        duracion = time.perf_counter() - inicio
+                    referencia = referencia or firma
+                    resultados.append({'etapa': etapa, 'filas': len(datos), 'workers': workers,
+                                       'segundos': duracion, 'identica': firma == referencia})
+        finally:
+            os.chdir(origen)
+
+    print(f"\n{'etapa':>8} {'filas':>9} {'procesos':>9} {'tiempo (s)':>11} {'aceleración':>12} {'salida':>8}")
+    for r in resultados:
+        base = next(x['segundos'] for x in resultados if x['etapa'] == r['etapa'])
+        print(f"{r['etapa']:>8} {r['filas']:>9,} {r['workers']:>9} {r['segundos']:>11.2f} "
+              f"{base / r['segundos']:>11.2f}x {'igual' if r['identica'] else 'DISTINTA':>8}")
+    if args.salida:
+        with open(args.salida, 'w') as f:
+            json.dump(resultados, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
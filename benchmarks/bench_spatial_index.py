@@ -0,0 +1,102 @@
+# benchmarks/bench_spatial_index.py
+"""
+Compara las consultas de los índices espaciales (modules/spatial_index.py)
+con una búsqueda exhaustiva en NumPy sobre un catálogo sintético: k vecinos
+en el espacio de órbitas y radio alrededor de la Tierra en el de posiciones.
+Imprime el tiempo de construcción, la mediana por consulta y la aceleración,
+y comprueba que ambos métodos devuelven las mismas filas.
+
+Uso (desde la raíz del proyecto):
+    python3 -m benchmarks.bench_spatial_index --filas 100000 1300000
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+
+from benchmarks.bench_catalog_shards import catalogo_aleatorio
+from modules.propagator import earth_position
+from modules.spatial_index import CatalogIndex, INDEX_COLUMNS, orbit_features
+
+EPOCH = 2460000.5
+
+
+def exhaustiva_knn(puntos, centro, k):
+    distancias = np.sqrt(((puntos - centro) ** 2).sum(axis=1))
+    cercanos = np.argpartition(distancias, k - 1)[:k]
+    orden = np.lexsort((cercanos, distancias[cercanos]))
+    return cercanos[orden]
+
+
+def exhaustiva_radio(puntos, centro, radio):
+    distancias = np.sqrt(((puntos - centro) ** 2).sum(axis=1))
+    dentro = np.flatnonzero(distancias <= radio)
+    return dentro[np.lexsort((dentro, distancias[dentro]))]
+
+
+def mediana_ms(funcion, centros):
+    tiempos = []
+    for centro in centros:
+        inicio = time.perf_counter()
+        funcion(centro)
+        tiempos.append(time.perf_counter() - inicio)
+    return float(np.median(tiempos)) * 1000
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Índices espaciales frente a búsqueda exhaustiva.")
+    parser.add_argument('--filas', type=int, nargs='+', default=[100_000, 1_300_000])
+    parser.add_argument('--consultas', type=int, default=200)
+    parser.add_argument('--k', type=int, default=10)
+    parser.add_argument('--radio', type=float, default=0.05, help="Radio (AU) de la consulta alrededor de la Tierra.")
+    parser.add_argument('--salida', help="Guarda los resultados en este archivo JSON.")
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(7)
+    resultados = []
+    for filas in args.filas:
+        df = catalogo_aleatorio(filas)
+        df['epoch'] = EPOCH
+        columnas = {col: df[col].to_numpy() for col in INDEX_COLUMNS}
+        inicio = time.perf_counter()
+        indice = CatalogIndex.build(columnas, EPOCH)
+        construccion = time.perf_counter() - inicio
+
+        # Las mismas coordenadas que indexa cada rejilla, en orden de fila
+        orbitas = orbit_features(df['a'], df['e'], df['i'])
+        posiciones = np.full((filas, 3), np.inf)
+        posiciones[indice.posiciones.filas] = indice.posiciones.puntos
+
+        muestra = rng.choice(filas, args.consultas, replace=False)
+        tierra = earth_position(EPOCH)
+        # Regiones alrededor de la Tierra y de asteroides al azar
+        centros_region = [tierra] + [posiciones[fila] for fila in muestra[1:]]
+        consultas = {
+            'knn órbitas': (orbitas[muestra],
+                            lambda c: indice.orbitas.knn(c, args.k)[0],
+                            lambda c: exhaustiva_knn(orbitas, c, args.k)),
+            'radio posiciones': (centros_region,
+                                 lambda c: indice.posiciones.radius(c, args.radio)[0],
+                                 lambda c: exhaustiva_radio(posiciones, c, args.radio)),
+        }
+        for nombre, (centros, con_indice, exhaustiva) in consultas.items():
+            iguales = all(np.array_equal(con_indice(c), exhaustiva(c)) for c in centros)
+            ms_indice = mediana_ms(con_indice, centros)
+            ms_exhaustiva = mediana_ms(exhaustiva, centros[:20])
+            resultados.append({'filas': filas, 'consulta': nombre, 'construccion_s': construccion,
+                               'ms_indice': ms_indice, 'ms_exhaustiva': ms_exhaustiva, 'iguales': iguales})
+
+    print(f"\n{'filas':>10} {'consulta':>17} {'construir (s)':>14} {'índice (ms)':>12} {'exhaustiva (ms)':>16} "
+          f"{'aceleración':>12} {'resultado':>10}")
+    for r in resultados:
+        print(f"{r['filas']:>10,} {r['consulta']:>17} {r['construccion_s']:>14.2f} {r['ms_indice']:>12.3f} "
+              f"{r['ms_exhaustiva']:>16.2f} {r['ms_exhaustiva'] / r['ms_indice']:>11.0f}x "
+              f"{'igual' if r['iguales'] else 'DISTINTO':>10}")
+    if args.salida:
+        with open(args.salida, 'w') as f:
+            json.dump(resultados, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
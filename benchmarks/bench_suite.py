@@ -0,0 +1,127 @@
+# benchmarks/bench_suite.py
+"""
+Suite de rendimiento reproducible sobre catálogos sintéticos con la forma de
+SBDB (benchmarks/synthetic_catalog.py). Para cada tamaño mide las etapas
+calientes del pipeline: carga del CSV y de la caché binaria, limpieza,
+ranking, export JSON de la web, órbitas 2D y 3D y el gráfico. Cada etapa
+registra tiempo, filas/s y memoria con el StageProfiler de main.py
+--profile (la mejor de varias repeticiones), y el informe JSON se puede
+comparar con uno anterior para detectar regresiones.
+
+Uso (desde la raíz del proyecto):
+    python3 -m benchmarks.bench_suite --filas 10000 100000 --salida base.json
+    python3 -m benchmarks.bench_suite --filas 10000 100000 --comparar base.json
+"""
+import argparse
+import os
+import sys
+import tempfile
+
+import matplotlib
+
+matplotlib.use('Agg')
+
+from benchmarks.synthetic_catalog import DEFAULT_SEED, ensure_catalog_csv  # noqa: E402
+from modules.analyzer import clean_and_prepare_data  # noqa: E402
+from modules.catalog_cache import load_catalog_cached  # noqa: E402
+from modules.data_loader import load_jpl_catalog_typed  # noqa: E402
+from modules.json_export import write_records_json  # noqa: E402
+from modules.orbits import generate_orbits_2d, generate_orbits_3d  # noqa: E402
+from modules.profiling import (DEFAULT_TOLERANCE, StageProfiler, compare_reports, load_report,  # noqa: E402
+                               print_comparison)
+from modules.ranking import RANKING_PROFILES, add_hazard_flag, rank_profiles  # noqa: E402
+from modules.visualizer import plot_orbital_distribution  # noqa: E402
+
+ETAPAS = ['carga_csv', 'carga_cache', 'limpieza', 'ranking', 'export_json', 'orbitas_2d', 'orbitas_3d', 'grafico']
+# Las órbitas completas ocupan n_puntos x 3 floats por asteroide: se miden sobre las primeras N filas
+DEFAULT_ORBIT_ROWS = 50_000
+ORBIT_POINTS = 360
+
+
+def medir_tamano(perfil, ruta_csv, filas, etapas, carpeta, orbitas=DEFAULT_ORBIT_ROWS, top=5000):
+    """Ejecuta las 'etapas' sobre el catálogo 'ruta_csv' y las registra en 'perfil' como '<etapa>@<filas>'."""
+    def etapa(nombre, n):
+        return perfil.stage(f"{nombre}@{filas}", n)
+
+    cache_root = os.path.join(carpeta, ".catalog_cache")
+    if 'carga_csv' in etapas:
+        with etapa('carga_csv', filas):
+            load_jpl_catalog_typed(ruta_csv, chunksize=250_000)
+    # La caché se construye fuera de la medición: se mide la carga en caliente
+    df = load_catalog_cached(ruta_csv, cache_root=cache_root)
+    if 'carga_cache' in etapas:
+        with etapa('carga_cache', filas):
+            df = load_catalog_cached(ruta_csv, cache_root=cache_root)
+
+    df = df.copy()
+    if 'limpieza' in etapas:
+        with etapa('limpieza', filas):
+            df = clean_and_prepare_data(df)
+    df = add_hazard_flag(df)
+
+    rankings = None
+    if 'ranking' in etapas:
+        with etapa('ranking', filas * len(RANKING_PROFILES)):
+            rankings = rank_profiles(df, list(RANKING_PROFILES), top)
+    if 'export_json' in etapas:
+        # Todo el catálogo en el orden del perfil por defecto, como main.py --top 0
+        ordenado = rank_profiles(df, top=len(df))
+        ordenado = next(iter(ordenado.values()))
+        with etapa('export_json', len(ordenado)):
+            write_records_json(ordenado, os.path.join(carpeta, "web.json"), indent=None)
+        os.remove(os.path.join(carpeta, "web.json"))
+
+    orb = df.dropna(subset=['a', 'e', 'i', 'om', 'w']).head(orbitas)
+    if 'orbitas_2d' in etapas:
+        with etapa('orbitas_2d', len(orb)):
+            generate_orbits_2d(orb['a'], orb['e'], orb['w'], n_puntos=ORBIT_POINTS)
+    if 'orbitas_3d' in etapas:
+        with etapa('orbitas_3d', len(orb)):
+            generate_orbits_3d(orb['a'], orb['e'], orb['i'], orb['om'], orb['w'], n_puntos=ORBIT_POINTS)
+
+    if 'grafico' in etapas:
+        # El gráfico de todo el catálogo: densidad a partir de DENSITY_THRESHOLD filas, puntos por debajo
+        with etapa('grafico', filas):
+            plot_orbital_distribution(df, salida=os.path.join(carpeta, "distribucion.png"))
+    return rankings
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Suite de rendimiento sobre catálogos sintéticos de SBDB.")
+    parser.add_argument('--filas', type=int, nargs='+', default=[10_000, 100_000],
+                        help="Tamaños de catálogo (p. ej. 10000 100000 1000000 5000000).")
+    parser.add_argument('--etapas', nargs='+', choices=ETAPAS, default=ETAPAS)
+    parser.add_argument('--datos', default="datos_sinteticos",
+                        help="Carpeta de los CSV sintéticos (se generan solo la primera vez).")
+    parser.add_argument('--semilla', type=int, default=DEFAULT_SEED)
+    parser.add_argument('--orbitas', type=int, default=DEFAULT_ORBIT_ROWS,
+                        help="Asteroides de las etapas de órbitas 2D/3D.")
+    parser.add_argument('--repeticiones', type=int, default=3,
+                        help="Veces que se mide cada tamaño; de cada etapa se guarda la más rápida.")
+    parser.add_argument('--salida', help="Guarda el informe JSON en este archivo.")
+    parser.add_argument('--comparar', metavar='BASE', help="Informe anterior con el que comparar.")
+    parser.add_argument('--tolerancia', type=float, default=DEFAULT_TOLERANCE)
+    args = parser.parse_args(argv)
+
+    perfiles = [StageProfiler() for _ in range(max(1, args.repeticiones))]
+    for filas in args.filas:
+        ruta_csv = os.path.abspath(ensure_catalog_csv(args.datos, filas, args.semilla))
+        for repeticion, perfil in enumerate(perfiles, 1):
+            print(f"\n===== {filas:,} filas (repetición {repeticion} de {len(perfiles)}) =====")
+            with tempfile.TemporaryDirectory() as carpeta:
+                medir_tamano(perfil, ruta_csv, filas, set(args.etapas), carpeta, args.orbitas)
+
+    perfil = StageProfiler.best_of(perfiles)
+    perfil.summary()
+    contexto = {'comando': ['benchmarks.bench_suite', *(argv if argv is not None else sys.argv[1:])],
+                'filas': args.filas, 'semilla': args.semilla, 'repeticiones': len(perfiles)}
+    informe = perfil.write(args.salida, **contexto) if args.salida else perfil.report(**contexto)
+    if args.comparar:
+        comparacion = compare_reports(load_report(args.comparar), informe, args.tolerancia)
+        print_comparison(comparacion)
+        if any(r['regresion'] for r in comparacion):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
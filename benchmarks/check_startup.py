@@ -0,0 +1,122 @@
+# benchmarks/check_startup.py
+"""
+Comprueba el arranque de cli.py: ejecuta cada subcomando con --help bajo
+`python -X importtime`, suma el tiempo de importación de todos los módulos
+y verifica que no supera su presupuesto ni importa dependencias pesadas
+que el subcomando no necesita (matplotlib, astropy/astroquery, Flask o
+pandas). Así los trabajos de cron y las invocaciones cortas no vuelven a
+pagar importaciones pesadas sin que se note.
+
+Termina con código 1 si algún caso se sale del presupuesto.
+
+Uso (desde la raíz del proyecto):
+    python3 -m benchmarks.check_startup
+    python3 -m benchmarks.check_startup --escala 2 --salida arranque.json   # máquinas lentas
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CLI = os.path.join(RAIZ, "cli.py")
+
+GRAFICOS = {'matplotlib'}
+HORIZONS = {'astropy', 'astroquery'}
+SERVIDOR = {'flask', 'flask_cors'}
+
+# (argumentos de cli.py, presupuesto de importación en segundos, paquetes que no debe importar).
+# Todos por debajo de un segundo, con un 30 % de margen sobre lo medido en las
+# máquinas de desarrollo (export 0.61 s y serve 0.74 s en la más lenta). En
+# máquinas más lentas se escalan con --escala en vez de subirlos aquí.
+CASOS = [
+    (['--help'], 0.15, GRAFICOS | HORIZONS | SERVIDOR | {'numpy', 'pandas'}),
+    (['positions', '--help'], 0.4, GRAFICOS | HORIZONS | SERVIDOR | {'pandas'}),
+    (['export', '--help'], 0.8, GRAFICOS | HORIZONS | SERVIDOR),
+    (['orbits2d', '--help'], 0.8, GRAFICOS | HORIZONS | SERVIDOR),
+    (['orbits3d', '--help'], 0.8, GRAFICOS | HORIZONS | SERVIDOR),
+    (['ephemeris', '--help'], 0.8, GRAFICOS | HORIZONS | SERVIDOR),
+    (['approaches', '--help'], 0.8, GRAFICOS | HORIZONS | SERVIDOR),
+    (['plot', '--help'], 0.8, GRAFICOS | HORIZONS | SERVIDOR),
+    (['serve', '--help'], 0.95, GRAFICOS | HORIZONS),
+]
+
+
+def medir_importaciones(argumentos):
+    """
+    Ejecuta cli.py con 'argumentos' bajo -X importtime. Devuelve el tiempo
+    de importación (suma de los tiempos propios, en s), el tiempo de reloj
+    del proceso y el conjunto de paquetes de primer nivel importados.
+    """
+    inicio = time.perf_counter()
+    proceso = subprocess.run([sys.executable, '-X', 'importtime', CLI, *argumentos], cwd=RAIZ,
+                             capture_output=True, text=True)
+    reloj = time.perf_counter() - inicio
+    if proceso.returncode != 0:
+        raise RuntimeError(f"'cli.py {' '.join(argumentos)}' terminó con código {proceso.returncode}:\n"
+                           f"{proceso.stderr[-2000:]}")
+
+    propio_us = 0
+    paquetes = set()
+    # Formato de cada línea: "import time: <propio us> | <acumulado us> | <módulo>"
+    for linea in proceso.stderr.splitlines():
+        if not linea.startswith('import time:'):
+            continue
+        campos = linea[len('import time:'):].split('|')
+        if len(campos) != 3 or not campos[0].strip().isdigit():
+            continue  # La cabecera de la tabla
+        propio_us += int(campos[0])
+        paquetes.add(campos[2].strip().split('.')[0])
+    return propio_us / 1e6, reloj, paquetes
+
+
+def comprobar_arranque(repeticiones=3, escala=1.0, casos=CASOS):
+    """
+    Mide cada caso de 'casos' (se queda con la más rápida de 'repeticiones')
+    y devuelve una lista de resultados, uno por caso, con 'ok' a False si se
+    sale del presupuesto (multiplicado por 'escala') o importa un paquete
+    prohibido.
+    """
+    resultados = []
+    for argumentos, presupuesto, prohibidos in casos:
+        mediciones = [medir_importaciones(argumentos) for _ in range(max(1, repeticiones))]
+        importacion, reloj, paquetes = min(mediciones, key=lambda m: m[0])
+        presupuesto *= escala
+        indebidos = sorted(paquetes & prohibidos)
+        resultados.append({'comando': ' '.join(argumentos), 'importacion_s': importacion, 'reloj_s': reloj,
+                           'presupuesto_s': presupuesto, 'modulos': len(paquetes), 'indebidos': indebidos,
+                           'ok': importacion <= presupuesto and not indebidos})
+    return resultados
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Presupuesto de arranque de los subcomandos de cli.py.")
+    parser.add_argument('--repeticiones', type=int, default=3,
+                        help="Veces que se mide cada caso; se guarda la más rápida.")
+    parser.add_argument('--escala', type=float, default=1.0,
+                        help="Multiplica todos los presupuestos (p. ej. 2 en máquinas lentas).")
+    parser.add_argument('--salida', help="Guarda los resultados en este archivo JSON.")
+    args = parser.parse_args(argv)
+
+    resultados = comprobar_arranque(args.repeticiones, args.escala)
+
+    print(f"\n{'comando':>22} {'importación (s)':>16} {'reloj (s)':>10} {'presupuesto (s)':>16} {'resultado':>10}")
+    for r in resultados:
+        estado = "ok" if r['ok'] else "FALLA"
+        print(f"{r['comando']:>22} {r['importacion_s']:>16.3f} {r['reloj_s']:>10.3f} {r['presupuesto_s']:>16.2f} "
+              f"{estado:>10}" + (f"  importa {', '.join(r['indebidos'])}" if r['indebidos'] else ""))
+    if args.salida:
+        with open(args.salida, 'w') as f:
+            json.dump(resultados, f, indent=2)
+
+    fallos = [r['comando'] for r in resultados if not r['ok']]
+    if fallos:
+        print(f"\n❌ {len(fallos)} casos fuera del presupuesto de arranque: {', '.join(fallos)}")
+        sys.exit(1)
+    print("\n✅ Todos los subcomandos arrancan dentro del presupuesto.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+# benchmarks/load_test_api.py
+"""
+Prueba de carga local de la API de asf.py: lanza una mezcla de consultas
+típicas de los dashboards (páginas filtradas, órbitas, posiciones) desde
+varios hilos y mide la latencia (p50/p99) y las peticiones por segundo.
+
+Contra un servidor ya arrancado (python3 asf.py):
+    python3 -m benchmarks.load_test_api --url http://127.0.0.1:5001
+
+Sin servidor, con el cliente de pruebas de Flask y un catálogo sintético:
+    python3 -m benchmarks.load_test_api --sintetico 200000 --cache 0
+"""
+import argparse
+import json
+import random
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+FILTROS = [
+    "", "es_peligroso=1", "max_distancia_min_orbita_au=0.05", "min_diameter=1",
+    "min_a=0.9&max_a=1.1", "es_peligroso=1&max_distancia_min_orbita_au=0.02",
+]
+ORDENES = ["", "orden=-diameter", "orden=distancia_min_orbita_au", "orden=magnitud_absoluta"]
+
+
+def generar_rutas(spkids, n, seed=0):
+    """
+    Mezcla de peticiones con repeticiones, como la de varios usuarios
+    navegando los mismos filtros: 60% páginas, 25% órbitas, 15% posiciones.
+    """
+    rng = random.Random(seed)
+    rutas = []
+    for _ in range(n):
+        tipo = rng.random()
+        if tipo < 0.6:
+            partes = [rng.choice(FILTROS), rng.choice(ORDENES), f"pagina={rng.randint(1, 5)}"]
+            rutas.append("/api/asteroids?" + "&".join(p for p in partes if p))
+        elif tipo < 0.85:
+            ids = ",".join(str(spkid) for spkid in rng.sample(spkids[:200], 10))
+            rutas.append(f"/api/orbits?ids={ids}")
+        else:
+            rutas.append(f"/api/positions?epoch={2460000.5 + rng.randint(0, 30)}")
+    return rutas
+
+
+def cliente_http(url_base):
+    def pedir(ruta, etag=None):
+        peticion = urllib.request.Request(url_base + ruta, headers={'If-None-Match': etag} if etag else {})
+        try:
+            with urllib.request.urlopen(peticion) as respuesta:
+                return respuesta.status, respuesta.read(), respuesta.headers.get('ETag')
+        except urllib.error.HTTPError as e:
+            return e.code, b"", e.headers.get('ETag')
+    return pedir
+
+
+def cliente_local(app):
+    cliente = app.test_client()
+
+    def pedir(ruta, etag=None):
+        respuesta = cliente.get(ruta, headers={'If-None-Match': etag} if etag else {})
+        return respuesta.status_code, respuesta.get_data(), respuesta.headers.get('ETag')
+    return pedir
+
+
+def ejecutar(pedir, rutas, hilos, condicional):
+    """
+    Lanza las peticiones y devuelve, por endpoint, las latencias en segundos,
+    más el número de 304 y de errores. Con 'condicional', las rutas repetidas
+    se piden con el ETag recibido antes (como haría el navegador).
+    """
+    etags = {}
+
+    def una(ruta):
+        inicio = time.perf_counter()
+        estado, _, etag = pedir(ruta, etags.get(ruta) if condicional else None)
+        if etag:
+            etags[ruta] = etag
+        return ruta.split('?')[0], estado, time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=hilos) as pool:
+        resultados = list(pool.map(una, rutas))
+    return resultados, time.perf_counter() - inicio
+
+
+def resumen(resultados, duracion):
+    print(f"\n{'endpoint':>16} {'peticiones':>10} {'p50 (ms)':>9} {'p99 (ms)':>9} {'304':>6} {'errores':>8}")
+    for endpoint in sorted({r[0] for r in resultados}) + ['total']:
+        filas = [r for r in resultados if endpoint in ('total', r[0])]
+        latencias = np.array([r[2] for r in filas]) * 1000
+        print(f"{endpoint:>16} {len(filas):>10} {np.percentile(latencias, 50):>9.2f} "
+              f"{np.percentile(latencias, 99):>9.2f} {sum(r[1] == 304 for r in filas):>6} "
+              f"{sum(r[1] >= 400 for r in filas):>8}")
+    print(f"\n⏱️ {len(resultados)} peticiones en {duracion:.2f} s: {len(resultados) / duracion:,.0f} peticiones/s")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Prueba de carga de la API local del catálogo.")
+    parser.add_argument('--url', help="URL base de un servidor arrancado (si no, se usa el cliente de Flask).")
+    parser.add_argument('--sintetico', type=int, default=0,
+                        help="Sin --url: usa un catálogo sintético de N filas en vez de jpl_catalog.csv.")
+    parser.add_argument('--peticiones', type=int, default=2000)
+    parser.add_argument('--hilos', type=int, default=8)
+    parser.add_argument('--cache', type=int, default=None, help="Sin --url: tamaño de la caché LRU (0 la desactiva).")
+    parser.add_argument('--condicional', action='store_true', help="Reenvía los ETag recibidos (If-None-Match).")
+    parser.add_argument('--salida', help="Guarda las latencias en este archivo JSON.")
+    args = parser.parse_args(argv)
+
+    if args.url:
+        pedir = cliente_http(args.url.rstrip('/'))
+        _, cuerpo, _ = pedir("/api/asteroids?por_pagina=200")
+        spkids = [asteroide['spkid'] for asteroide in json.loads(cuerpo)['asteroides']]
+    else:
+        import asf
+        from benchmarks.bench_catalog_shards import catalogo_aleatorio
+        from modules.catalog_store import CatalogStore
+
+        if args.sintetico:
+            df = catalogo_aleatorio(args.sintetico)
+            df['epoch'] = 2460000.5
+            asf.configurar(store=CatalogStore(df))
+        asf.configurar(cache=args.cache)
+        spkids = asf.get_store().df['spkid'].head(200).tolist()
+        pedir = cliente_local(asf.app)
+
+    rutas = generar_rutas(spkids, args.peticiones)
+    resultados, duracion = ejecutar(pedir, rutas, args.hilos, args.condicional)
+    resumen(resultados, duracion)
+    if args.salida:
+        with open(args.salida, 'w') as f:
+            json.dump([{'endpoint': e, 'estado': s, 'latencia_s': t} for e, s, t in resultados], f)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,249 @@
+# benchmarks/synthetic_catalog.py
+"""
+Genera catálogos sintéticos con la forma del CSV de SBDB (mismas columnas,
+orden y formato que 'jpl_catalog.csv') y distribuciones de elementos
+realistas por población: cinturón principal con los huecos de Kirkwood,
+Hungarias, cruzadores de Marte, NEOs, Hildas, troyanos, centauros y TNOs.
+H sigue una ley de potencias, el diámetro y el albedo solo se conocen en una
+parte (sobre todo en los brillantes), y la MOID y los indicadores 'neo'/'pha'
+se derivan de la órbita. Con el mismo número de filas y la misma semilla el
+archivo es idéntico, así que las mediciones son reproducibles.
+
+Uso (desde la raíz del proyecto):
+    python3 -m benchmarks.synthetic_catalog --filas 10000 100000 1000000 5000000 --carpeta datos_sinteticos
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from modules.data_loader import JPL_DTYPES
+
+# Columnas del CSV, en el orden de la exportación de SBDB
+SBDB_COLUMNS = list(JPL_DTYPES)
+DEFAULT_SEED = 2023
+# Filas por bloque: el archivo se escribe por partes y la memoria no crece con él
+BLOCK_ROWS = 250_000
+STANDARD_EPOCH = 2461000.5
+# Poblaciones: (fracción del catálogo, H máxima). Las fracciones son las de SBDB.
+POPULATIONS = {
+    'cinturon': (0.915, 18.5),
+    'hungaria': (0.020, 19.0),
+    'cruzador_marte': (0.015, 20.0),
+    'neo': (0.027, 24.0),
+    'hilda': (0.006, 17.0),
+    'troyano': (0.011, 16.0),
+    'centauro': (0.002, 14.0),
+    'tno': (0.004, 9.0),
+}
+# Huecos de Kirkwood (resonancias 3:1, 5:2, 7:3 y 2:1 con Júpiter) y su semiancho en AU
+KIRKWOOD_GAPS = ((2.502, 0.015), (2.825, 0.012), (2.958, 0.008), (3.279, 0.02))
+# Pendiente de la distribución acumulada de magnitudes: N(<H) ∝ 10^(H_SLOPE·H)
+H_SLOPE = 0.4
+# Fracción de asteroides con nombre propio y de numerados (el resto solo tiene designación provisional)
+NAMED_FRACTION = 0.02
+NUMBERED_FRACTION = 0.6
+_LETRAS = np.array(list("ABCDEFGHJKLMNOPQRSTUVWXYZ"))
+_MEDIO_MES = np.array(list("ABCDEFGHJKLMNOPQRSTUVWXY"))
+# Años de las designaciones provisionales
+PRIMER_ANIO = 1990
+NUM_ANIOS = 35
+
+
+def _main_belt(rng, n):
+    # Tres zonas del cinturón con su densidad relativa; lo que cae en un hueco se vuelve a sortear
+    a = np.empty(n)
+    pendientes = np.arange(n)
+    while pendientes.size:
+        zona = rng.choice(3, pendientes.size, p=[0.38, 0.42, 0.20])
+        a[pendientes] = np.choose(zona, [rng.uniform(2.1, 2.5, pendientes.size),
+                                         rng.uniform(2.5, 2.95, pendientes.size),
+                                         rng.uniform(2.95, 3.4, pendientes.size)])
+        en_hueco = np.zeros(pendientes.size, dtype=bool)
+        for centro, ancho in KIRKWOOD_GAPS:
+            en_hueco |= np.abs(a[pendientes] - centro) < ancho
+        pendientes = pendientes[en_hueco]
+    # Sin perihelios por debajo de 1.666 AU: esos serían cruzadores de Marte
+    e = np.minimum(rng.rayleigh(0.1, n), 0.95 * (1 - 1.666 / a))
+    i = rng.rayleigh(7.0, n)
+    return a, np.abs(e), i
+
+
+def _population_elements(rng, poblacion, n):
+    """a (AU), e, i (grados) de 'n' objetos de una población."""
+    if poblacion == 'cinturon':
+        return _main_belt(rng, n)
+    if poblacion == 'hungaria':
+        return rng.uniform(1.78, 2.0, n), rng.uniform(0.0, 0.18, n), rng.normal(22, 4, n)
+    if poblacion == 'cruzador_marte':
+        a = rng.uniform(1.6, 3.2, n)
+        q = rng.uniform(1.3, 1.666, n)
+        return a, 1 - q / a, rng.rayleigh(12, n)
+    if poblacion == 'neo':
+        a = np.clip(rng.lognormal(np.log(1.7), 0.35, n), 0.6, 4.5)
+        q = rng.uniform(0.08, np.minimum(1.3, a * 0.98), n)
+        return a, 1 - q / a, rng.rayleigh(11, n)
+    if poblacion == 'hilda':
+        return rng.normal(3.97, 0.03, n), rng.uniform(0.05, 0.3, n), rng.rayleigh(8, n)
+    if poblacion == 'troyano':
+        return rng.normal(5.2, 0.05, n), rng.rayleigh(0.07, n), rng.rayleigh(12, n)
+    if poblacion == 'centauro':
+        return rng.uniform(5.5, 30, n), rng.uniform(0.1, 0.6, n), rng.rayleigh(15, n)
+    # TNOs: cinturón clásico y una cola de objetos dispersos
+    a = np.where(rng.random(n) < 0.8, rng.uniform(30, 50, n), rng.lognormal(np.log(70), 0.5, n))
+    return a, rng.uniform(0.0, 0.3, n), rng.rayleigh(10, n)
+
+
+def _designations(filas):
+    """
+    Designaciones provisionales ('2015 AB12') a partir del número de fila:
+    la letra, el medio mes, el año (desde PRIMER_ANIO) y el ciclo son las
+    cifras de la fila en base 25, 24, NUM_ANIOS y lo que sobra. Cada fila
+    del catálogo tiene la suya, distinta de todas las demás y la misma en
+    cada ejecución.
+    """
+    letra, resto = np.divmod(np.asarray(filas, dtype=np.int64), len(_LETRAS))[::-1]
+    medio_mes, resto = np.divmod(resto, len(_MEDIO_MES))[::-1]
+    anio, ciclo = np.divmod(resto, NUM_ANIOS)[::-1]
+    sufijo = np.where(ciclo > 0, ciclo.astype(str), "")
+    return [f"{y} {m}{l}{c}" for y, m, l, c in zip((PRIMER_ANIO + anio).tolist(), _MEDIO_MES[medio_mes],
+                                                   _LETRAS[letra], sufijo)]
+
+
+def _full_names(filas, spkid, numerado, con_nombre):
+    """
+    Nombres con el formato de SBDB: '   433 Eros (A898 PA)' para los
+    numerados con nombre, '  123456 (2001 AB12)' para los numerados sin
+    nombre y '       (2015 AB12)' para los que solo tienen designación.
+    """
+    designaciones = _designations(filas)
+    numeros = spkid - 2_000_000
+    nombres = []
+    for numero, es_numerado, tiene_nombre, designacion in zip(numeros.tolist(), numerado.tolist(),
+                                                              con_nombre.tolist(), designaciones):
+        if not es_numerado:
+            nombres.append(f"       ({designacion})")
+        elif tiene_nombre:
+            nombres.append(f"{numero:>7} Sintetico{numero} ({designacion})")
+        else:
+            nombres.append(f"{numero:>7} ({designacion})")
+    return nombres
+
+
+def _nodal_moid(a, e, w_deg):
+    """
+    Cota de la MOID con la Tierra (órbita circular de 1 AU): la distancia en
+    los nodos, donde la órbita corta la eclíptica. Es exacta para órbitas
+    muy inclinadas y basta para que 'pha' y los rankings tengan sentido.
+    """
+    semilado_recto = a * (1 - e ** 2)
+    coseno = np.cos(np.radians(w_deg))
+    return np.minimum(np.abs(semilado_recto / (1 + e * coseno) - 1),
+                      np.abs(semilado_recto / (1 - e * coseno) - 1))
+
+
+def generate_catalog(n, seed=DEFAULT_SEED, primera_fila=0):
+    """
+    DataFrame de 'n' filas con las columnas de SBDB (SBDB_COLUMNS). Los SPK-ID
+    empiezan en 2000001 + primera_fila, así que los bloques de un mismo
+    catálogo no se repiten.
+    """
+    rng = np.random.default_rng([seed, primera_fila])
+    nombres_poblacion = list(POPULATIONS)
+    fracciones = np.array([POPULATIONS[p][0] for p in nombres_poblacion])
+    poblacion = rng.choice(len(nombres_poblacion), n, p=fracciones / fracciones.sum())
+
+    a, e, i, h_max = (np.empty(n) for _ in range(4))
+    for k, nombre in enumerate(nombres_poblacion):
+        filas = np.flatnonzero(poblacion == k)
+        a[filas], e[filas], i[filas] = _population_elements(rng, nombre, filas.size)
+        h_max[filas] = POPULATIONS[nombre][1]
+    e = np.clip(e, 0.0, 0.99)
+    i = np.abs(i) % 180
+    om, w, ma = (rng.uniform(0, 360, n) for _ in range(3))
+
+    # Ley de potencias truncada: los objetos débiles son mucho más numerosos
+    H = np.maximum(h_max - rng.exponential(1 / (H_SLOPE * np.log(10)), n), 3.0)
+    # Albedo bimodal (tipos C y S); el diámetro y el albedo se conocen sobre todo en los brillantes
+    albedo = np.where(rng.random(n) < 0.6, rng.lognormal(np.log(0.06), 0.3, n), rng.lognormal(np.log(0.25), 0.3, n))
+    conocido = rng.random(n) < 1 / (1 + np.exp(H - 15))
+    diametro = 1329 / np.sqrt(albedo) * 10 ** (-H / 5) * rng.lognormal(0, 0.05, n)
+    rotacion = np.where(rng.random(n) < 0.6 * conocido + 0.01, rng.lognormal(np.log(7), 0.8, n), np.nan)
+
+    q = a * (1 - e)
+    moid = np.where(rng.random(n) < 0.02, np.nan, _nodal_moid(a, e, w))
+    es_neo = q < 1.3
+    es_pha = es_neo & (moid <= 0.05) & (H <= 22)
+    spkid = 2_000_001 + primera_fila + np.arange(n)
+    numerado = rng.random(n) < NUMBERED_FRACTION
+    con_nombre = numerado & (rng.random(n) < NAMED_FRACTION / NUMBERED_FRACTION)
+    # Los que solo tienen designación provisional van aparte (5xxxxxxx), lejos de los numerados
+    spkid = np.where(numerado, spkid, spkid + 50_000_000)
+    epoch = np.where(rng.random(n) < 0.97, STANDARD_EPOCH, STANDARD_EPOCH - rng.integers(1, 40, n) * 200.0)
+
+    return pd.DataFrame({
+        'full_name': _full_names(primera_fila + np.arange(n), spkid, numerado, con_nombre),
+        'spkid': spkid,
+        'pha': np.where(es_pha, 'Y', 'N'),
+        'neo': np.where(es_neo, 'Y', 'N'),
+        'H': np.round(H, 2),
+        'diameter': np.where(conocido, np.round(diametro, 3), np.nan),
+        'albedo': np.where(conocido, np.round(albedo, 3), np.nan),
+        'rot_per': np.round(rotacion, 4),
+        'e': e,
+        'a': a,
+        'q': q,
+        'i': i,
+        'om': om,
+        'w': w,
+        'ma': ma,
+        'ad': a * (1 + e),
+        'n': 0.9856076686 / a ** 1.5,
+        'per_y': a ** 1.5,
+        'moid': moid,
+        'epoch': epoch,
+    }, columns=SBDB_COLUMNS)
+
+
+def write_catalog_csv(ruta, n, seed=DEFAULT_SEED, block_rows=BLOCK_ROWS):
+    """Escribe un catálogo sintético de 'n' filas en 'ruta', bloque a bloque."""
+    inicio = time.perf_counter()
+    tmp_path = ruta + ".tmp"
+    with open(tmp_path, 'w', newline='') as f:
+        for primera in range(0, n, block_rows):
+            bloque = generate_catalog(min(block_rows, n - primera), seed, primera)
+            bloque.to_csv(f, index=False, header=primera == 0)
+    os.replace(tmp_path, ruta)
+    print(f"🧪 Catálogo sintético de {n:,} filas en '{ruta}' ({os.path.getsize(ruta) / 1e6:,.0f} MB) "
+          f"en {time.perf_counter() - inicio:.1f} s.")
+    return ruta
+
+
+def synthetic_catalog_path(carpeta, n, seed=DEFAULT_SEED):
+    return os.path.join(carpeta, f"sbdb_sintetico_{n}_{seed}.csv")
+
+
+def ensure_catalog_csv(carpeta, n, seed=DEFAULT_SEED):
+    """Ruta del catálogo sintético de 'n' filas en 'carpeta'; solo se genera si no existe."""
+    os.makedirs(carpeta, exist_ok=True)
+    ruta = synthetic_catalog_path(carpeta, n, seed)
+    if not os.path.exists(ruta):
+        write_catalog_csv(ruta, n, seed)
+    return ruta
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Genera catálogos sintéticos con la forma del CSV de SBDB.")
+    parser.add_argument('--filas', type=int, nargs='+', default=[10_000, 100_000, 1_000_000, 5_000_000])
+    parser.add_argument('--carpeta', default="datos_sinteticos")
+    parser.add_argument('--semilla', type=int, default=DEFAULT_SEED)
+    args = parser.parse_args(argv)
+
+    for filas in args.filas:
+        ensure_catalog_csv(args.carpeta, filas, args.semilla)
+
+
+if __name__ == "__main__":
+    main()
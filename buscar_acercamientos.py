@@ -0,0 +1,62 @@
+# buscar_acercamientos.py
+import argparse
+import json
+import numpy as np
+from modules.catalog_cache import load_catalog_cached
+from modules.close_approach import compare_with_neows, screen_close_approaches, to_neows_feed
+from modules.propagator import julian_date, julian_date_now
+
+def ventana_de_neows(ruta_neows):
+    """
+    Intervalo (jd_inicio, jd_fin) que cubre las fechas de un feed de NeoWs.
+    """
+    with open(ruta_neows) as f:
+        fechas = sorted(json.load(f)['near_earth_objects'])
+    return julian_date(fechas[0]), julian_date(fechas[-1]) + 1.0
+
+def buscar_acercamientos(archivo_csv="jpl_catalog.csv", inicio=None, dias=30, umbral=0.05, paso=1.0,
+                         workers=None, salida="acercamientos.json", comparar_neows=None):
+    """
+    Criba el catálogo completo en busca de acercamientos a la Tierra por debajo
+    de 'umbral' (AU) y los guarda con la forma del feed de NeoWs. Si se pasa un
+    feed de NeoWs para comparar, la ventana por defecto es la del feed.
+    """
+    df = load_catalog_cached(archivo_csv)
+    if df.empty:
+        return None
+
+    if inicio:
+        inicio_jd = julian_date(inicio)
+        fin_jd = inicio_jd + dias
+    elif comparar_neows:
+        inicio_jd, fin_jd = ventana_de_neows(comparar_neows)
+    else:
+        inicio_jd = np.floor(julian_date_now() - 0.5) + 0.5
+        fin_jd = inicio_jd + dias
+
+    tabla = screen_close_approaches(df, inicio_jd, fin_jd, umbral, paso, workers)
+    with open(salida, 'w') as f:
+        json.dump(to_neows_feed(tabla), f, indent=2)
+    print(f"💾 Acercamientos guardados en '{salida}'.")
+
+    if comparar_neows:
+        compare_with_neows(tabla, comparar_neows)
+    return tabla
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Busca acercamientos a la Tierra en todo el catálogo.")
+    parser.add_argument('--catalogo', default="jpl_catalog.csv", help="CSV del catálogo de JPL.")
+    parser.add_argument('--inicio', default=None, help="Fecha inicial ISO (por defecto, hoy).")
+    parser.add_argument('--dias', type=float, default=30, help="Duración de la ventana en días.")
+    parser.add_argument('--umbral', type=float, default=0.05, help="Distancia máxima en AU.")
+    parser.add_argument('--paso', type=float, default=1.0, help="Paso de la malla gruesa en días.")
+    parser.add_argument('--workers', type=int, default=None, help="Procesos (por defecto, todos los núcleos).")
+    parser.add_argument('--salida', default="acercamientos.json", help="JSON de salida (formato NeoWs).")
+    parser.add_argument('--comparar-neows', default=None,
+                        help="Feed de NeoWs guardado para comparar (p. ej. neows_data_7dpppp.json).")
+    args = parser.parse_args(argv)
+    buscar_acercamientos(args.catalogo, args.inicio, args.dias, args.umbral, args.paso, args.workers,
+                         args.salida, args.comparar_neows)
+
+if __name__ == "__main__":
+    main()
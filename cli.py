@@ -0,0 +1,57 @@
+# cli.py
+"""
+Single entry point for the pipeline scripts:
+
+    python3 cli.py export --top 2000        # main.py
+    python3 cli.py orbits3d --limite 0      # generar_coordenadas_3D.py
+    python3 cli.py positions                # horizons.py
+    python3 cli.py serve --puerto 5001      # asf.py
+
+Each subcommand forwards its arguments to the main(argv) of its script, and
+the script is only imported when its subcommand runs: `cli.py --help` loads
+nothing beyond the standard library, and a subcommand pays only for its own
+dependencies (matplotlib, astroquery/astropy and Flask are imported by the
+commands that use them). `python3 -m benchmarks.check_startup` keeps the
+startup times within budget.
+"""
+import argparse
+import importlib
+import sys
+
+# Subcommand -> (module with a main(argv), help)
+COMMANDS = {
+    'export': ('main', "Load, rank and export the catalog to JSON, then plot it (main.py)."),
+    'orbits2d': ('generar_coordenadas_2d', "Compute and plot the 2D orbits (generar_coordenadas_2d.py)."),
+    'orbits3d': ('generar_coordenadas_3D', "Compute the 3D orbits as JSON or binary (generar_coordenadas_3D.py)."),
+    'positions': ('horizons', "Current positions of Earth and 433 Eros from JPL Horizons (horizons.py)."),
+    'ephemeris': ('generar_efemerides', "Propagate the catalog over a range of epochs (generar_efemerides.py)."),
+    'approaches': ('buscar_acercamientos', "Search the catalog for close approaches (buscar_acercamientos.py)."),
+    'serve': ('asf', "Run the local catalog API (asf.py)."),
+    'plot': ('modules.visualizer', "Plot the orbital distribution and density tiles (modules/visualizer.py)."),
+}
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog='cli.py', description="Asteroid catalog pipeline.",
+        epilog="Run 'cli.py COMMAND --help' for the options of each command.")
+    subcommands = parser.add_subparsers(dest='command', metavar='COMMAND', required=True)
+    for name, (_, help_text) in COMMANDS.items():
+        # The options belong to each script's own parser; these entries only list the commands
+        subcommands.add_parser(name, help=help_text, add_help=False)
+    return parser
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else list(argv)
+    parser = build_parser()
+    # Only the command name is parsed here, the rest goes untouched to the script
+    command = parser.parse_args(argv[:1]).command
+    module = importlib.import_module(COMMANDS[command][0])
+    # The script's usage and error messages read 'cli.py COMMAND ...'
+    sys.argv = [f"{parser.prog} {command}", *argv[1:]]
+    return module.main(argv[1:])
+
+
+if __name__ == "__main__":
+    sys.exit(main())
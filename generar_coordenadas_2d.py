@@ -2,41 +2,28 @@ import pandas as pd
 import numpy as np
 import json
 import os
-import matplotlib.pyplot as plt
+import argparse
+from modules.catalog_cache import load_catalog_cached
+from modules.orbits import add_sampling_arguments, generate_orbits_2d, generate_orbits_adaptive, tolerance_from_args
 
 def generar_orbita_2d(a, e, w_deg):
     """
     Calcula los puntos (x, y) de una órbita en el plano 2D.
+    Usa el mismo núcleo vectorizado que el generador 3D (modules/orbits.py).
     """
-    w = np.radians(w_deg if w_deg is not None else 0)
-    theta = np.linspace(0, 2 * np.pi, 360)
-    r = a * (1 - e**2) / (1 + e * np.cos(theta))
-    x_plano = r * np.cos(theta)
-    y_plano = r * np.sin(theta)
-    x_rotado = x_plano * np.cos(w) - y_plano * np.sin(w)
-    y_rotado = x_plano * np.sin(w) + y_plano * np.cos(w)
-    return np.stack((x_rotado, y_rotado), axis=-1).tolist()
-
-def procesar_y_guardar_orbitas(archivo_csv="jpl_catalog.csv"):
+    return generate_orbits_2d(a, e, w_deg, dtype=np.float64)[0].tolist()
+
+def procesar_y_guardar_orbitas(archivo_csv="jpl_catalog.csv", tolerancia=None):
     """
     Carga el catálogo de asteroides, calcula las órbitas 2D y las guarda en un JSON.
+    Con 'tolerancia' (AU) cada órbita lleva los puntos justos para ese error
+    máximo en lugar de 360 puntos fijos.
     """
-    # --- LÓGICA DE RUTA ROBUSTA ---
-    # Obtenemos la ruta del directorio donde se encuentra este script.
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    # Construimos la ruta completa al archivo CSV, asumiendo que está en el mismo directorio.
-    file_path = os.path.join(script_dir, archivo_csv)
-
-    print(f"Buscando el archivo en la ruta: {file_path}")
-
-    if not os.path.exists(file_path):
-        print(f"❌ ERROR: No se encontró el archivo en la ruta esperada.")
-        print(f"   Asegúrate de que '{archivo_csv}' esté en la misma carpeta que este script: '{script_dir}'")
+    # El catálogo se carga a través de la caché binaria (ver modules/catalog_cache.py)
+    df = load_catalog_cached(archivo_csv)
+    if df.empty:
         return None
 
-    print(f"📁 Cargando catálogo desde '{file_path}'...")
-    df = pd.read_csv(file_path, skipinitialspace=True)
-    
     # Nos aseguramos de tener los datos necesarios (nombre o spkid como identificador)
     if 'full_name' not in df.columns or 'spkid' not in df.columns:
         print("❌ ERROR: El CSV debe contener las columnas 'full_name' y 'spkid'.")
@@ -56,10 +43,16 @@ def procesar_y_guardar_orbitas(archivo_csv="jpl_catalog.csv"):
 
     print("☄️ Calculando las órbitas de los asteroides...")
     # Limita el procesamiento a los primeros 50 para que el JSON no sea gigante
-    for index, asteroide in df_orbitas.head(50).iterrows():
-        identificador = asteroide['identificador']
-        orbita = generar_orbita_2d(asteroide['a'], asteroide['e'], asteroide['w'])
-        sistema_solar_2d[identificador] = {"nombre": identificador, "coordenadas": orbita}
+    df_orbitas = df_orbitas.head(50)
+    if tolerancia is not None:
+        ceros = np.zeros(len(df_orbitas))
+        orbitas = [orbita[:, :2] for orbita in generate_orbits_adaptive(
+            df_orbitas['a'], df_orbitas['e'], ceros, ceros, df_orbitas['w'], tolerancia, dtype=np.float64
+        )]
+    else:
+        orbitas = generate_orbits_2d(df_orbitas['a'], df_orbitas['e'], df_orbitas['w'], dtype=np.float64)
+    for identificador, orbita in zip(df_orbitas['identificador'], orbitas):
+        sistema_solar_2d[identificador] = {"nombre": identificador, "coordenadas": orbita.tolist()}
 
     archivo_salida = "orbitas_2d.json"
     print(f"💾 Guardando {len(sistema_solar_2d)} órbitas en '{archivo_salida}'...")
@@ -74,6 +67,8 @@ def graficar_orbitas_2d(archivo_json):
     """
     Lee el archivo JSON de órbitas y lo grafica con Matplotlib.
     """
+    import matplotlib.pyplot as plt
+
     print(f"🎨 Graficando órbitas desde '{archivo_json}'...")
     with open(archivo_json, 'r') as f:
         datos = json.load(f)
@@ -91,6 +86,8 @@ def graficar_orbitas_2d(archivo_json):
     # Graficar los asteroides
     for key, valor in datos.items():
         if key not in ['sol', 'tierra']:
+            if not valor['coordenadas']:
+                continue  # Órbita abierta (e >= 1): el muestreo adaptativo no le da puntos
             coords = np.array(valor['coordenadas'])
             ax.plot(coords[:, 0], coords[:, 1], linestyle='--', linewidth=0.7, alpha=0.6)
 
@@ -103,7 +100,15 @@ def graficar_orbitas_2d(archivo_json):
     plt.show()
 
 
-if __name__ == "__main__":
-    archivo_json_generado = procesar_y_guardar_orbitas()
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Genera y grafica las órbitas 2D de los asteroides.")
+    parser.add_argument('--catalogo', default="jpl_catalog.csv", help="CSV del catálogo de JPL.")
+    add_sampling_arguments(parser)
+    args = parser.parse_args(argv)
+    archivo_json_generado = procesar_y_guardar_orbitas(args.catalogo, tolerance_from_args(args))
     if archivo_json_generado:
-        graficar_orbitas_2d(archivo_json_generado)
\ No newline at end of file
+        graficar_orbitas_2d(archivo_json_generado)
+
+
+if __name__ == "__main__":
+    main()
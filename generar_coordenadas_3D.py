@@ -3,74 +3,291 @@ import pandas as pd
 import numpy as np
 import json
 import os
+import shutil
+import tempfile
+import argparse
+from modules.data_loader import resolve_catalog_path
+from modules.catalog_cache import cache_dir_for, load_catalog_cached
+from modules.orbits import (
+    add_sampling_arguments, generate_orbits_3d, generate_orbits_adaptive, iter_orbit_blocks, tolerance_from_args,
+)
+from modules.incremental import shape_hashes
+from modules.orbit_export import merge_orbit_binaries, patch_orbit_binary, write_orbit_binary
+from modules.pipeline import PartitionExecutor
+
+# Elementos orbitales de los planetas del sistema solar
+PLANETS_DATA = {
+    "Mercury": {"a": 0.387, "e": 0.205, "i_deg": 7.0, "om_deg": 48.3, "w_deg": 29.1},
+    "Venus":   {"a": 0.723, "e": 0.007, "i_deg": 3.4, "om_deg": 76.7, "w_deg": 54.9},
+    "Earth":   {"a": 1.0,   "e": 0.0167,"i_deg": 0.0, "om_deg": 0,    "w_deg": 102.9},
+    "Mars":    {"a": 1.524, "e": 0.093, "i_deg": 1.9, "om_deg": 49.6, "w_deg": 286.5},
+    "Jupiter": {"a": 5.203, "e": 0.048, "i_deg": 1.3, "om_deg": 100.5,"w_deg": 273.8},
+    "Saturn":  {"a": 9.537, "e": 0.054, "i_deg": 2.5, "om_deg": 113.7,"w_deg": 339.3},
+    "Uranus":  {"a": 19.191,"e": 0.047, "i_deg": 0.8, "om_deg": 74.0, "w_deg": 98.9},
+    "Neptune": {"a": 30.069,"e": 0.009, "i_deg": 1.8, "om_deg": 131.8,"w_deg": 276.3},
+}
 
 def generar_orbita_3d(a, e, i_deg, om_deg, w_deg):
     """
     Calcula los puntos (x, y, z) de una órbita en el espacio 3D a partir de sus elementos orbitales.
+    Usa el mismo núcleo vectorizado que el generador por lotes (modules/orbits.py).
+    """
+    return generate_orbits_3d(a, e, i_deg, om_deg, w_deg, dtype=np.float64)[0].tolist()
+
+def cargar_asteroides_para_orbitas(archivo_csv="jpl_catalog.csv", limite=100, solo_neo=False):
+    """
+    Devuelve el DataFrame de asteroides con elementos orbitales completos (y su
+    identificador), o None si no hay catálogo disponible.
+    """
+    file_path = resolve_catalog_path(archivo_csv)
+    if not (os.path.exists(file_path) or os.path.exists(cache_dir_for(file_path))):
+        print("⚠️ No se encontró el archivo del catálogo de asteroides, se omitirá su procesamiento.")
+        return None
+
+    print("📁 Cargando catálogo de asteroides...")
+    return preparar_asteroides_para_orbitas(load_catalog_cached(archivo_csv), limite, solo_neo)
+
+def preparar_asteroides_para_orbitas(df, limite=100, solo_neo=False):
+    """
+    Filtra un catálogo ya cargado: asteroides con elementos orbitales
+    completos, con su identificador (nombre completo o SPK-ID).
     """
-    i = np.radians(i_deg if pd.notna(i_deg) else 0)
-    om = np.radians(om_deg if pd.notna(om_deg) else 0)
-    w = np.radians(w_deg if pd.notna(w_deg) else 0)
-
-    theta = np.linspace(0, 2 * np.pi, 360)
-    r = a * (1 - e**2) / (1 + e * np.cos(theta))
-    x_plano = r * np.cos(theta)
-    y_plano = r * np.sin(theta)
-
-    xp = x_plano * (np.cos(w) * np.cos(om) - np.sin(w) * np.cos(i) * np.sin(om)) - \
-         y_plano * (np.sin(w) * np.cos(om) + np.cos(w) * np.cos(i) * np.sin(om))
-    
-    yp = x_plano * (np.cos(w) * np.sin(om) + np.sin(w) * np.cos(i) * np.cos(om)) + \
-         y_plano * (np.cos(w) * np.cos(i) * np.cos(om) - np.sin(w) * np.sin(om))
-    
-    zp = x_plano * (np.sin(w) * np.sin(i)) + y_plano * (np.cos(w) * np.sin(i))
-    
-    return np.stack((xp, yp, zp), axis=-1).tolist()
-
-def procesar_y_guardar_orbitas_3d(archivo_csv="jpl_catalog.csv"):
-    sistema_solar_3d = {}
-
-    # --- NEW: Orbital data for all solar system planets ---
-    planets_data = {
-        "Mercury": {"a": 0.387, "e": 0.205, "i_deg": 7.0, "om_deg": 48.3, "w_deg": 29.1},
-        "Venus":   {"a": 0.723, "e": 0.007, "i_deg": 3.4, "om_deg": 76.7, "w_deg": 54.9},
-        "Earth":   {"a": 1.0,   "e": 0.0167,"i_deg": 0.0, "om_deg": 0,    "w_deg": 102.9},
-        "Mars":    {"a": 1.524, "e": 0.093, "i_deg": 1.9, "om_deg": 49.6, "w_deg": 286.5},
-        "Jupiter": {"a": 5.203, "e": 0.048, "i_deg": 1.3, "om_deg": 100.5,"w_deg": 273.8},
-        "Saturn":  {"a": 9.537, "e": 0.054, "i_deg": 2.5, "om_deg": 113.7,"w_deg": 339.3},
-        "Uranus":  {"a": 19.191,"e": 0.047, "i_deg": 0.8, "om_deg": 74.0, "w_deg": 98.9},
-        "Neptune": {"a": 30.069,"e": 0.009, "i_deg": 1.8, "om_deg": 131.8,"w_deg": 276.3},
-    }
+    if df.empty:
+        return None
+    if solo_neo and 'neo' in df.columns:
+        df = df[df['neo'] == 'Y']
+    df = df.assign(identificador=df['full_name'].fillna(df['spkid'].astype(str)))
+    required_cols = ['a', 'e', 'i', 'om', 'w', 'identificador']
+    df_orbitas = df.dropna(subset=required_cols)
+    if limite:
+        df_orbitas = df_orbitas.head(limite)
+    return df_orbitas
+
+def iterar_planetas(dtype=np.float64, tolerancia=None):
+    """Bloque (nombres, órbitas) con las órbitas de los planetas."""
+    planetas = pd.DataFrame.from_dict(PLANETS_DATA, orient='index')
+    elementos = (planetas['a'], planetas['e'], planetas['i_deg'], planetas['om_deg'], planetas['w_deg'])
+    if tolerancia is not None:
+        yield list(planetas.index), generate_orbits_adaptive(*elementos, tolerancia=tolerancia, dtype=dtype)
+    else:
+        yield list(planetas.index), generate_orbits_3d(*elementos, dtype=dtype)
+
+def iterar_asteroides(df_orbitas, block_size=None, dtype=np.float64, tolerancia=None):
+    """Bloques (nombres, órbitas) con las órbitas de los asteroides de 'df_orbitas'."""
+    nombres = df_orbitas['identificador'].tolist()
+    bloques = iter_orbit_blocks(
+        df_orbitas['a'].to_numpy(), df_orbitas['e'].to_numpy(), df_orbitas['i'].to_numpy(),
+        df_orbitas['om'].to_numpy(), df_orbitas['w'].to_numpy(),
+        block_size=block_size, dtype=dtype, tolerancia=tolerancia,
+    )
+    for inicio, bloque in bloques:
+        yield nombres[inicio:inicio + len(bloque)], bloque
 
+def iterar_orbitas(df_orbitas, block_size=None, dtype=np.float64, tolerancia=None):
+    """
+    Produce pares (nombres, órbitas) por bloques: primero los planetas y luego
+    los asteroides de 'df_orbitas' (si hay). Con 'tolerancia' (AU) cada órbita
+    lleva los puntos justos para ese error máximo (muestreo adaptativo).
+    """
     print("🪐 Calculando las órbitas 3D de los planetas...")
-    for name, data in planets_data.items():
-        orbit = generar_orbita_3d(data["a"], data["e"], data["i_deg"], data["om_deg"], data["w_deg"])
-        sistema_solar_3d[name] = {"nombre": name, "coordenadas": orbit}
+    yield from iterar_planetas(dtype, tolerancia)
+
+    if df_orbitas is None:
+        return
+    print(f"☄️ Calculando órbitas 3D de {len(df_orbitas)} asteroides...")
+    yield from iterar_asteroides(df_orbitas, block_size, dtype, tolerancia)
+
+def escribir_entradas_json(f, bloques, separador=""):
+    """
+    Escribe en 'f' las entradas {nombre: {nombre, coordenadas}} de 'bloques'
+    separadas por comas, sin las llaves. Devuelve el separador de la
+    siguiente entrada (", " si se escribió alguna).
+    """
+    for nombres, orbitas in bloques:
+        for nombre, orbita in zip(nombres, orbitas):
+            entrada = {"nombre": nombre, "coordenadas": orbita.tolist()}
+            f.write(f"{separador}{json.dumps(nombre)}: {json.dumps(entrada)}")
+            separador = ", "
+    return separador
 
+def guardar_orbitas_json(bloques, archivo_salida="orbitas_3d.json"):
+    """
+    Escribe las órbitas en el JSON que usa el simulador ({nombre: {nombre, coordenadas}}),
+    entrada a entrada, sin construir el diccionario completo en memoria.
+    """
+    with open(archivo_salida, 'w') as f:
+        f.write("{")
+        escribir_entradas_json(f, bloques)
+        f.write("}")
+    return archivo_salida
+
+def _escribir_particion(df_parte, carpeta, formato, tolerancia):
+    """
+    Trabajo de cada proceso en guardar_orbitas_particionado: escribe las
+    órbitas de sus asteroides en un archivo parcial de 'carpeta' y devuelve
+    su ruta (el índice, en los formatos binarios).
+    """
+    fd, ruta = tempfile.mkstemp(dir=carpeta)
+    os.close(fd)
+    if formato == "json":
+        with open(ruta, 'w') as f:
+            escribir_entradas_json(f, iterar_asteroides(df_parte, tolerancia=tolerancia))
+        return ruta
+    os.remove(ruta)
+    return write_orbit_binary(iterar_asteroides(df_parte, dtype=np.float32, tolerancia=tolerancia), ruta,
+                              cuantizar=(formato == "bin16"))
+
+def guardar_orbitas_particionado(df_orbitas, formato, tolerancia, ejecutor):
+    """
+    Igual que la escritura secuencial, pero los asteroides se reparten por
+    particiones de filas entre los procesos de 'ejecutor' (ver
+    modules/pipeline.py), que leen sus elementos de memoria compartida y
+    escriben cada uno un archivo parcial. Las partes se unen en orden, así
+    que el resultado es idéntico byte a byte.
+    """
+    print(f"☄️ Calculando órbitas 3D de {len(df_orbitas)} asteroides en {ejecutor.workers} procesos...")
+    columnas = ['identificador', 'a', 'e', 'i', 'om', 'w']
+    with tempfile.TemporaryDirectory(prefix=".orbitas_", dir=".") as carpeta, \
+            ejecutor.share(df_orbitas, columnas) as frame:
+        partes = list(ejecutor.map(_escribir_particion, frame, args=(carpeta, formato, tolerancia)))
+        if formato != "json":
+            planetas = write_orbit_binary(iterar_planetas(np.float32, tolerancia), os.path.join(carpeta, "planetas"),
+                                          cuantizar=(formato == "bin16"))
+            return merge_orbit_binaries([planetas] + partes, "orbitas_3d")
+
+        archivo_salida = "orbitas_3d.json"
+        with open(archivo_salida, 'w') as f:
+            f.write("{")
+            separador = escribir_entradas_json(f, iterar_planetas(tolerancia=tolerancia))
+            for parte in partes:
+                if os.path.getsize(parte):
+                    f.write(separador)
+                    with open(parte) as origen:
+                        shutil.copyfileobj(origen, f)
+            f.write("}")
+        return archivo_salida
+
+def actualizar_orbitas_binario(df_orbitas, ruta_indice, opciones, tolerancia=None):
+    """
+    Actualización incremental de un export binario ya escrito: compara la
+    huella de la forma de cada órbita con la guardada en el índice y
+    sobrescribe en su sitio solo las que cambiaron. Devuelve False si hay que
+    regenerar el archivo completo (no existe, cambiaron las opciones o la
+    lista de asteroides, o alguna órbita cambió de número de puntos).
+    """
+    try:
+        with open(ruta_indice) as f:
+            indice = json.load(f)
+    except (OSError, ValueError):
+        return False
+    nombres = list(PLANETS_DATA) + df_orbitas['identificador'].tolist()
+    huellas = ['planeta'] * len(PLANETS_DATA) + shape_hashes(df_orbitas)
+    if indice.get('opciones') != opciones or indice.get('nombres') != nombres or 'huellas' not in indice:
+        return False
+
+    cambiadas = [j - len(PLANETS_DATA) for j, (nueva, vieja) in enumerate(zip(huellas, indice['huellas']))
+                 if nueva != vieja]
+    if cambiadas:
+        filas = df_orbitas.iloc[cambiadas]
+        elementos = (filas['a'], filas['e'], filas['i'], filas['om'], filas['w'])
+        if tolerancia is not None:
+            orbitas = generate_orbits_adaptive(*elementos, tolerancia=tolerancia, dtype=np.float32)
+        else:
+            orbitas = generate_orbits_3d(*elementos, dtype=np.float32)
+        if patch_orbit_binary(ruta_indice, filas['identificador'].tolist(), orbitas):
+            return False
+        _guardar_huellas(ruta_indice, huellas, opciones)
+    print(f"🔄 {len(cambiadas)} de {len(df_orbitas)} órbitas de asteroides actualizadas en su sitio.")
+    return True
+
+def _guardar_huellas(ruta_indice, huellas, opciones):
+    with open(ruta_indice) as f:
+        indice = json.load(f)
+    indice['huellas'], indice['opciones'] = huellas, opciones
+    with open(ruta_indice, 'w') as f:
+        json.dump(indice, f, separators=(',', ':'))
+
+def procesar_y_guardar_orbitas_3d(archivo_csv="jpl_catalog.csv", limite=100, solo_neo=False, block_size=None,
+                                  formato="json", tolerancia=None, incremental=False, workers=1):
+    """
+    Calcula las órbitas 3D de los planetas y de los asteroides del catálogo y las
+    guarda por bloques, así que la memoria no crece con 'limite' (0 = todos).
+    Ver guardar_orbitas_3d.
+    """
     # --- Process asteroids (optional, can be commented out if not needed) ---
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    file_path = os.path.join(script_dir, archivo_csv)
-    if os.path.exists(file_path):
-        print("📁 Cargando catálogo de asteroides...")
-        df = pd.read_csv(file_path, skipinitialspace=True)
-        df['identificador'] = df['full_name'].fillna(df['spkid'].astype(str))
-        required_cols = ['a', 'e', 'i', 'om', 'w', 'identificador']
-        df_orbitas = df.dropna(subset=required_cols).copy()
-        
-        print(f"☄️ Calculando órbitas 3D de los primeros {min(50, len(df_orbitas))} asteroides...")
-        for _, asteroide in df_orbitas.head(100).iterrows():
-            identificador = asteroide['identificador']
-            orbita = generar_orbita_3d(asteroide['a'], asteroide['e'], asteroide['i'], asteroide['om'], asteroide['w'])
-            sistema_solar_3d[identificador] = {"nombre": identificador, "coordenadas": orbita}
+    df_orbitas = cargar_asteroides_para_orbitas(archivo_csv, limite, solo_neo)
+    with PartitionExecutor(workers) as ejecutor:
+        return guardar_orbitas_3d(df_orbitas, block_size, formato, tolerancia, incremental, ejecutor)
+
+def guardar_orbitas_3d(df_orbitas, block_size=None, formato="json", tolerancia=None, incremental=False,
+                       ejecutor=None):
+    """
+    Guarda las órbitas 3D de los planetas y de los asteroides de 'df_orbitas'.
+
+    formato='json' escribe 'orbitas_3d.json'; 'bin' y 'bin16' escriben el formato
+    binario compacto ('orbitas_3d.index.json' + 'orbitas_3d.bin') en Float32 o
+    cuantizado a Int16 (ver modules/orbit_export.py).
+
+    Con 'tolerancia' (AU) se usa el muestreo adaptativo en lugar de 360 puntos
+    fijos por órbita (ver modules/orbits.py).
+
+    Con 'incremental' (solo formatos binarios) se regeneran únicamente las
+    órbitas cuyos elementos cambiaron desde la última ejecución.
+
+    Con un 'ejecutor' de varios procesos (modules/pipeline.py) los asteroides
+    se reparten entre ellos por particiones de filas.
+    """
+    total = len(PLANETS_DATA) + (len(df_orbitas) if df_orbitas is not None else 0)
+    particionado = ejecutor is not None and ejecutor.paralelo and df_orbitas is not None \
+        and len(ejecutor.partitions(len(df_orbitas))) > 1
+    if formato == "json":
+        archivo_salida = "orbitas_3d.json"
+        print(f"💾 Guardando {total} órbitas en '{archivo_salida}'...")
+        if particionado:
+            guardar_orbitas_particionado(df_orbitas, formato, tolerancia, ejecutor)
+        else:
+            guardar_orbitas_json(iterar_orbitas(df_orbitas, block_size, tolerancia=tolerancia), archivo_salida)
     else:
-        print("⚠️ No se encontró el archivo del catálogo de asteroides, se omitirá su procesamiento.")
+        opciones = {'formato': formato, 'tolerancia': tolerancia}
+        archivo_salida = "orbitas_3d.index.json"
+        if incremental and df_orbitas is not None \
+                and actualizar_orbitas_binario(df_orbitas, archivo_salida, opciones, tolerancia):
+            print(f"✅ ¡Éxito! Archivo '{archivo_salida}' actualizado.")
+            return archivo_salida
+        print(f"💾 Guardando {total} órbitas en formato binario ({formato})...")
+        if particionado:
+            archivo_salida = guardar_orbitas_particionado(df_orbitas, formato, tolerancia, ejecutor)
+        else:
+            bloques = iterar_orbitas(df_orbitas, block_size, dtype=np.float32, tolerancia=tolerancia)
+            archivo_salida = write_orbit_binary(bloques, "orbitas_3d", cuantizar=(formato == "bin16"))
+        if df_orbitas is not None:
+            # Huellas para poder actualizar el archivo con --incremental
+            _guardar_huellas(archivo_salida, ['planeta'] * len(PLANETS_DATA) + shape_hashes(df_orbitas), opciones)
 
-    archivo_salida = "orbitas_3d.json"
-    print(f"💾 Guardando {len(sistema_solar_3d)} órbitas en '{archivo_salida}'...")
-    with open(archivo_salida, 'w') as f:
-        json.dump(sistema_solar_3d, f)
-        
     print(f"✅ ¡Éxito! Archivo '{archivo_salida}' generado.")
+    return archivo_salida
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Genera las órbitas 3D de planetas y asteroides.")
+    parser.add_argument('--catalogo', default="jpl_catalog.csv", help="CSV del catálogo de JPL.")
+    parser.add_argument('--limite', type=int, default=100,
+                        help="Número máximo de asteroides (0 = todos los del catálogo).")
+    parser.add_argument('--solo-neo', action='store_true', help="Procesa solo los NEOs (neo == 'Y').")
+    parser.add_argument('--bloque', type=int, default=None,
+                        help="Asteroides por bloque (por defecto se ajusta a ~64 MB por bloque).")
+    parser.add_argument('--formato', choices=["json", "bin", "bin16"], default="json",
+                        help="json (por defecto), bin (Float32) o bin16 (Int16 con escala por órbita).")
+    parser.add_argument('--incremental', action='store_true',
+                        help="Con --formato bin/bin16, regenera solo las órbitas cuyos elementos cambiaron.")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="Procesos para calcular las órbitas (por defecto, todos los núcleos).")
+    add_sampling_arguments(parser)
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    procesar_y_guardar_orbitas_3d(args.catalogo, args.limite, args.solo_neo, args.bloque, args.formato,
+                                  tolerance_from_args(args), args.incremental, args.workers)
 
 if __name__ == "__main__":
-    procesar_y_guardar_orbitas_3d()
\ No newline at end of file
+    main()
@@ -0,0 +1,69 @@
+# generar_efemerides.py
+import argparse
+import numpy as np
+import pandas as pd
+from modules.catalog_cache import load_catalog_cached
+from modules.ephemeris import epoch_grid, write_ephemeris
+from modules.propagator import EARTH_ELEMENTS, julian_date, julian_date_now
+
+ELEMENT_COLUMNS = ['a', 'e', 'i', 'om', 'w', 'ma', 'epoch']
+
+def cargar_elementos(archivo_csv="jpl_catalog.csv", limite=1000, solo_neo=False):
+    """
+    Devuelve (nombres, elementos) de la Tierra y de los asteroides del catálogo
+    con elementos orbitales completos, o None si no hay catálogo.
+    """
+    df = load_catalog_cached(archivo_csv)
+    if df.empty:
+        return None
+    if solo_neo and 'neo' in df.columns:
+        df = df[df['neo'] == 'Y']
+    df = df.dropna(subset=ELEMENT_COLUMNS)
+    if limite:
+        df = df.head(limite)
+
+    nombres = ["Earth"] + df['full_name'].fillna(df['spkid'].astype(str)).tolist()
+    elementos = {
+        col: np.concatenate([[EARTH_ELEMENTS[col]], df[col].to_numpy(dtype=np.float64)])
+        for col in ELEMENT_COLUMNS
+    }
+    return nombres, elementos
+
+def generar_efemerides(archivo_csv="jpl_catalog.csv", inicio=None, dias=365, paso=1.0, limite=1000,
+                       solo_neo=False, formato="npy", salida="efemerides", block_size=None):
+    """
+    Calcula la posición de cada cuerpo en una malla de épocas (por defecto un
+    año con paso diario desde hoy) y la guarda para que el simulador pueda
+    reproducir el movimiento real.
+    """
+    datos = cargar_elementos(archivo_csv, limite, solo_neo)
+    if datos is None:
+        return None
+    nombres, elementos = datos
+
+    inicio_jd = julian_date(inicio) if inicio else np.floor(julian_date_now() - 0.5) + 0.5
+    epochs = epoch_grid(inicio_jd, dias, paso)
+    print(f"🛰️ Propagando {len(nombres)} cuerpos a {len(epochs)} épocas "
+          f"({pd.Timestamp(inicio_jd - 2440587.5, unit='D').date()} + {dias} días, paso {paso} d)...")
+    ruta = write_ephemeris(nombres, elementos, epochs, salida, formato, block_size)
+    print(f"💾 Efemérides guardadas (índice en '{ruta}').")
+    return ruta
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Genera efemérides (N cuerpos x T épocas x 3) del catálogo.")
+    parser.add_argument('--catalogo', default="jpl_catalog.csv", help="CSV del catálogo de JPL.")
+    parser.add_argument('--inicio', default=None, help="Fecha inicial ISO (por defecto, hoy a las 0h UTC).")
+    parser.add_argument('--dias', type=float, default=365, help="Duración del intervalo en días.")
+    parser.add_argument('--paso', type=float, default=1.0, help="Paso entre épocas en días.")
+    parser.add_argument('--limite', type=int, default=1000, help="Número máximo de asteroides (0 = todos).")
+    parser.add_argument('--solo-neo', action='store_true', help="Procesa solo los NEOs (neo == 'Y').")
+    parser.add_argument('--formato', choices=["npy", "bin", "bin16"], default="npy",
+                        help="npy (float32, memmap) o el formato binario de órbitas (bin/bin16).")
+    parser.add_argument('--salida', default="efemerides", help="Ruta base de los archivos de salida.")
+    parser.add_argument('--bloque', type=int, default=None, help="Cuerpos por bloque (por defecto ~256 MB).")
+    args = parser.parse_args(argv)
+    generar_efemerides(args.catalogo, args.inicio, args.dias, args.paso, args.limite, args.solo_neo,
+                       args.formato, args.salida, args.bloque)
+
+if __name__ == "__main__":
+    main()
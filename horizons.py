@@ -1,7 +1,38 @@
 # obtener_posiciones.py
 
-from astroquery.jplhorizons import Horizons
-from astropy.time import Time
+import argparse
+import json
+from datetime import datetime, timezone
+from modules.horizons_client import HorizonsClient
+from modules.propagator import julian_date, julian_date_now
+
+# Cliente compartido: consultas en paralelo y caché en disco ('.horizons_cache')
+_cliente = None
+
+def cliente_horizons():
+    global _cliente
+    if _cliente is None:
+        _cliente = HorizonsClient()
+    return _cliente
+
+def obtener_posiciones_actuales(objetos):
+    """
+    Obtiene la posición vectorial (x, y, z) de varios objetos a la vez para el
+    momento actual, usando la API de JPL Horizons. Los objetos se consultan en
+    paralelo y las respuestas se guardan en caché (una hora de resolución).
+
+    Args:
+        objetos (dict): {id: 'smallbody' | 'majorbody'}.
+
+    Returns:
+        dict: {id: {'x', 'y', 'z'} en AU, o None si falló la consulta}.
+    """
+    ahora = datetime.now(timezone.utc)
+    posiciones = cliente_horizons().positions(objetos, julian_date(ahora))
+    for id_objeto, posicion in posiciones.items():
+        if posicion is not None:
+            print(f"✅ Posición de '{id_objeto}' obtenida para {ahora:%Y-%m-%d %H:%M:%S} UTC")
+    return posiciones
 
 def obtener_posicion_actual(id_objeto, id_tipo='smallbody'):
     """
@@ -15,44 +46,66 @@ def obtener_posicion_actual(id_objeto, id_tipo='smallbody'):
     Returns:
         dict: Un diccionario con las coordenadas x, y, z en Unidades Astronómicas (AU).
     """
-    try:
-        # Obtenemos la fecha y hora actual
-        ahora = Time.now()
-        
-        # Configuramos la consulta a Horizons
-        obj = Horizons(
-            id=id_objeto,
-            location='@sun',  # Queremos las coordenadas con el Sol en el origen (0,0,0)
-            epochs=ahora.jd,  # Usamos la fecha actual en formato de día juliano
-            id_type=id_tipo
-        )
-        
-        # Hacemos la petición para obtener los vectores (posición y velocidad)
-        vectores = obj.vectors()
-        
-        # Extraemos las coordenadas x, y, z de la tabla de resultados
-        x = vectores['x'][0] # AU
-        y = vectores['y'][0] # AU
-        z = vectores['z'][0] # AU
-        
-        print(f"✅ Posición de '{id_objeto}' obtenida para {ahora.iso}")
-        return {'x': x, 'y': y, 'z': z}
-        
-    except Exception as e:
-        print(f"❌ Error al obtener la posición para '{id_objeto}': {e}")
-        return None
+    return obtener_posiciones_actuales({id_objeto: id_tipo})[id_objeto]
 
-if __name__ == "__main__":
-    
-    # --- OBTENER LA POSICIÓN DE LA TIERRA ---
-    # Para Horizons, el ID del sistema Tierra-Luna es '399'
-    posicion_tierra = obtener_posicion_actual('399', id_tipo='majorbody')
+def grabar_fixture_horizons(ids_objetos, ruta_salida, dias=(-30, -10, 0, 10, 30, 60)):
+    """
+    Graba un fixture para validar el propagador local (modules/propagator.py):
+    para cada objeto guarda sus elementos osculantes de Horizons en la época
+    actual y los vectores heliocéntricos (x, y, z) en varias épocas alrededor.
+
+    Validación posterior, sin red:
+        python3 -m modules.propagator <ruta_salida>
+    """
+    # astroquery (y astropy) se importan aquí y en AstroqueryBackend, no al arrancar: tardan más de un segundo
+    from astroquery.jplhorizons import Horizons
+
+    epoca = round(julian_date_now()) + 0.5
+    objetos = []
+    for id_objeto in ids_objetos:
+        elementos = Horizons(id=id_objeto, location='@sun', epochs=epoca, id_type='smallbody').elements()
+        vectores = Horizons(
+            id=id_objeto, location='@sun', epochs=[epoca + d for d in dias], id_type='smallbody'
+        ).vectors()
+        objetos.append({
+            'id': id_objeto,
+            'elementos': {
+                'a': float(elementos['a'][0]), 'e': float(elementos['e'][0]), 'i': float(elementos['incl'][0]),
+                'om': float(elementos['Omega'][0]), 'w': float(elementos['w'][0]), 'ma': float(elementos['M'][0]),
+                'epoch': float(elementos['datetime_jd'][0]),
+            },
+            'vectores': [
+                {'jd': float(jd), 'x': float(x), 'y': float(y), 'z': float(z)}
+                for jd, x, y, z in zip(vectores['datetime_jd'], vectores['x'], vectores['y'], vectores['z'])
+            ],
+        })
+        print(f"✅ Grabado '{id_objeto}' ({len(vectores)} épocas)")
+
+    with open(ruta_salida, 'w') as f:
+        json.dump({'fuente': 'JPL Horizons', 'grabado_jd': epoca, 'objetos': objetos}, f, indent=2)
+    print(f"💾 Fixture guardado en '{ruta_salida}'")
+    return ruta_salida
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Posiciones actuales de la Tierra y de 433 Eros según JPL Horizons.")
+    # python3 horizons.py --grabar-fixture salida.json [id1 id2 ...]
+    parser.add_argument('--grabar-fixture', nargs='?', const='horizons_fixture.json', metavar='RUTA',
+                        help="Graba un fixture para validar el propagador en vez de consultar las posiciones.")
+    parser.add_argument('ids', nargs='*', default=['2000433', '2001566', '2001036', '2099942', '2101955'],
+                        help="SPK-IDs del fixture.")
+    args = parser.parse_args(argv)
+    if args.grabar_fixture:
+        grabar_fixture_horizons(args.ids, args.grabar_fixture)
+        return
+
+    # --- OBTENER LAS POSICIONES DE LA TIERRA Y DE EROS (en paralelo) ---
+    # Para Horizons, el ID del sistema Tierra-Luna es '399'; para Eros usamos
+    # su SPK ID, que es más preciso
+    posiciones = obtener_posiciones_actuales({'399': 'majorbody', '2000433': 'smallbody'})
+    posicion_tierra, posicion_eros = posiciones['399'], posiciones['2000433']
     if posicion_tierra:
         print(f"   Coordenadas de la Tierra (AU): x={posicion_tierra['x']:.4f}, y={posicion_tierra['y']:.4f}, z={posicion_tierra['z']:.4f}\n")
 
-    # --- OBTENER LA POSICIÓN DE UN ASTEROIDE CONOCIDO (Eros) ---
-    # Usamos su SPK ID, que es más preciso
-    posicion_eros = obtener_posicion_actual('2000433', id_tipo='smallbody')
     if posicion_eros:
         print(f"   Coordenadas de 433 Eros (AU): x={posicion_eros['x']:.4f}, y={posicion_eros['y']:.4f}, z={posicion_eros['z']:.4f}\n")
 
@@ -69,4 +122,7 @@ if __name__ == "__main__":
         
         print("--- Simulación de Distancia Actual ---")
         print(f"Distancia entre la Tierra y Eros ahora mismo: {distancia_total:.4f} AU")
-        print(f"({distancia_km:,.0f} km)")
\ No newline at end of file
+        print(f"({distancia_km:,.0f} km)")
+
+if __name__ == "__main__":
+    main()
@@ -1,92 +1,277 @@
 # main.py
 import os
-import pandas as pd
-from modules.data_loader import load_local_jpl_catalog
+import sys
+import argparse
+from types import SimpleNamespace
+from generar_coordenadas_3D import guardar_orbitas_3d, preparar_asteroides_para_orbitas
+from modules.catalog_cache import load_catalog_cached
 from modules.analyzer import clean_and_prepare_data
-from modules.visualizer import plot_orbital_distribution
+from modules.visualizer import DEFAULT_TILE_LEVELS, export_density_tiles, plot_orbital_distribution
+from modules.moid import DEFAULT_MOID_TOLERANCE_AU, fill_missing_moid
+from modules.catalog_shards import DEFAULT_SHARD_ROWS, shard_output_paths, write_catalog_shards
+from modules.incremental import (
+    build_state, diff_report, diff_snapshot, export_signature, load_state, reuse_moid, row_fingerprints, save_state,
+    state_dir_for,
+)
+from modules.json_export import (
+    COMPRESSIONS, output_paths, web_source_columns, write_records_json, write_records_json_partitioned,
+)
+from modules.pipeline import Pipeline
+from modules.profiling import DEFAULT_REPORT, StageProfiler
+from modules.ranking import DEFAULT_PROFILE, RANKING_PROFILES, add_hazard_flag, rank_profiles
+from modules.spatial_index import load_catalog_index
 
-def export_to_json(df, filename='catalogo_asteroides_web.json'):
+def export_to_json(df, filename='catalogo_asteroides_web.json', indent=4, compress=(), executor=None, frame=None):
     """
     Exports the final DataFrame to a clean JSON file, including
-    both a robust identifier and the full name.
+    both a robust identifier and the full name. Rows are streamed in
+    blocks, so memory does not grow with the number of exported rows.
+    With a multi-process executor and a shared frame holding the rows of
+    'df', the rows are serialized in partitions across the workers.
     """
     print(f"\nGenerating JSON file for the web: {filename}...")
-
-    if 'spkid' in df.columns:
-        df['spkid_str'] = df['spkid'].astype(str)
+    if executor is not None and frame is not None and len(executor.partitions(len(df))) > 1:
+        rows = write_records_json_partitioned(frame, frame.df.index.get_indexer(df.index), filename, executor,
+                                              indent=indent, comprimir=compress)
     else:
-        print("⚠️ 'spkid' column not found. Using index as a fallback.")
-        df['spkid_str'] = df.index.astype(str)
-
-    df['identificador'] = df['full_name'].fillna(df['spkid_str'])
-
-    df_export = df.rename(columns={
-        'is_pha': 'es_peligroso',
-        'H': 'magnitud_absoluta',
-        'rot_per': 'periodo_rotacion_horas',
-        'moid': 'distancia_min_orbita_au',
-        'per_y': 'periodo_orbital_anios',
-    }, inplace=False, errors='ignore')
-
-    df_export = df_export.where(pd.notna(df_export), None)
-    
-    final_columns = [col for col in [
-        'identificador', 'full_name', 'es_peligroso', 'magnitud_absoluta', 'diameter',
-        'albedo', 'periodo_rotacion_horas', 'distancia_min_orbita_au', 
-        'a', 'e', 'i', 'om', 'w', 'ma', 'q', 'ad', 'periodo_orbital_anios'
-    ] if col in df_export.columns]
-    
-    df_export[final_columns].to_json(filename, orient='records', indent=4)
-    print(f"Success! File '{filename}' created with {len(df_export)} asteroids.")
-
-
-def main():
+        rows = write_records_json(df, filename, indent=indent, comprimir=compress)
+    print(f"Success! File '{filename}' created with {rows} asteroids.")
+
+
+def profile_output_name(filename, profile):
     """
-    Main workflow: Load, process, filter, and export.
+    Output file for a ranking profile. The default profile keeps the
+    original name; the others get the profile as a suffix.
     """
-    df_asteroids = load_local_jpl_catalog()
-    
-    if df_asteroids.empty:
-        return
+    if profile == DEFAULT_PROFILE:
+        return filename
+    root, ext = os.path.splitext(filename)
+    return f"{root}_{profile}{ext}"
+
+
+def export_outputs_exist(filename, args, profile):
+    """
+    Whether every file an export of 'profile' writes is still on disk: the
+    JSON, its .gz/.br copies and, with --shards, the shard manifest and
+    each shard. An incremental run only skips the export when they all are.
+    """
+    paths = output_paths(filename, args.compress)
+    if args.shards:
+        paths += shard_output_paths(profile_output_name(args.shards, profile), args.compress)
+    return all(os.path.exists(path) for path in paths)
+
 
-    df_processed = clean_and_prepare_data(df_asteroids)
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Asteroid catalog pipeline: load, rank, export and plot.")
+    parser.add_argument('--catalog', default='jpl_catalog.csv', help="Path to the JPL SBDB CSV export.")
+    parser.add_argument('--chunksize', type=int, default=250_000,
+                        help="Rows per block when streaming the CSV (0 reads it in one go).")
+    parser.add_argument('--refresh-cache', action='store_true',
+                        help="Ignore the binary catalog cache and rebuild it from the CSV.")
+    parser.add_argument('--top', type=int, default=5000,
+                        help="Number of asteroids exported per profile (0 exports every named asteroid).")
+    parser.add_argument('--profiles', nargs='+', default=[DEFAULT_PROFILE], choices=list(RANKING_PROFILES),
+                        help="Ranking profiles; each one writes its own JSON. The first one is plotted.")
+    parser.add_argument('--output', default='catalogo_asteroides_web.json',
+                        help="JSON for the default profile; other profiles add '_<profile>' to the name.")
+    parser.add_argument('--compact', action='store_true', help="Write the JSON without indentation.")
+    parser.add_argument('--compress', nargs='+', default=[], choices=COMPRESSIONS,
+                        help="Also write precompressed copies (.gz, .br) for static hosting.")
+    parser.add_argument('--shards', metavar='DIR',
+                        help="Also write the export as sorted shards plus an index.json manifest in this folder.")
+    parser.add_argument('--shard-rows', type=int, default=DEFAULT_SHARD_ROWS, help="Rows per shard.")
+    parser.add_argument('--incremental', action='store_true',
+                        help="Diff the catalog against the last run: reuse computed MOIDs of unchanged rows "
+                             "and skip exports that did not change.")
+    parser.add_argument('--fill-moid', action='store_true',
+                        help="Compute the Earth MOID from the orbital elements where it is missing or stale.")
+    parser.add_argument('--moid-tolerance', type=float, default=DEFAULT_MOID_TOLERANCE_AU,
+                        help="Maximum error of the computed MOID, in AU.")
+    parser.add_argument('--moid-workers', type=int, default=None,
+                        help="Processes for the MOID computation (default: --workers).")
+    parser.add_argument('--orbits', choices=["json", "bin", "bin16"],
+                        help="Also write the 3D orbits (as generar_coordenadas_3D.py) from the loaded catalog.")
+    parser.add_argument('--orbit-limit', type=int, default=100,
+                        help="Maximum number of asteroids in the orbit export (0 = all).")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="Processes for the partitioned stages: MOID, JSON export and orbits "
+                             "(default: all cores; 1 runs everything in this process).")
+    parser.add_argument('--spatial-index', action='store_true',
+                        help="Build (or refresh, if the catalog changed) the orbit-similarity and position "
+                             "indexes next to the catalog cache (see modules/spatial_index.py).")
+    parser.add_argument('--index-epoch', type=float, default=None,
+                        help="Julian date of the indexed positions (default: the stored one, or today).")
+    parser.add_argument('--plot-output', metavar='PNG',
+                        help="Write the plot to this PNG (no display needed) instead of opening a window.")
+    parser.add_argument('--plot-mode', choices=['auto', 'densidad', 'puntos'], default='auto',
+                        help="'densidad' bins the orbits in a 2D histogram (fast with millions of rows), "
+                             "'puntos' draws every asteroid; 'auto' picks by catalog size.")
+    parser.add_argument('--plot-all', action='store_true',
+                        help="Plot the whole cleaned catalog instead of the first profile's ranking.")
+    parser.add_argument('--density-tiles', metavar='DIR',
+                        help="Also export the orbit density as tiles for the web dashboard into this folder.")
+    parser.add_argument('--tile-levels', type=int, default=DEFAULT_TILE_LEVELS, help="Zoom levels of the tiles.")
+    parser.add_argument('--profile', nargs='?', const=DEFAULT_REPORT, metavar='REPORT',
+                        help="Record each stage's wall time, peak memory and rows/s into a JSON report "
+                             f"(default '{DEFAULT_REPORT}'); compare two reports with "
+                             "'python3 -m modules.profiling base.json new.json'.")
+    parser.add_argument('--skip', nargs='+', default=[], choices=['export', 'plot'],
+                        help="Pipeline stages to skip (e.g. 'plot' on a machine without a display).")
+    return parser.parse_args(argv)
+
+
+# --- PIPELINE STAGES ---
+# Each stage is stage(ctx, executor): 'ctx' carries the catalog (loaded once)
+# and the results from one stage to the next, and 'executor' is the shared
+# process pool for the partitioned work (see modules/pipeline.py).
+
+def load_stage(ctx, executor):
+    args = ctx.args
+    ctx.catalog = load_catalog_cached(args.catalog, chunksize=args.chunksize or None, refresh=args.refresh_cache)
+    return not ctx.catalog.empty
+
+
+def clean_stage(ctx, executor):
+    args = ctx.args
+    df_processed = clean_and_prepare_data(ctx.catalog)
+    ctx.processed = df_processed
+
+    if args.incremental:
+        ctx.state_dir = state_dir_for(args.catalog)
+        ctx.state, state_manifest = load_state(ctx.state_dir)
+        ctx.fingerprints = row_fingerprints(df_processed)
+        ctx.report = diff_report(diff_snapshot(ctx.state, ctx.fingerprints))
+        ctx.signatures = dict((state_manifest or {}).get('exports', {}))
 
     # --- NEW LOGIC: Filter for asteroids with a real name first ---
-    df_named = df_processed[df_processed['full_name'].notna()].copy()
+    ctx.named = df_processed['full_name'].notna().to_numpy()
+    df_named = df_processed[ctx.named].copy()
     print(f"\nFound {len(df_named)} asteroids with a real name.")
+    ctx.df_named = add_hazard_flag(df_named)
 
-    print("Filtering and sorting for the 5,000 most interesting named asteroids...")
 
-    if 'pha' in df_named.columns:
-        df_named['is_pha'] = df_named['pha'].apply(lambda x: True if x == 'Y' else False)
-    else:
-        df_named['is_pha'] = False
-        print("Warning: 'pha' column not found. Cannot prioritize by hazard status.")
-
-    sort_columns = ['is_pha', 'diameter', 'moid']
-    sort_ascending = [False, False, True] # is_pha DESC, diameter DESC, moid ASC
-    
-    available_sort_cols = [col for col in sort_columns if col in df_named.columns]
-    available_sort_order = [order for col, order in zip(sort_columns, sort_ascending) if col in available_sort_cols]
-
-    if not available_sort_cols:
-         print("Warning: Sorting columns not found. Taking the first 5,000 named rows.")
-         df_interesting = df_named.head(5000)
-    else:
-        print(f"Sorting by: {available_sort_cols}")
-        df_interesting = df_named.sort_values(
-            by=available_sort_cols,
-            ascending=available_sort_order
-        ).head(5000)
+def moid_stage(ctx, executor):
+    # Rows without a MOID would otherwise sort last
+    args = ctx.args
+    # In incremental mode only new or changed rows are computed again
+    rows = reuse_moid(ctx.df_named, ctx.fingerprints[ctx.named], ctx.state) if args.incremental else None
+    ctx.df_named = fill_missing_moid(ctx.df_named, tolerancia=args.moid_tolerance, workers=args.moid_workers,
+                                     filas=rows, ejecutor=None if args.moid_workers else executor)
+
+
+def rank_stage(ctx, executor):
+    args = ctx.args
+    ctx.top = args.top or len(ctx.df_named)
+    print(f"Selecting the {ctx.top:,} most interesting named asteroids per profile: {', '.join(args.profiles)}")
+    ctx.rankings = rank_profiles(ctx.df_named, args.profiles, ctx.top)
     # --- END of new logic ---
 
-    export_to_json(df_interesting.copy())
 
-    print("\nGenerating 2D visualization of the catalog...")
-    plot_orbital_distribution(df_interesting)
-    
+def export_stage(ctx, executor):
+    args = ctx.args
+    # The named catalog goes to shared memory once for every profile
+    frame = executor.share(ctx.df_named, web_source_columns(ctx.df_named)) if executor.paralelo else None
+    try:
+        for profile, df_ranked in ctx.rankings.items():
+            filename = profile_output_name(args.output, profile)
+            if args.incremental:
+                options = repr((profile, ctx.top, args.compact, sorted(args.compress), args.shards, args.shard_rows,
+                                args.fill_moid, args.moid_tolerance))
+                signature = export_signature(df_ranked, ctx.fingerprints, options)
+                if ctx.signatures.get(filename) == signature and export_outputs_exist(filename, args, profile):
+                    print(f"\n'{filename}' is up to date; skipping export.")
+                    continue
+                ctx.signatures[filename] = signature
+            ctx.changed = True
+            export_to_json(df_ranked, filename, indent=None if args.compact else 4, compress=args.compress,
+                           executor=executor, frame=frame)
+            if args.shards:
+                write_catalog_shards(df_ranked, profile_output_name(args.shards, profile), args.shard_rows,
+                                     comprimir=args.compress)
+    finally:
+        if frame is not None:
+            frame.close()
+
+    if args.incremental:
+        save_state(ctx.state_dir, build_state(ctx.fingerprints, ctx.df_named), {'exports': ctx.signatures},
+                   ctx.report)
+
+
+def orbits_stage(ctx, executor):
+    args = ctx.args
+    df_orbits = preparar_asteroides_para_orbitas(ctx.catalog, args.orbit_limit)
+    ctx.orbit_rows = len(df_orbits)
+    guardar_orbitas_3d(df_orbits, formato=args.orbits, incremental=args.incremental, ejecutor=executor)
+
+
+def index_stage(ctx, executor):
+    args = ctx.args
+    load_catalog_index(args.catalog, epoch=args.index_epoch)
+
+
+def plot_stage(ctx, executor):
+    args = ctx.args
+    if ctx.changed:
+        print("\nGenerating 2D visualization of the catalog...")
+        df_plot = ctx.processed if args.plot_all else ctx.rankings[args.profiles[0]]
+        ctx.plot_rows = len(df_plot)
+        plot_orbital_distribution(df_plot, salida=args.plot_output, modo=args.plot_mode)
+        if args.density_tiles:
+            export_density_tiles(ctx.processed, args.density_tiles, niveles=args.tile_levels)
+    else:
+        print("\nNothing changed since the last run; skipping the visualization.")
+
+
+STAGES = [
+    ('load', load_stage),
+    ('clean', clean_stage),
+    ('moid', moid_stage),
+    ('rank', rank_stage),
+    ('export', export_stage),
+    ('orbits', orbits_stage),
+    ('index', index_stage),
+    ('plot', plot_stage),
+]
+
+# Rows each stage worked on, for the rows/s of the --profile report
+STAGE_ROWS = {
+    'load': lambda ctx: len(ctx.catalog),
+    'clean': lambda ctx: len(ctx.catalog),
+    'moid': lambda ctx: len(ctx.df_named),
+    'rank': lambda ctx: len(ctx.df_named),
+    'export': lambda ctx: sum(len(df) for df in ctx.rankings.values()),
+    'orbits': lambda ctx: ctx.orbit_rows,
+    'index': lambda ctx: len(ctx.catalog),
+    'plot': lambda ctx: getattr(ctx, 'plot_rows', 0),
+}
+
+
+def main(argv=None):
+    """
+    Main workflow: Load, process, filter, and export.
+    """
+    args = parse_args(argv)
+    skip = set(args.skip)
+    if not args.fill_moid:
+        skip.add('moid')
+    if not args.orbits:
+        skip.add('orbits')
+    if not args.spatial_index:
+        skip.add('index')
+
+    ctx = SimpleNamespace(args=args, changed=not args.incremental)
+    profiler = StageProfiler() if args.profile else None
+    pipeline = Pipeline(STAGES, workers=args.workers, perfil=profiler)
+    pipeline.run(ctx, omitir=skip, filas=STAGE_ROWS)
+    if profiler:
+        profiler.summary()
+        profiler.write(args.profile, comando=sys.argv if argv is None else ['main.py', *argv],
+                       catalogo=args.catalog, filas=len(ctx.catalog), workers=pipeline.ejecutor.workers)
+    if ctx.catalog.empty:
+        return
+
     print("\nProcess completed.")
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
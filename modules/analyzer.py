@@ -1,13 +1,22 @@
 # modules/analyzer.py
 import pandas as pd
 
-def clean_and_prepare_data(df):
+TEXT_COLUMNS = ['full_name', 'pha', 'neo']
+
+def coerce_numeric_columns(df):
     """
-    Convierte todas las columnas a numérico (donde sea posible) y maneja errores.
+    Convierte a numérico las columnas que no son texto. Las columnas que ya
+    llegan con tipo numérico (p. ej. desde el cargador tipado) se dejan tal cual.
     """
-    print("Limpiando y preparando datos...")
     for col in df.columns:
         # Excluye las columnas que sabemos que son texto
-        if col not in ['full_name', 'pha', 'neo']:
+        if col not in TEXT_COLUMNS and not pd.api.types.is_numeric_dtype(df[col]):
             df[col] = pd.to_numeric(df[col], errors='coerce')
-    return df
\ No newline at end of file
+    return df
+
+def clean_and_prepare_data(df):
+    """
+    Convierte todas las columnas a numérico (donde sea posible) y maneja errores.
+    """
+    print("Limpiando y preparando datos...")
+    return coerce_numeric_columns(df)
@@ -0,0 +1,288 @@
+# modules/catalog_cache.py
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from modules.data_loader import JPL_DTYPES, load_jpl_catalog_typed, resolve_catalog_path
+
+try:
+    import pyarrow  # noqa: F401  (solo se comprueba si está disponible)
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+# Se incrementa cada vez que cambia el esquema o la limpieza del catálogo,
+# para que las cachés antiguas se descarten solas.
+CACHE_SCHEMA_VERSION = 2
+
+CACHE_DIRNAME = ".catalog_cache"
+MANIFEST_NAME = "manifest.json"
+# Cada reconstrucción escribe sus columnas en una subcarpeta nueva con este
+# prefijo; el manifiesto apunta a la vigente (ver write_catalog_cache)
+DATA_PREFIX = "datos-"
+STALE_DATA_SECONDS = 300
+# Separador de nombres en el blob de texto (no aparece en los nombres de JPL)
+_NAME_SEP = "\x1f"
+
+
+def source_fingerprint(file_path, with_hash=True):
+    """
+    Devuelve el tamaño, la fecha de modificación y (opcionalmente) el SHA-1 del
+    archivo fuente. Es la clave con la que se invalida la caché.
+    """
+    stat = os.stat(file_path)
+    fingerprint = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sha1': None}
+    if with_hash:
+        digest = hashlib.sha1()
+        with open(file_path, 'rb') as f:
+            for bloque in iter(lambda: f.read(4 * 1024 * 1024), b''):
+                digest.update(bloque)
+        fingerprint['sha1'] = digest.hexdigest()
+    return fingerprint
+
+
+def cache_dir_for(file_path, cache_root=None):
+    """
+    Carpeta de la caché para un CSV dado: '.catalog_cache/<nombre>' junto al CSV.
+    """
+    cache_root = cache_root or os.path.join(os.path.dirname(file_path), CACHE_DIRNAME)
+    stem = os.path.splitext(os.path.basename(file_path))[0]
+    return os.path.join(cache_root, stem)
+
+
+def _read_manifest(cache_dir):
+    try:
+        with open(os.path.join(cache_dir, MANIFEST_NAME)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_manifest(cache_dir, manifest):
+    # Un temporal por hilo: la API (asf.py) puede reconstruir desde varios a la vez
+    tmp_path = os.path.join(cache_dir, f"{MANIFEST_NAME}.{os.getpid()}.{threading.get_ident()}.tmp")
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, os.path.join(cache_dir, MANIFEST_NAME))
+
+
+def _is_cache_valid(file_path, cache_dir, fmt):
+    """
+    Comprueba si la caché corresponde al CSV actual. Si solo cambió la fecha de
+    modificación (p. ej. el archivo se copió de nuevo), se compara el hash y,
+    si coincide, se actualiza el manifiesto sin reconstruir nada.
+    """
+    manifest = _read_manifest(cache_dir)
+    if manifest is None:
+        return None
+    if manifest.get('schema_version') != CACHE_SCHEMA_VERSION or manifest.get('format') != fmt:
+        return None
+
+    source = manifest['source']
+    actual = source_fingerprint(file_path, with_hash=False)
+    if actual['size'] != source['size']:
+        return None
+    if actual['mtime_ns'] == source['mtime_ns']:
+        return manifest
+
+    actual = source_fingerprint(file_path)
+    if actual['sha1'] != source['sha1']:
+        return None
+    manifest['source'] = actual
+    _write_manifest(cache_dir, manifest)
+    return manifest
+
+
+def _data_dir(cache_dir, manifest):
+    return os.path.join(cache_dir, manifest['data'])
+
+
+def write_catalog_cache(df, file_path, cache_dir, fmt='npy'):
+    """
+    Escribe el catálogo limpio en formato columnar binario: un '.npy' por
+    columna (se puede abrir con memmap) o un único Parquet si fmt='parquet'.
+
+    Las columnas van a una subcarpeta nueva y el manifiesto, que la nombra,
+    se sustituye al final con os.replace: quien lea la caché a la vez (p. ej.
+    otro hilo de la API) ve la versión anterior completa o la nueva completa,
+    nunca una a medio escribir. La versión anterior se conserva hasta la
+    siguiente reconstrucción para los lectores que ya la tenían abierta.
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    anterior = _read_manifest(cache_dir)
+    datos = f"{DATA_PREFIX}{time.time_ns()}-{os.getpid()}-{threading.get_ident()}"
+    data_dir = os.path.join(cache_dir, datos)
+    os.makedirs(data_dir)
+
+    columns = {}
+    if fmt == 'parquet':
+        df.to_parquet(os.path.join(data_dir, "catalog.parquet"), index=False)
+        columns = {col: {'kind': 'parquet'} for col in df.columns}
+    else:
+        for col in df.columns:
+            serie = df[col]
+            ruta = os.path.join(data_dir, f"{col}.npy")
+            if isinstance(serie.dtype, pd.CategoricalDtype):
+                np.save(ruta, serie.cat.codes.to_numpy())
+                columns[col] = {'kind': 'category', 'categories': [str(c) for c in serie.cat.categories]}
+            elif pd.api.types.is_numeric_dtype(serie.dtype):
+                np.save(ruta, serie.to_numpy())
+                columns[col] = {'kind': 'numeric', 'dtype': str(serie.dtype)}
+            else:
+                # Texto: un blob UTF-8 con separadores y una máscara de nulos
+                mask = serie.isna().to_numpy()
+                texto = _NAME_SEP.join(serie.fillna('').astype(str).tolist())
+                np.save(ruta, np.frombuffer(texto.encode('utf-8'), dtype=np.uint8))
+                np.save(os.path.join(data_dir, f"{col}.mask.npy"), mask)
+                columns[col] = {'kind': 'text'}
+
+    manifest = {
+        'schema_version': CACHE_SCHEMA_VERSION,
+        'format': fmt,
+        'data': datos,
+        'rows': len(df),
+        'columns': columns,
+        'source': source_fingerprint(file_path),
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+    }
+    # El manifiesto se escribe al final: si algo falla antes, la caché queda inválida
+    _write_manifest(cache_dir, manifest)
+    _remove_old_data(cache_dir, keep={datos, (anterior or {}).get('data')})
+    return manifest
+
+
+def _remove_old_data(cache_dir, keep):
+    """
+    Borra las subcarpetas de datos que no estén en 'keep' (y los archivos
+    sueltos de las cachés de la versión 1). Las que cambiaron hace menos de
+    STALE_DATA_SECONDS pueden ser de otra reconstrucción en curso y se dejan.
+    """
+    limite = time.time() - STALE_DATA_SECONDS
+    for nombre in os.listdir(cache_dir):
+        ruta = os.path.join(cache_dir, nombre)
+        if nombre in keep or nombre == MANIFEST_NAME or nombre.endswith('.tmp'):
+            continue
+        if os.path.isdir(ruta):
+            if nombre.startswith(DATA_PREFIX) and os.path.getmtime(ruta) < limite:
+                shutil.rmtree(ruta, ignore_errors=True)
+        elif nombre.endswith(('.npy', '.parquet')):
+            os.remove(ruta)
+
+
+def _load_column(data_dir, col, meta, mmap_mode):
+    ruta = os.path.join(data_dir, f"{col}.npy")
+    if meta['kind'] == 'numeric':
+        return np.load(ruta, mmap_mode=mmap_mode)
+    if meta['kind'] == 'category':
+        return pd.Categorical.from_codes(np.load(ruta), categories=meta['categories'])
+    blob = np.load(ruta)
+    valores = np.array(blob.tobytes().decode('utf-8').split(_NAME_SEP), dtype=object)
+    valores[np.load(os.path.join(data_dir, f"{col}.mask.npy"))] = None
+    return valores
+
+
+def _ensure_cache(filename, cache_root, fmt, chunksize, refresh):
+    file_path = resolve_catalog_path(filename)
+    if fmt == 'parquet' and not HAS_PYARROW:
+        print("⚠️ pyarrow no está instalado; se usará la caché en columnas '.npy'.")
+        fmt = 'npy'
+    cache_dir = cache_dir_for(file_path, cache_root)
+    if fmt == 'parquet':
+        cache_dir += ".parquet"
+
+    if not os.path.exists(file_path):
+        # Sin CSV, una caché ya construida sigue sirviendo
+        manifest = _read_manifest(cache_dir)
+        if manifest is not None and manifest.get('schema_version') == CACHE_SCHEMA_VERSION:
+            print(f"⚠️ No se encontró '{file_path}'; se usa la caché existente.")
+            return cache_dir, manifest, None
+        load_jpl_catalog_typed(filename)  # informa del error como siempre
+        return cache_dir, None, None
+
+    manifest = None if refresh else _is_cache_valid(file_path, cache_dir, fmt)
+    if manifest is not None:
+        return cache_dir, manifest, None
+
+    print("🗄️ Caché del catálogo ausente u obsoleta; se reconstruye desde el CSV...")
+    df = load_jpl_catalog_typed(filename, chunksize=chunksize)
+    if df.empty:
+        return cache_dir, None, df
+    manifest = write_catalog_cache(df, file_path, cache_dir, fmt)
+    print(f"💾 Caché guardada en '{cache_dir}' ({fmt}).")
+    return cache_dir, manifest, df
+
+
+def _is_memmap_backed(array):
+    """True si 'array' es (una vista de) un memmap, es decir, si no se copió a memoria."""
+    while array is not None:
+        if isinstance(array, np.memmap):
+            return True
+        array = getattr(array, 'base', None)
+    return False
+
+
+def _read_cached_frame(cache_dir, manifest):
+    data_dir = _data_dir(cache_dir, manifest)
+    if manifest['format'] == 'parquet':
+        return pd.read_parquet(os.path.join(data_dir, "catalog.parquet"))
+    # Las columnas numéricas son memmaps copy-on-write ('c'): el DataFrame las
+    # usa sin copiarlas y, si alguien escribe en ellas, las páginas tocadas
+    # pasan a ser privadas del proceso (el archivo de la caché no cambia)
+    columnas = {col: _load_column(data_dir, col, meta, mmap_mode='c') for col, meta in manifest['columns'].items()}
+    df = pd.DataFrame(columnas, copy=False)
+    df.attrs['memmap'] = all(_is_memmap_backed(df[col].to_numpy()) for col, meta in manifest['columns'].items()
+                             if meta['kind'] == 'numeric')
+    if not df.attrs['memmap']:
+        print("⚠️ pandas copió las columnas de la caché a memoria en lugar de usar los memmaps.")
+    if 'full_name' in df.columns:
+        df['full_name'] = df['full_name'].astype(JPL_DTYPES['full_name'])
+    return df
+
+
+def load_catalog_cached(filename="jpl_catalog.csv", cache_root=None, fmt='npy', chunksize=250_000, refresh=False):
+    """
+    Carga el catálogo limpio a través de la caché binaria. La primera vez lee el
+    CSV con el cargador tipado y escribe la caché; las siguientes la leen
+    directamente mientras el CSV no cambie (tamaño, fecha y hash). Con la
+    caché '.npy' las columnas numéricas del DataFrame son memmaps sobre los
+    archivos, sin copia (df.attrs['memmap'] indica que así fue).
+    """
+    inicio = time.perf_counter()
+    for intento in range(2):
+        cache_dir, manifest, df = _ensure_cache(filename, cache_root, fmt, chunksize, refresh)
+        if df is not None:
+            return df
+        if manifest is None:
+            return pd.DataFrame()
+        try:
+            df = _read_cached_frame(cache_dir, manifest)
+            break
+        except FileNotFoundError:
+            # Otro proceso reconstruyó la caché dos veces mientras se leía: se vuelve a leer el manifiesto
+            if intento:
+                raise
+    duracion = time.perf_counter() - inicio
+    print(f"⚡ Catálogo cargado desde la caché: {len(df)} asteroides en {duracion * 1000:.0f} ms.")
+    return df
+
+
+def load_catalog_columns(columns, filename="jpl_catalog.csv", cache_root=None, chunksize=250_000):
+    """
+    Devuelve un diccionario {columna: array} sin construir un DataFrame. Las
+    columnas numéricas son memmaps de solo lectura sobre la caché '.npy', así
+    que abrirlas no copia nada a memoria.
+    """
+    cache_dir, manifest, df = _ensure_cache(filename, cache_root, 'npy', chunksize, False)
+    if manifest is None:
+        return {}
+    faltan = [col for col in columns if col not in manifest['columns']]
+    if faltan:
+        raise KeyError(f"Columnas no disponibles en la caché: {faltan}")
+    data_dir = _data_dir(cache_dir, manifest)
+    return {col: _load_column(data_dir, col, manifest['columns'][col], mmap_mode='r') for col in columns}
@@ -0,0 +1,155 @@
+# modules/catalog_shards.py
+import json
+import math
+import os
+import time
+
+import numpy as np
+
+from modules.json_export import open_outputs, output_paths, web_block, web_source_columns
+from modules.ranking import rank_top_k
+
+# Versión del formato de shards (manifiesto JSON + un JSON de registros por shard)
+SHARD_FORMAT_VERSION = 1
+MANIFEST_NAME = "index.json"
+SHARD_PREFIX = "shard_"
+DEFAULT_SHARD_ROWS = 2000
+# Campos (nombres del JSON de la web) con rango mínimo/máximo por shard
+INDEX_FIELDS = ['es_peligroso', 'diameter', 'distancia_min_orbita_au', 'a', 'magnitud_absoluta', 'e', 'i']
+# Orden de las filas antes de partirlas (columnas del catálogo, como los
+# perfiles de ranking): así los rangos de estos campos quedan ajustados.
+SHARD_ORDER = [('is_pha', False), ('moid', True)]
+
+
+def _field_range(columna):
+    """
+    Mínimo, máximo y número de nulos de una columna del shard. Los rangos de
+    booleanos se guardan como booleanos; si todo es nulo el rango es None.
+    """
+    valores = columna.to_numpy(dtype=np.float64, na_value=np.nan)
+    validos = valores[~np.isnan(valores)]
+    nulos = int(valores.size - validos.size)
+    if validos.size == 0:
+        return None, nulos
+    minimo, maximo = validos.min(), validos.max()
+    if columna.dtype == bool:
+        return [bool(minimo), bool(maximo)], nulos
+    return [float(minimo), float(maximo)], nulos
+
+
+def write_catalog_shards(df, carpeta, filas_por_shard=DEFAULT_SHARD_ROWS, orden=SHARD_ORDER, comprimir=()):
+    """
+    Escribe el catálogo de la web como shards ordenados en 'carpeta':
+
+    - 'shard_NNNNN.json': lista JSON compacta de registros (mismo formato
+      que catalogo_asteroides_web.json), opcionalmente con .gz/.br.
+    - 'index.json': para cada shard, su archivo, número de filas y el rango
+      [mín, máx] y los nulos de cada campo de INDEX_FIELDS.
+
+    Con el manifiesto, el frontend solo descarga los shards cuyo rango
+    corta el filtro (ver select_shards). Los shards de una exportación
+    anterior que el nuevo manifiesto no lista se borran. Devuelve el
+    manifiesto.
+    """
+    inicio = time.perf_counter()
+    os.makedirs(carpeta, exist_ok=True)
+    df = df[web_source_columns(df)]
+    claves = [(col, asc) for col, asc in orden if col in df.columns]
+    if claves:
+        df = rank_top_k(df, {'claves': claves}, len(df))
+    n_shards = math.ceil(len(df) / filas_por_shard)
+    ancho = max(5, len(str(n_shards)))
+
+    manifiesto = {
+        'version': SHARD_FORMAT_VERSION,
+        'filas': len(df),
+        'orden': [col for col, _ in claves],
+        'campos_indice': INDEX_FIELDS,
+        'comprimido': list(comprimir),
+        'shards': [],
+    }
+    total_bytes = 0
+    for k in range(n_shards):
+        bloque = web_block(df.iloc[k * filas_por_shard:(k + 1) * filas_por_shard])
+        archivo = f"{SHARD_PREFIX}{k:0{ancho}d}.json"
+        datos = bloque.to_json(orient='records').encode('utf-8')
+        salidas = open_outputs(os.path.join(carpeta, archivo), comprimir)
+        try:
+            for salida in salidas.values():
+                salida.write(datos)
+        finally:
+            for salida in salidas.values():
+                salida.close()
+        total_bytes += len(datos)
+
+        rangos, nulos = {}, {}
+        for campo in INDEX_FIELDS:
+            if campo in bloque.columns:
+                rangos[campo], nulos[campo] = _field_range(bloque[campo])
+        manifiesto['shards'].append({
+            'archivo': archivo, 'filas': len(bloque), 'bytes': len(datos), 'rangos': rangos, 'nulos': nulos,
+        })
+
+    # El manifiesto se sustituye de una vez; después sobran los shards que ya no lista
+    ruta_manifiesto = os.path.join(carpeta, MANIFEST_NAME)
+    tmp_path = f"{ruta_manifiesto}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(manifiesto, f, separators=(',', ':'))
+    os.replace(tmp_path, ruta_manifiesto)
+    _remove_stale_shards(carpeta, {shard['archivo'] for shard in manifiesto['shards']})
+    print(f"🧩 {len(df)} registros en {n_shards} shards de '{carpeta}' "
+          f"({total_bytes / 1e6:.1f} MB) en {time.perf_counter() - inicio:.2f} s.")
+    return manifiesto
+
+
+def _remove_stale_shards(carpeta, archivos):
+    """
+    Borra de 'carpeta' los shards (y sus .gz/.br) de exportaciones anteriores
+    que no están en 'archivos', p. ej. al volver a partir con menos shards.
+    """
+    for nombre in os.listdir(carpeta):
+        base = nombre.removesuffix('.gz').removesuffix('.br')
+        if base.startswith(SHARD_PREFIX) and base.endswith('.json') and base not in archivos:
+            os.remove(os.path.join(carpeta, nombre))
+
+
+def load_manifest(carpeta):
+    with open(os.path.join(carpeta, MANIFEST_NAME)) as f:
+        return json.load(f)
+
+
+def shard_output_paths(carpeta, comprimir=()):
+    """
+    Archivos que escribe write_catalog_shards(..., carpeta, comprimir=...):
+    el manifiesto y cada shard listado en él con sus copias precomprimidas.
+    Si el manifiesto no se puede leer, solo devuelve su ruta.
+    """
+    try:
+        manifiesto = load_manifest(carpeta)
+    except (OSError, ValueError):
+        return [os.path.join(carpeta, MANIFEST_NAME)]
+    rutas = [os.path.join(carpeta, MANIFEST_NAME)]
+    for shard in manifiesto.get('shards', []):
+        rutas.extend(output_paths(os.path.join(carpeta, shard['archivo']), comprimir))
+    return rutas
+
+
+def select_shards(manifiesto, filtros):
+    """
+    Shards que pueden tener filas que cumplan 'filtros', un dict
+    {campo: (mínimo, máximo)} con límites inclusivos (None = sin límite).
+    Es la misma comprobación que tiene que hacer el frontend: un shard se
+    descarta si su rango no corta el del filtro o si no tiene valores.
+    """
+    seleccion = []
+    for shard in manifiesto['shards']:
+        for campo, (minimo, maximo) in filtros.items():
+            if campo not in shard['rangos']:
+                continue
+            rango = shard['rangos'][campo]
+            if rango is None or (minimo is not None and rango[1] < minimo) \
+                    or (maximo is not None and rango[0] > maximo):
+                break
+        else:
+            seleccion.append(shard)
+    return seleccion
@@ -0,0 +1,177 @@
+# modules/catalog_store.py
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from modules.catalog_cache import load_catalog_cached, source_fingerprint
+from modules.data_loader import resolve_catalog_path
+from modules.json_export import WEB_COLUMN_NAMES, web_block, web_source_columns
+from modules.orbits import generate_orbits_2d, generate_orbits_3d
+from modules.propagator import earth_position, propagate_catalog
+from modules.ranking import add_hazard_flag, rank_top_k
+
+MAX_PAGE_SIZE = 1000
+DEFAULT_PAGE_SIZE = 100
+MAX_ORBIT_IDS = 500
+DEFAULT_RESPONSE_CACHE = 512
+# Columnas de la web por las que se puede filtrar (min_<campo>, max_<campo>) u ordenar
+QUERY_FIELDS = {WEB_COLUMN_NAMES.get(col, col): col for col in
+                ['is_pha', 'diameter', 'moid', 'a', 'e', 'i', 'q', 'ad', 'H', 'albedo', 'per_y', 'rot_per']}
+
+
+class CatalogStore:
+    """
+    Catálogo en memoria para el servidor: se carga una sola vez y cada
+    consulta trabaja con máscaras y selecciones vectorizadas sobre sus
+    columnas. 'version' identifica los datos y forma parte de los ETag.
+    """
+
+    def __init__(self, df, version=None):
+        df = add_hazard_flag(df.copy())
+        if 'spkid' in df.columns:
+            ids = df['spkid'].astype(str)
+        else:
+            ids = pd.Series(df.index.astype(str), index=df.index)
+        df['identificador'] = df['full_name'].fillna(ids) if 'full_name' in df.columns else ids
+        self.df = df.reset_index(drop=True)
+        self._por_spkid = pd.Index(self.df['spkid']) if 'spkid' in self.df.columns else None
+        self.version = version or hashlib.sha1(f"{len(df)}-{time.time_ns()}".encode()).hexdigest()[:12]
+
+    @classmethod
+    def from_catalog(cls, filename="jpl_catalog.csv"):
+        """
+        Carga el catálogo (a través de la caché binaria) y lo copia a memoria.
+        La versión sale del tamaño y la fecha del CSV.
+        """
+        inicio = time.perf_counter()
+        df = load_catalog_cached(filename)
+        try:
+            huella = source_fingerprint(resolve_catalog_path(filename), with_hash=False)
+            version = hashlib.sha1(f"{huella['size']}-{huella['mtime_ns']}".encode()).hexdigest()[:12]
+        except OSError:
+            version = None
+        store = cls(df, version)
+        print(f"🗃️ Catálogo en memoria: {len(store.df)} asteroides en {time.perf_counter() - inicio:.2f} s "
+              f"(versión {store.version}).")
+        return store
+
+    def rows_for_ids(self, spkids):
+        """
+        Posiciones de las filas con esos SPK-ID, en el mismo orden; los que no
+        existen se ignoran.
+        """
+        if self._por_spkid is None:
+            return np.empty(0, dtype=np.int64)
+        posiciones = self._por_spkid.get_indexer(np.asarray(spkids, dtype=np.int64))
+        return posiciones[posiciones >= 0]
+
+    def query(self, filtros=None, nombre=None, orden=None, pagina=1, por_pagina=DEFAULT_PAGE_SIZE):
+        """
+        Página de asteroides en formato de la web (más 'spkid'). 'filtros' es un dict
+        {campo_web: (mínimo, máximo)} (None = sin límite); 'nombre' busca una
+        subcadena en el identificador; 'orden' es un campo web, con '-'
+        delante para orden descendente. Solo se ordenan las filas hasta el
+        final de la página pedida.
+        """
+        df = self.df
+        mascara = np.ones(len(df), dtype=bool)
+        for campo, (minimo, maximo) in (filtros or {}).items():
+            valores = df[QUERY_FIELDS[campo]].to_numpy(dtype=np.float64, na_value=np.nan)
+            if minimo is not None:
+                mascara &= valores >= minimo
+            if maximo is not None:
+                mascara &= valores <= maximo
+        if nombre:
+            mascara &= df['identificador'].str.contains(nombre, case=False, regex=False).fillna(False).to_numpy()
+        seleccion = df[mascara] if not mascara.all() else df
+
+        pagina, por_pagina = max(1, pagina), min(max(1, por_pagina), MAX_PAGE_SIZE)
+        fin = pagina * por_pagina
+        if orden:
+            campo = orden.lstrip('-')
+            seleccion = rank_top_k(seleccion, {'claves': [(QUERY_FIELDS[campo], not orden.startswith('-'))]}, fin)
+        pagina_df = seleccion.iloc[fin - por_pagina:fin]
+        registros = web_block(pagina_df[web_source_columns(pagina_df)])
+        if 'spkid' in pagina_df.columns:
+            # Para poder pedir después /api/orbits?ids=...
+            registros.insert(1, 'spkid', pagina_df['spkid'].to_numpy())
+        return {
+            'total': int(mascara.sum()),
+            'pagina': pagina,
+            'por_pagina': por_pagina,
+            'asteroides': json.loads(registros.to_json(orient='records')),
+        }
+
+    def orbits(self, spkids, n_puntos=180, dimensiones=2):
+        """
+        Órbitas completas {identificador: [[x, y(, z)], ...]} de los SPK-ID
+        pedidos, generadas en una sola pasada vectorizada.
+        """
+        filas = self.df.iloc[self.rows_for_ids(spkids[:MAX_ORBIT_IDS])].dropna(subset=['a', 'e', 'w'])
+        if dimensiones == 3:
+            filas = filas.dropna(subset=['i', 'om'])
+            orbitas = generate_orbits_3d(filas['a'], filas['e'], filas['i'], filas['om'], filas['w'],
+                                         n_puntos=n_puntos, dtype=np.float64)
+        else:
+            orbitas = generate_orbits_2d(filas['a'], filas['e'], filas['w'], n_puntos=n_puntos, dtype=np.float64)
+        return {identificador: orbita.tolist() for identificador, orbita in zip(filas['identificador'], orbitas)}
+
+    def positions(self, spkids, epoch, nombres=None):
+        """
+        Posiciones heliocéntricas {'Tierra' | identificador: {x, y, z}} en AU
+        en el día juliano 'epoch', propagando los elementos del catálogo.
+        'nombres' ({spkid: nombre}) sustituye al identificador como clave.
+        """
+        tierra = earth_position(epoch)
+        posiciones = {'Tierra': {'x': float(tierra[0]), 'y': float(tierra[1]), 'z': float(tierra[2])}}
+        filas = self.df.iloc[self.rows_for_ids(spkids)].dropna(subset=['a', 'e', 'i', 'om', 'w', 'ma', 'epoch'])
+        if filas.empty:
+            return posiciones
+        claves = filas['identificador']
+        if nombres:
+            claves = [nombres.get(int(spkid), identificador) for spkid, identificador in zip(filas['spkid'], claves)]
+        for clave, (x, y, z) in zip(claves, propagate_catalog(filas, epoch)):
+            posiciones[clave] = {'x': float(x), 'y': float(y), 'z': float(z)}
+        return posiciones
+
+
+class ResponseCache:
+    """
+    Caché LRU de respuestas ya serializadas (bytes). Es segura entre hilos
+    porque el servidor de desarrollo de Flask atiende con varios.
+    """
+
+    def __init__(self, capacidad=DEFAULT_RESPONSE_CACHE):
+        self.capacidad = capacidad
+        self._datos = OrderedDict()
+        self._lock = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+
+    def get(self, clave):
+        with self._lock:
+            if clave in self._datos:
+                self._datos.move_to_end(clave)
+                self.aciertos += 1
+                return self._datos[clave]
+            self.fallos += 1
+            return None
+
+    def put(self, clave, valor):
+        if self.capacidad <= 0:
+            return
+        with self._lock:
+            self._datos[clave] = valor
+            self._datos.move_to_end(clave)
+            while len(self._datos) > self.capacidad:
+                self._datos.popitem(last=False)
+
+    def clear(self):
+        """Vacía la caché (p. ej. al cambiar el catálogo que sirve)."""
+        with self._lock:
+            self._datos.clear()
@@ -0,0 +1,236 @@
+# modules/close_approach.py
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from modules.neows_ingest import ingest_neows_feeds
+from modules.propagator import EARTH_ELEMENTS, JD_UNIX_EPOCH, propagate
+
+AU_KM = 149597870.7
+LUNAR_DISTANCE_KM = 384400.0
+KM_PER_MILE = 1.609344
+# Velocidad relativa máxima que se supone entre un NEO y la Tierra (AU/día,
+# ~100 km/s). Con ella se fija el margen del muestreo grueso: entre dos
+# épocas de la malla la distancia no puede bajar más que v * paso / 2.
+MAX_RELATIVE_SPEED_AU_DAY = 0.06
+# Órbita de la Tierra: perihelio y afelio (AU) para el filtro inicial
+EARTH_PERIHELION_AU = 0.9833
+EARTH_APHELION_AU = 1.0167
+# Memoria máxima (aprox.) de los temporales de cada bloque de cuerpos
+DEFAULT_BLOCK_BYTES = 128 * 1024 * 1024
+ELEMENT_COLUMNS = ['a', 'e', 'i', 'om', 'w', 'ma', 'epoch']
+
+
+def prefilter_candidates(df, umbral_au):
+    """
+    Descarta, sin propagar nada, los cuerpos que no pueden acercarse a la
+    Tierra a menos de 'umbral_au': los que tienen el perihelio por fuera del
+    afelio terrestre (o el afelio por dentro del perihelio terrestre) y los que
+    tienen una MOID conocida mayor que el umbral. Devuelve una máscara booleana.
+    """
+    a, e = df['a'].to_numpy(dtype=np.float64), df['e'].to_numpy(dtype=np.float64)
+    q = np.abs(a) * np.abs(1 - e)
+    ad = np.where(e < 1, a * (1 + e), np.inf)
+    mascara = (q <= EARTH_APHELION_AU + umbral_au) & (ad >= EARTH_PERIHELION_AU - umbral_au)
+    if 'moid' in df.columns:
+        moid = df['moid'].to_numpy(dtype=np.float64)
+        # Pequeño margen por si la MOID del catálogo no está al día
+        mascara &= ~(moid > umbral_au * 1.1 + 1e-3)
+    mascara &= df[ELEMENT_COLUMNS].notna().all(axis=1).to_numpy()
+    return mascara
+
+
+def _earth_elements(n):
+    return [np.full(n, EARTH_ELEMENTS[col], dtype=np.float64) for col in ELEMENT_COLUMNS]
+
+
+def _relative_state(elementos, tiempos):
+    """
+    Posición y velocidad del cuerpo relativas a la Tierra, cada cuerpo en su
+    propio instante 'tiempos[k]'. Se consigue desplazando la época de los
+    elementos, así una sola llamada al propagador sirve para todos.
+    """
+    t0 = float(tiempos[0]) if len(tiempos) else 0.0
+    desfase = tiempos - t0
+    a, e, i, om, w, ma, epoch = elementos
+    r, v = propagate(a, e, i, om, w, ma, epoch - desfase, t0, velocities=True)
+    ea, ee, ei, eom, ew, ema, eepoch = _earth_elements(len(tiempos))
+    r_t, v_t = propagate(ea, ee, ei, eom, ew, ema, eepoch - desfase, t0, velocities=True)
+    return r - r_t, v - v_t
+
+
+def _screen_partition(elementos, inicio_jd, fin_jd, umbral_au, paso_dias, max_block_bytes):
+    """
+    Busca los acercamientos de una partición de cuerpos. Devuelve arrays
+    (índice del cuerpo, jd, distancia en AU, velocidad relativa en AU/día).
+    """
+    epochs = np.arange(inicio_jd - paso_dias, fin_jd + 2 * paso_dias, paso_dias)
+    tierra = propagate(*(EARTH_ELEMENTS[col] for col in ELEMENT_COLUMNS), epochs)[0]
+    margen = MAX_RELATIVE_SPEED_AU_DAY * paso_dias / 2
+    umbral_grueso2 = (umbral_au + margen) ** 2
+
+    n = len(elementos[0])
+    block_size = max(1, max_block_bytes // (len(epochs) * 16 * 8))
+    cuerpos, t_izq = [], []
+    for inicio in range(0, n, block_size):
+        bloque = [col[inicio:inicio + block_size] for col in elementos]
+        posiciones = propagate(*bloque, epochs)
+        d2 = ((posiciones - tierra[None, :, :]) ** 2).sum(axis=2)
+        # Mínimos locales de la distancia en la malla que pasan el umbral grueso
+        minimo = (d2[:, 1:-1] <= d2[:, :-2]) & (d2[:, 1:-1] < d2[:, 2:]) & (d2[:, 1:-1] < umbral_grueso2)
+        filas, columnas = np.nonzero(minimo)
+        cuerpos.append(filas + inicio)
+        t_izq.append(epochs[columnas])  # época anterior al mínimo de la malla
+
+    cuerpos = np.concatenate(cuerpos) if cuerpos else np.empty(0, dtype=np.int64)
+    izquierda = np.concatenate(t_izq) if t_izq else np.empty(0)
+    if cuerpos.size == 0:
+        return cuerpos, izquierda, izquierda, izquierda
+
+    # Refinado: bisección vectorizada de d/dt |r|^2 = 2 r . v (pasa de - a +)
+    candidatos = [col[cuerpos] for col in elementos]
+    derecha = izquierda + 2 * paso_dias
+    for _ in range(40):
+        medio = (izquierda + derecha) / 2
+        r, v = _relative_state(candidatos, medio)
+        acercandose = (r * v).sum(axis=1) < 0
+        izquierda = np.where(acercandose, medio, izquierda)
+        derecha = np.where(acercandose, derecha, medio)
+
+    jd = (izquierda + derecha) / 2
+    r, v = _relative_state(candidatos, jd)
+    distancia = np.linalg.norm(r, axis=1)
+    velocidad = np.linalg.norm(v, axis=1)
+    validos = (distancia <= umbral_au) & (jd >= inicio_jd) & (jd <= fin_jd)
+    return cuerpos[validos], jd[validos], distancia[validos], velocidad[validos]
+
+
+def screen_close_approaches(df, inicio_jd, fin_jd, umbral_au=0.05, paso_dias=1.0, workers=None,
+                            max_block_bytes=DEFAULT_BLOCK_BYTES):
+    """
+    Busca los acercamientos a la Tierra por debajo de 'umbral_au' entre dos
+    fechas (días julianos) para todo el catálogo:
+
+    1. filtro barato por perihelio/afelio y MOID (prefilter_candidates);
+    2. propagación por bloques en una malla de 'paso_dias' y detección de los
+       mínimos locales de distancia;
+    3. refinado de cada candidato buscando la raíz de la derivada de la
+       distancia.
+
+    Los pasos 2 y 3 se reparten en 'workers' procesos (None = todos los núcleos,
+    1 = sin pool). Devuelve un DataFrame con una fila por acercamiento.
+    """
+    inicio_reloj = time.perf_counter()
+    mascara = prefilter_candidates(df, umbral_au)
+    df_cand = df[mascara]
+    print(f"🔎 {len(df_cand)} de {len(df)} cuerpos pasan el filtro de perihelio/afelio/MOID.")
+
+    elementos = [df_cand[col].to_numpy(dtype=np.float64) for col in ELEMENT_COLUMNS]
+    workers = workers or os.cpu_count() or 1
+    particiones = np.array_split(np.arange(len(df_cand)), max(1, min(workers, len(df_cand))))
+    argumentos = [([col[p] for col in elementos], inicio_jd, fin_jd, umbral_au, paso_dias, max_block_bytes)
+                  for p in particiones]
+
+    if workers == 1 or len(particiones) == 1:
+        resultados = [_screen_partition(*args) for args in argumentos]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            resultados = list(pool.map(_screen_partition, *zip(*argumentos)))
+
+    filas = []
+    for particion, (cuerpos, jd, distancia, velocidad) in zip(particiones, resultados):
+        filas.append(pd.DataFrame({
+            'fila': particion[cuerpos], 'jd': jd, 'miss_distance_au': distancia,
+            'relative_velocity_km_s': velocidad * AU_KM / 86400.0,
+        }))
+    tabla = pd.concat(filas, ignore_index=True) if filas else pd.DataFrame()
+    tabla = _describe_approaches(df_cand, tabla)
+
+    duracion = time.perf_counter() - inicio_reloj
+    print(f"✅ {len(tabla)} acercamientos por debajo de {umbral_au} AU en {duracion:.2f} s.")
+    return tabla
+
+
+def _describe_approaches(df_cand, tabla):
+    """
+    Añade identificadores y fechas en el formato de NeoWs a los acercamientos.
+    """
+    if tabla.empty:
+        return pd.DataFrame(columns=['spkid', 'name', 'jd', 'close_approach_date', 'close_approach_date_full',
+                                     'epoch_date_close_approach', 'miss_distance_au', 'relative_velocity_km_s'])
+    origen = df_cand.iloc[tabla['fila'].to_numpy()]
+    tabla.insert(0, 'spkid', origen['spkid'].to_numpy() if 'spkid' in origen.columns else tabla['fila'])
+    nombres = origen['full_name'].astype(object).where(origen['full_name'].notna(), None) \
+        if 'full_name' in origen.columns else pd.Series([None] * len(origen))
+    tabla.insert(1, 'name', [str(n).strip() if n is not None else str(s) for n, s in zip(nombres, tabla['spkid'])])
+    tabla.insert(2, 'is_pha', (origen['pha'] == 'Y').to_numpy() if 'pha' in origen.columns else False)
+
+    epoch_ms = np.rint((tabla['jd'].to_numpy() - JD_UNIX_EPOCH) * 86400000.0).astype(np.int64)
+    fechas = [datetime.fromtimestamp(ms / 1000.0, tz=timezone.utc) for ms in epoch_ms]
+    tabla['close_approach_date'] = [f.strftime('%Y-%m-%d') for f in fechas]
+    tabla['close_approach_date_full'] = [f.strftime('%Y-%b-%d %H:%M') for f in fechas]
+    tabla['epoch_date_close_approach'] = epoch_ms
+    return tabla.drop(columns=['fila']).sort_values('jd', ignore_index=True)
+
+
+def to_neows_feed(tabla):
+    """
+    Convierte la tabla de acercamientos en un dict con la forma del feed de
+    NeoWs: {'element_count', 'near_earth_objects': {fecha: [objeto, ...]}},
+    donde cada objeto lleva su 'close_approach_data'.
+    """
+    feed = {}
+    for fila in tabla.itertuples(index=False):
+        km = fila.miss_distance_au * AU_KM
+        km_s = fila.relative_velocity_km_s
+        feed.setdefault(fila.close_approach_date, []).append({
+            'id': str(fila.spkid),
+            'neo_reference_id': str(fila.spkid),
+            'name': fila.name,
+            'is_potentially_hazardous_asteroid': bool(fila.is_pha),
+            'close_approach_data': [{
+                'close_approach_date': fila.close_approach_date,
+                'close_approach_date_full': fila.close_approach_date_full,
+                'epoch_date_close_approach': int(fila.epoch_date_close_approach),
+                'relative_velocity': {
+                    'kilometers_per_second': f"{km_s:.9f}",
+                    'kilometers_per_hour': f"{km_s * 3600:.10f}",
+                    'miles_per_hour': f"{km_s * 3600 / KM_PER_MILE:.10f}",
+                },
+                'miss_distance': {
+                    'astronomical': f"{fila.miss_distance_au:.10f}",
+                    'lunar': f"{km / LUNAR_DISTANCE_KM:.10f}",
+                    'kilometers': f"{km:.9f}",
+                    'miles': f"{km / KM_PER_MILE:.10f}",
+                },
+                'orbiting_body': 'Earth',
+            }],
+        })
+    return {'element_count': len(tabla), 'near_earth_objects': feed}
+
+
+def compare_with_neows(tabla, ruta_neows):
+    """
+    Cruza los acercamientos calculados con un feed de NeoWs guardado (p. ej.
+    'neows_data_7dpppp.json') por SPK-ID e imprime cuántos coinciden y con qué
+    diferencia de fecha y distancia. Devuelve el DataFrame del cruce.
+    """
+    referencia = ingest_neows_feeds(ruta_neows, solo_tierra=True)[
+        ['spkid', 'epoch_date_close_approach', 'miss_distance_au']
+    ].rename(columns={'epoch_date_close_approach': 'neows_epoch_ms', 'miss_distance_au': 'neows_miss_distance_au'})
+    cruce = referencia.merge(tabla, on='spkid', how='left')
+    cruce['dt_horas'] = (cruce['epoch_date_close_approach'] - cruce['neows_epoch_ms']) / 3.6e6
+    cruce['dd_au'] = cruce['miss_distance_au'] - cruce['neows_miss_distance_au']
+    # Si un objeto tiene varios acercamientos calculados, vale el más próximo en fecha
+    cruce = cruce.loc[cruce['dt_horas'].abs().fillna(np.inf).groupby(cruce['spkid']).idxmin()]
+
+    encontrados = cruce['jd'].notna()
+    print(f"📊 NeoWs: {len(referencia)} acercamientos; {encontrados.sum()} encontrados por el cribado.")
+    if encontrados.any():
+        print(f"   |Δt| mediana: {cruce.loc[encontrados, 'dt_horas'].abs().median():.2f} h, "
+              f"|Δd| mediana: {cruce.loc[encontrados, 'dd_au'].abs().median():.2e} AU")
+    return cruce
@@ -1,20 +1,39 @@
 # modules/data_loader.py
 import pandas as pd
 import os
+import sys
+import time
+
+try:
+    import resource
+except ImportError:  # Windows no tiene el módulo 'resource'
+    resource = None
+
+from modules.analyzer import TEXT_COLUMNS, coerce_numeric_columns
+
+DEFAULT_CATALOG = "jpl_catalog.csv"
+
+def resolve_catalog_path(filename=DEFAULT_CATALOG):
+    """
+    Devuelve la ruta absoluta del catálogo. El nombre por defecto se busca en
+    la carpeta raíz del proyecto (un nivel arriba de la carpeta 'modules');
+    cualquier otra ruta relativa (p. ej. --catalog datos/x.csv) se resuelve
+    desde el directorio actual, como espera quien la escribe en la consola.
+    """
+    if filename != DEFAULT_CATALOG:
+        return os.path.abspath(filename)
+    # Obtenemos la ruta absoluta del directorio donde se encuentra este módulo
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    project_root = os.path.dirname(script_dir)
+    return os.path.join(project_root, filename)
 
 def load_local_jpl_catalog(filename="jpl_catalog.csv"):
     """
     Carga el catálogo de asteroides desde un archivo CSV local, buscando el archivo
     en la misma carpeta donde se encuentra el script principal.
     """
-    # --- ESTA ES LA LÓGICA CLAVE ---
-    # Obtenemos la ruta absoluta del directorio donde se está ejecutando el script
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    
-    # Construimos la ruta completa hacia el archivo CSV, asumiendo que está en la carpeta raíz del proyecto
-    # (un nivel arriba de la carpeta 'modules')
-    project_root = os.path.dirname(script_dir)
-    file_path = os.path.join(project_root, filename)
+    file_path = resolve_catalog_path(filename)
+    project_root = os.path.dirname(file_path)
 
     print(f"Buscando el archivo en la ruta: {file_path}")
 
@@ -31,4 +50,122 @@ def load_local_jpl_catalog(filename="jpl_catalog.csv"):
         return df
     except Exception as e:
         print(f"❌ Error al leer el archivo CSV: {e}")
-        return pd.DataFrame()
\ No newline at end of file
+        return pd.DataFrame()
+
+# --- CARGA TIPADA Y POR BLOQUES ---
+
+# Esquema del CSV del SBDB de JPL. Los elementos orbitales que se usan para
+# calcular posiciones van en float64; los parámetros físicos en float32.
+JPL_DTYPES = {
+    'full_name': 'string',
+    'spkid': 'int64',
+    'pha': pd.CategoricalDtype(['N', 'Y']),
+    'neo': pd.CategoricalDtype(['N', 'Y']),
+    'H': 'float32',
+    'diameter': 'float32',
+    'albedo': 'float32',
+    'rot_per': 'float32',
+    'e': 'float64',
+    'a': 'float64',
+    'q': 'float64',
+    'i': 'float64',
+    'om': 'float64',
+    'w': 'float64',
+    'ma': 'float64',
+    'ad': 'float64',
+    'n': 'float64',
+    'per_y': 'float32',
+    'moid': 'float32',
+    'epoch': 'float64',
+}
+
+# Columnas que realmente usa el pipeline (main.py, órbitas y posiciones)
+PIPELINE_COLUMNS = list(JPL_DTYPES)
+
+
+def peak_memory_mb():
+    """
+    Devuelve el pico de memoria residente (RSS) del proceso en MB, o None si
+    el sistema operativo no lo permite.
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux lo reporta en KB, macOS en bytes
+    if sys.platform == 'darwin':
+        return peak / (1024 * 1024)
+    return peak / 1024
+
+
+def load_jpl_catalog_typed(filename="jpl_catalog.csv", columns=None, chunksize=None, transform=None):
+    """
+    Carga el catálogo declarando el esquema de JPL de antemano y leyendo solo
+    las columnas necesarias. Con 'chunksize' el archivo se procesa por bloques:
+    cada bloque pasa por la limpieza (y por 'transform', si se indica) antes
+    de leer el siguiente, así nunca se tiene el CSV entero como texto en memoria.
+
+    Devuelve el DataFrame ya limpio, o un DataFrame vacío si hay error. Las
+    métricas de la carga (filas/s, pico de memoria) quedan en df.attrs['load_stats'].
+    """
+    file_path = resolve_catalog_path(filename)
+    if not os.path.exists(file_path):
+        print(f"❌ ERROR: No se encontró el archivo en la ruta esperada: {file_path}")
+        print(f"   Asegúrate de que '{filename}' esté en la carpeta principal de tu proyecto.")
+        return pd.DataFrame()
+
+    wanted = set(columns or PIPELINE_COLUMNS)
+    modo = f"bloques de {chunksize:,} filas" if chunksize else "lectura única"
+    print(f"📁 Cargando catálogo tipado desde '{file_path}' ({modo})...")
+
+    inicio = time.perf_counter()
+    try:
+        try:
+            partes = _read_catalog_chunks(file_path, wanted, JPL_DTYPES, chunksize, transform)
+        except (ValueError, TypeError) as e:
+            # Algún valor no encaja en el esquema: se lee sin tipos numéricos y se
+            # deja que coerce_numeric_columns los convierta con errors='coerce'.
+            print(f"⚠️ El CSV no cumple el esquema ({e}). Reintentando con conversión tolerante...")
+            text_dtypes = {col: dtype for col, dtype in JPL_DTYPES.items() if col in TEXT_COLUMNS}
+            partes = _read_catalog_chunks(file_path, wanted, text_dtypes, chunksize, transform)
+    except Exception as e:
+        print(f"❌ Error al leer el archivo CSV: {e}")
+        return pd.DataFrame()
+
+    df = pd.concat(partes, ignore_index=True) if len(partes) > 1 else partes[0]
+    duracion = time.perf_counter() - inicio
+    filas_por_seg = len(df) / duracion if duracion > 0 else float('inf')
+    pico = peak_memory_mb()
+    pico_txt = f"{pico:,.0f} MB" if pico is not None else "n/d"
+    print(f"✅ Se cargaron {len(df)} asteroides en {duracion:.2f} s "
+          f"({filas_por_seg:,.0f} filas/s, pico de memoria {pico_txt}).")
+    df.attrs['load_stats'] = {
+        'rows': len(df),
+        'seconds': duracion,
+        'rows_per_sec': filas_por_seg,
+        'peak_rss_mb': pico,
+    }
+    return df
+
+
+def _read_catalog_chunks(file_path, wanted, dtypes, chunksize, transform):
+    """
+    Lee el CSV (entero o por bloques) y devuelve la lista de bloques limpios.
+    """
+    reader = pd.read_csv(
+        file_path,
+        skipinitialspace=True,
+        usecols=lambda col: col in wanted,
+        dtype={col: dtype for col, dtype in dtypes.items() if col in wanted},
+        chunksize=chunksize,
+    )
+    if not chunksize:
+        reader = [reader]
+    partes = []
+    for chunk in reader:
+        chunk = coerce_numeric_columns(chunk)
+        if transform is not None:
+            chunk = transform(chunk)
+        partes.append(chunk)
+    if not partes:
+        partes.append(pd.DataFrame(columns=sorted(wanted)))
+    return partes
@@ -0,0 +1,94 @@
+# modules/ephemeris.py
+import json
+import os
+import time
+
+import numpy as np
+
+from modules.orbit_export import write_orbit_binary
+from modules.propagator import propagate
+
+# Memoria máxima (aprox.) de los temporales de cada bloque de cuerpos
+DEFAULT_BLOCK_BYTES = 256 * 1024 * 1024
+# float64 por elemento de las matrices (N, T) que usa el propagador
+_TEMPORALES_POR_EPOCA = 14
+
+
+def epoch_grid(inicio_jd, dias, paso_dias=1.0):
+    """
+    Malla de épocas (días julianos) desde 'inicio_jd' durante 'dias' días,
+    con un paso de 'paso_dias'.
+    """
+    return inicio_jd + np.arange(0, dias + paso_dias / 2, paso_dias)
+
+
+def iter_ephemeris_blocks(elementos, epochs, block_size=None, max_block_bytes=DEFAULT_BLOCK_BYTES,
+                          dtype=np.float32):
+    """
+    Propaga los cuerpos a todas las épocas por bloques de cuerpos. 'elementos'
+    es un dict con arrays a, e, i, om, w, ma y epoch. Produce tuplas
+    (inicio, bloque) con bloques (B, T, 3) de posiciones en AU.
+
+    Si no se indica 'block_size', se elige para que los temporales de cada
+    bloque quepan en 'max_block_bytes'.
+    """
+    epochs = np.atleast_1d(np.asarray(epochs, dtype=np.float64))
+    n = len(elementos['a'])
+    if block_size is None:
+        block_size = max(1, max_block_bytes // (len(epochs) * _TEMPORALES_POR_EPOCA * 8))
+
+    for inicio in range(0, n, block_size):
+        fin = min(inicio + block_size, n)
+        tramo = {col: np.asarray(valores[inicio:fin]) for col, valores in elementos.items()}
+        posiciones = propagate(
+            tramo['a'], tramo['e'], tramo['i'], tramo['om'], tramo['w'], tramo['ma'], tramo['epoch'], epochs
+        )
+        yield inicio, posiciones.astype(dtype, copy=False)
+
+
+def write_ephemeris(nombres, elementos, epochs, ruta_base="efemerides", formato="npy", block_size=None):
+    """
+    Genera la tabla de efemérides (N cuerpos x T épocas x 3) y la escribe en
+    disco bloque a bloque, así que N x T puede ser mayor que la memoria:
+
+    - formato='npy': '<ruta_base>.npy' (float32, se puede abrir con
+      np.load(..., mmap_mode='r')) y '<ruta_base>.json' con nombres y épocas.
+    - formato='bin'/'bin16': el formato binario de órbitas de
+      modules/orbit_export.py, donde cada "órbita" es la trayectoria de un
+      cuerpo en las T épocas; el índice incluye además las épocas.
+
+    Devuelve la ruta del índice/manifiesto.
+    """
+    epochs = np.atleast_1d(np.asarray(epochs, dtype=np.float64))
+    n, t = len(nombres), len(epochs)
+    inicio_reloj = time.perf_counter()
+    bloques = iter_ephemeris_blocks(elementos, epochs, block_size)
+
+    if formato == "npy":
+        tabla = np.lib.format.open_memmap(f"{ruta_base}.npy", mode='w+', dtype='<f4', shape=(n, t, 3))
+        for inicio, bloque in bloques:
+            tabla[inicio:inicio + len(bloque)] = bloque
+        tabla.flush()
+        del tabla
+        ruta_indice = f"{ruta_base}.json"
+        with open(ruta_indice, 'w') as f:
+            json.dump({
+                'datos': os.path.basename(f"{ruta_base}.npy"),
+                'forma': [n, t, 3],
+                'unidades': 'AU',
+                'epochs_jd': epochs.tolist(),
+                'nombres': [str(nombre) for nombre in nombres],
+            }, f, separators=(',', ':'))
+    else:
+        pares = ((nombres[inicio:inicio + len(bloque)], bloque) for inicio, bloque in bloques)
+        ruta_indice = write_orbit_binary(pares, ruta_base, cuantizar=(formato == "bin16"))
+        with open(ruta_indice) as f:
+            indice = json.load(f)
+        indice['epochs_jd'] = epochs.tolist()
+        with open(ruta_indice, 'w') as f:
+            json.dump(indice, f, separators=(',', ':'))
+
+    duracion = time.perf_counter() - inicio_reloj
+    print(f"✅ Efemérides de {n} cuerpos x {t} épocas en {duracion:.2f} s "
+          f"({n * t / max(duracion, 1e-9):,.0f} posiciones/s).")
+    return ruta_indice
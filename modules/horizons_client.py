@@ -0,0 +1,236 @@
+# modules/horizons_client.py
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from modules.propagator import EARTH_ELEMENTS, propagate
+
+CACHE_DIRNAME = ".horizons_cache"
+# Las épocas se redondean a cubos de este tamaño (días): dos peticiones dentro
+# del mismo cubo comparten la entrada de la caché.
+DEFAULT_BUCKET_DAYS = 1 / 24
+DEFAULT_TTL_S = 6 * 3600
+DEFAULT_WORKERS = 8
+# Épocas por consulta a Horizons (la lista TLIST no admite muchas más)
+MAX_EPOCHS_PER_QUERY = 50
+# Diferencia máxima (días) entre una época pedida y la fila que la responde
+JD_TOLERANCE_DAYS = 1e-5
+
+
+class AstroqueryBackend:
+    """
+    Consulta JPL Horizons con astroquery: una petición por objeto con todas
+    sus épocas (en grupos de MAX_EPOCHS_PER_QUERY). Horizons devuelve las
+    filas ordenadas por tiempo y sin épocas repetidas, así que cada fila se
+    asigna a la época pedida por su 'datetime_jd', no por su posición.
+    """
+
+    def vectors(self, id_objeto, id_tipo, location, epochs):
+        from astroquery.jplhorizons import Horizons
+
+        resultado = []
+        for inicio in range(0, len(epochs), MAX_EPOCHS_PER_QUERY):
+            grupo = list(epochs[inicio:inicio + MAX_EPOCHS_PER_QUERY])
+            tabla = Horizons(id=id_objeto, location=location, epochs=grupo, id_type=id_tipo).vectors()
+            filas = _rows_for_epochs(np.asarray(tabla['datetime_jd'], dtype=np.float64), grupo)
+            resultado.extend(
+                {'jd': jd, 'x': float(tabla['x'][fila]), 'y': float(tabla['y'][fila]), 'z': float(tabla['z'][fila])}
+                for jd, fila in zip(grupo, filas)
+            )
+        return resultado
+
+
+def _rows_for_epochs(jd_filas, epochs, tolerancia=JD_TOLERANCE_DAYS):
+    """
+    Índice de la fila de 'jd_filas' que corresponde a cada época de 'epochs'
+    (la más cercana). Lanza ValueError si a alguna época no le corresponde
+    ninguna fila a menos de 'tolerancia' días.
+    """
+    epochs = np.asarray(epochs, dtype=np.float64)
+    if len(jd_filas) == 0:
+        raise ValueError(f"Horizons no devolvió ninguna fila para {len(epochs)} épocas")
+    filas = np.abs(jd_filas[None, :] - epochs[:, None]).argmin(axis=1)
+    sin_fila = np.abs(jd_filas[filas] - epochs) > tolerancia
+    if sin_fila.any():
+        raise ValueError(f"Horizons no devolvió las épocas {epochs[sin_fila].tolist()}")
+    return filas
+
+
+class FixtureBackend:
+    """
+    Sustituto local de Horizons para trabajar sin red: responde con los
+    vectores reales de un fixture grabado con 'python3 horizons.py
+    --grabar-fixture' (ver tests/data/horizons_fixture.json), de modo que
+    lo que sale del cliente puede compararse con Horizons. Pedir una época
+    que no está grabada es un error, salvo con 'propagar=True': entonces se
+    propagan los elementos osculantes del fixture (modules/propagator.py),
+    lo que sirve para la API sin red pero no valida nada. 'latencia' simula
+    el tiempo de ida y vuelta de cada consulta; 'consultas' y
+    'max_simultaneas' permiten comprobar el agrupado de épocas y la
+    concurrencia.
+    """
+
+    def __init__(self, objetos, latencia=0.0, propagar=False):
+        self.objetos = {str(id_objeto): objeto for id_objeto, objeto in objetos.items()}
+        self.latencia = latencia
+        self.propagar = propagar
+        self.consultas = 0
+        self.max_simultaneas = 0
+        self._simultaneas = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_fixture(cls, ruta_fixture, latencia=0.0, propagar=False):
+        with open(ruta_fixture) as f:
+            fixture = json.load(f)
+        return cls({objeto['id']: objeto for objeto in fixture['objetos']}, latencia, propagar)
+
+    def _recorded(self, objeto, epochs):
+        vectores = objeto.get('vectores', [])
+        filas = _rows_for_epochs(np.array([v['jd'] for v in vectores], dtype=np.float64), epochs)
+        return [{'jd': float(jd), **{k: vectores[fila][k] for k in 'xyz'}} for jd, fila in zip(epochs, filas)]
+
+    def _propagated(self, el, epochs):
+        posiciones = propagate(el['a'], el['e'], el['i'], el['om'], el['w'], el['ma'], el['epoch'],
+                               np.asarray(epochs, dtype=np.float64))[0]
+        return [{'jd': float(jd), 'x': float(x), 'y': float(y), 'z': float(z)}
+                for jd, (x, y, z) in zip(epochs, posiciones)]
+
+    def vectors(self, id_objeto, id_tipo, location, epochs):
+        with self._lock:
+            self.consultas += 1
+            self._simultaneas += 1
+            self.max_simultaneas = max(self.max_simultaneas, self._simultaneas)
+        try:
+            time.sleep(self.latencia)
+            if location != '@sun':
+                raise ValueError(f"El fixture solo tiene posiciones heliocéntricas, no {location!r}")
+            objeto = self.objetos.get(str(id_objeto))
+            if self.propagar:
+                if str(id_objeto) == '399':
+                    return self._propagated(EARTH_ELEMENTS, epochs)
+                if objeto is not None:
+                    return self._propagated(objeto['elementos'], epochs)
+            if objeto is None:
+                raise KeyError(f"Objeto {id_objeto!r} no está en el fixture")
+            return self._recorded(objeto, epochs)
+        finally:
+            with self._lock:
+                self._simultaneas -= 1
+
+
+class HorizonsClient:
+    """
+    Cliente de vectores de Horizons con caché en disco y consultas en
+    paralelo. Cada objeto se pide una sola vez con todas las épocas que le
+    faltan, y los objetos se piden a la vez en un pool acotado de hilos.
+    La caché guarda un JSON por (objeto, location) con las posiciones por
+    cubo de época y la hora en que se guardaron; las entradas más viejas que
+    'ttl_s' se descartan.
+    """
+
+    def __init__(self, backend=None, cache_dir=CACHE_DIRNAME, ttl_s=DEFAULT_TTL_S,
+                 bucket_dias=DEFAULT_BUCKET_DAYS, workers=DEFAULT_WORKERS):
+        self.backend = backend or AstroqueryBackend()
+        self.cache_dir = cache_dir
+        self.ttl_s = ttl_s
+        self.bucket_dias = bucket_dias
+        self.workers = workers
+        self.aciertos = 0
+        self.fallos = 0
+        self._lock = threading.Lock()
+
+    def bucket(self, jd):
+        """Época representativa (centro redondeado) del cubo de 'jd'."""
+        return round(float(round(jd / self.bucket_dias) * self.bucket_dias), 8)
+
+    def _cache_path(self, id_objeto, location):
+        seguro = "".join(c if c.isalnum() else "_" for c in f"{location}_{id_objeto}")
+        return os.path.join(self.cache_dir, f"{seguro}.json")
+
+    def _read_cache(self, ruta):
+        try:
+            with open(ruta) as f:
+                entradas = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        limite = time.time() - self.ttl_s
+        return {clave: valor for clave, valor in entradas.items() if valor['t'] >= limite}
+
+    def _write_cache(self, ruta, entradas):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = f"{ruta}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(entradas, f)
+        os.replace(tmp_path, ruta)
+
+    def _vectors_one(self, id_objeto, id_tipo, location, epochs):
+        ruta = self._cache_path(id_objeto, location)
+        entradas = self._read_cache(ruta)
+        cubos = [self.bucket(jd) for jd in epochs]
+        faltan = sorted({cubo for cubo in cubos if repr(cubo) not in entradas})
+        with self._lock:
+            self.aciertos += len(cubos) - len(faltan)
+            self.fallos += len(faltan)
+        if faltan:
+            ahora = time.time()
+            for vector in self.backend.vectors(id_objeto, id_tipo, location, faltan):
+                entradas[repr(self.bucket(vector['jd']))] = {
+                    'x': vector['x'], 'y': vector['y'], 'z': vector['z'], 't': ahora,
+                }
+            self._write_cache(ruta, entradas)
+        return [{'jd': cubo, **{k: entradas[repr(cubo)][k] for k in 'xyz'}} for cubo in cubos]
+
+    def vectors(self, objetos, epochs, location='@sun'):
+        """
+        Posiciones (AU) de varios objetos en varias épocas (días julianos).
+        'objetos' es un dict {id: 'smallbody' | 'majorbody'}. Devuelve
+        {id: [{'jd', 'x', 'y', 'z'}, ...]} en el orden de 'epochs', con 'jd'
+        redondeado a su cubo; los objetos que fallan devuelven None.
+        """
+        epochs = np.atleast_1d(np.asarray(epochs, dtype=np.float64)).tolist()
+
+        def pedir(item):
+            id_objeto, id_tipo = item
+            try:
+                return id_objeto, self._vectors_one(id_objeto, id_tipo, location, epochs)
+            except Exception as e:
+                print(f"❌ Error al obtener la posición para '{id_objeto}': {e}")
+                return id_objeto, None
+
+        with ThreadPoolExecutor(max_workers=max(1, min(self.workers, len(objetos)))) as pool:
+            return dict(pool.map(pedir, objetos.items()))
+
+    def positions(self, objetos, jd, location='@sun'):
+        """
+        Atajo para una sola época: {id: {'x', 'y', 'z'}} (None si falló).
+        """
+        return {id_objeto: (None if vectores is None else {k: vectores[0][k] for k in 'xyz'})
+                for id_objeto, vectores in self.vectors(objetos, [jd], location).items()}
+
+
+if __name__ == "__main__":
+    # Comprobación sin red de la concurrencia y la caché con un fixture grabado:
+    # python3 -m modules.horizons_client tests/data/horizons_fixture.json [latencia_s]
+    import tempfile
+
+    if len(sys.argv) < 2:
+        print("Uso: python3 -m modules.horizons_client <fixture_horizons.json> [latencia_s]")
+        sys.exit(1)
+    backend = FixtureBackend.from_fixture(sys.argv[1], latencia=float(sys.argv[2]) if len(sys.argv) > 2 else 0.2)
+    objetos = {id_objeto: 'smallbody' for id_objeto in backend.objetos}
+    # Las épocas grabadas de todos los objetos del fixture
+    epochs = sorted({vector['jd'] for objeto in backend.objetos.values() for vector in objeto['vectores']})
+    with tempfile.TemporaryDirectory() as carpeta:
+        cliente = HorizonsClient(backend, cache_dir=carpeta)
+        for intento in ("en frío", "con caché"):
+            inicio = time.perf_counter()
+            cliente.vectors(objetos, epochs)
+            print(f"{intento}: {len(objetos)} objetos x {len(epochs)} épocas en "
+                  f"{time.perf_counter() - inicio:.2f} s, {backend.consultas} consultas en total, "
+                  f"{backend.max_simultaneas} simultáneas como máximo, {cliente.aciertos} aciertos de caché")
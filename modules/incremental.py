@@ -0,0 +1,194 @@
+# modules/incremental.py
+import hashlib
+import json
+import os
+import shutil
+import time
+
+import numpy as np
+import pandas as pd
+
+from modules.catalog_cache import cache_dir_for
+from modules.data_loader import PIPELINE_COLUMNS, resolve_catalog_path
+
+# Se incrementa cuando cambia el cálculo de las huellas o el contenido del estado
+STATE_VERSION = 1
+STATE_DIRNAME = ".catalog_state"
+STATE_MANIFEST = "state.json"
+REPORT_NAME = "ultimo_informe.json"
+# Columnas que definen la órbita: si cambian, hay que recalcular MOID y órbitas
+ORBIT_COLUMNS = ['a', 'e', 'i', 'om', 'w', 'ma', 'epoch']
+# Columnas que fijan la forma de la órbita dibujada (sin la posición en ella)
+SHAPE_COLUMNS = ['a', 'e', 'i', 'om', 'w']
+STATE_COLUMNS = ['spkid', 'hash_elementos', 'hash_fila', 'moid', 'moid_calculada']
+
+
+def state_dir_for(filename="jpl_catalog.csv"):
+    """
+    Carpeta del estado incremental de un catálogo: '.catalog_state/<nombre>'
+    junto al CSV (como la caché binaria).
+    """
+    file_path = resolve_catalog_path(filename)
+    return cache_dir_for(file_path, os.path.join(os.path.dirname(file_path), STATE_DIRNAME))
+
+
+def _hash_columns(df, columnas):
+    columnas = [col for col in columnas if col in df.columns]
+    if not columnas:
+        return np.zeros(len(df), dtype=np.uint64)
+    return pd.util.hash_pandas_object(df[columnas], index=False).to_numpy()
+
+
+def shape_hashes(df):
+    """
+    Huella hexadecimal de la forma de la órbita de cada fila, para detectar
+    qué órbitas dibujadas hay que regenerar.
+    """
+    return [f"{h:016x}" for h in _hash_columns(df, SHAPE_COLUMNS).tolist()]
+
+
+def row_fingerprints(df):
+    """
+    Huellas de cada fila: 'hash_elementos' (solo los elementos orbitales) y
+    'hash_fila' (todas las columnas del pipeline), indexadas por spkid.
+    """
+    return pd.DataFrame({
+        'hash_elementos': _hash_columns(df, ORBIT_COLUMNS),
+        'hash_fila': _hash_columns(df, PIPELINE_COLUMNS),
+    }, index=pd.Index(df['spkid'].to_numpy(), name='spkid'))
+
+
+def load_state(state_dir):
+    """
+    Estado de la última ejecución (DataFrame indexado por spkid y el
+    manifiesto), o (None, None) si no hay estado válido.
+    """
+    try:
+        with open(os.path.join(state_dir, STATE_MANIFEST)) as f:
+            manifiesto = json.load(f)
+        if manifiesto.get('version') != STATE_VERSION:
+            return None, None
+        columnas = {col: np.load(os.path.join(state_dir, f"{col}.npy")) for col in STATE_COLUMNS}
+    except (OSError, ValueError):
+        return None, None
+    return pd.DataFrame(columnas).set_index('spkid'), manifiesto
+
+
+def save_state(state_dir, estado, manifiesto=None, informe=None):
+    """
+    Guarda el estado (columnas '.npy') y el manifiesto. Como en la caché
+    binaria, el manifiesto se escribe al final: si algo falla antes, el
+    estado queda inválido y la siguiente ejecución es completa.
+    """
+    if os.path.isdir(state_dir):
+        shutil.rmtree(state_dir)
+    os.makedirs(state_dir)
+    estado = estado.reset_index()
+    for col in STATE_COLUMNS:
+        np.save(os.path.join(state_dir, f"{col}.npy"), estado[col].to_numpy())
+    manifiesto = dict(manifiesto or {}, version=STATE_VERSION, filas=len(estado),
+                      guardado=time.strftime('%Y-%m-%dT%H:%M:%S'))
+    if informe is not None:
+        with open(os.path.join(state_dir, REPORT_NAME), 'w') as f:
+            json.dump(informe, f, indent=2)
+    tmp_path = os.path.join(state_dir, STATE_MANIFEST + ".tmp")
+    with open(tmp_path, 'w') as f:
+        json.dump(manifiesto, f, indent=2)
+    os.replace(tmp_path, os.path.join(state_dir, STATE_MANIFEST))
+
+
+def diff_snapshot(estado, huellas):
+    """
+    Compara las huellas de la instantánea nueva con el estado guardado.
+    Devuelve un dict de arrays de spkid: 'nuevos', 'eliminados',
+    'orbitas_cambiadas' (cambió algún elemento orbital), 'datos_cambiados'
+    (cambió otra columna) y 'sin_cambios'.
+    """
+    if estado is None:
+        vacio = np.empty(0, dtype=np.int64)
+        return {'nuevos': huellas.index.to_numpy(), 'eliminados': vacio, 'orbitas_cambiadas': vacio,
+                'datos_cambiados': vacio, 'sin_cambios': vacio}
+    posiciones = estado.index.get_indexer(huellas.index)
+    existe = posiciones >= 0
+    previo = estado.iloc[posiciones[existe]]
+    actual = huellas[existe]
+    orbita = previo['hash_elementos'].to_numpy() != actual['hash_elementos'].to_numpy()
+    fila = previo['hash_fila'].to_numpy() != actual['hash_fila'].to_numpy()
+    ids = actual.index.to_numpy()
+    return {
+        'nuevos': huellas.index.to_numpy()[~existe],
+        'eliminados': estado.index.to_numpy()[~estado.index.isin(huellas.index)],
+        'orbitas_cambiadas': ids[orbita],
+        'datos_cambiados': ids[fila & ~orbita],
+        'sin_cambios': ids[~fila],
+    }
+
+
+def diff_report(cambios):
+    """
+    Resumen del diff para imprimirlo y guardarlo: número de filas por tipo
+    de cambio y los spkid de las que cambiaron.
+    """
+    informe = {'fecha': time.strftime('%Y-%m-%dT%H:%M:%S')}
+    for tipo, ids in cambios.items():
+        informe[tipo] = len(ids)
+        if tipo != 'sin_cambios':
+            informe[f"spkids_{tipo}"] = [int(spkid) for spkid in ids]
+    print(f"🔄 Cambios respecto a la última instantánea: {len(cambios['nuevos'])} nuevos, "
+          f"{len(cambios['eliminados'])} eliminados, {len(cambios['orbitas_cambiadas'])} con órbita nueva, "
+          f"{len(cambios['datos_cambiados'])} con otros datos nuevos, {len(cambios['sin_cambios'])} sin cambios.")
+    return informe
+
+
+def reuse_moid(df, huellas, estado):
+    """
+    Copia a 'df' la MOID ya calculada en ejecuciones anteriores para las filas
+    sin cambios. Devuelve la máscara de filas que hay que revisar (nuevas o
+    con cambios), que son las únicas a las que se les calcula la MOID.
+    """
+    if estado is None:
+        return np.ones(len(df), dtype=bool)
+    posiciones = estado.index.get_indexer(huellas.index)
+    existe = posiciones >= 0
+    previo = estado.iloc[np.where(existe, posiciones, 0)]
+    sin_cambios = existe & (previo['hash_fila'].to_numpy() == huellas['hash_fila'].to_numpy())
+
+    reutilizar = sin_cambios & previo['moid_calculada'].to_numpy()
+    if 'moid' not in df.columns:
+        df['moid'] = np.nan
+    if reutilizar.any():
+        moid = df['moid'].to_numpy(dtype=np.float64, copy=True)
+        moid[reutilizar] = previo['moid'].to_numpy()[reutilizar]
+        df['moid'] = moid.astype(df['moid'].dtype, copy=False)
+    df['moid_calculada'] = reutilizar
+    return ~sin_cambios
+
+
+def build_state(huellas, df):
+    """
+    Estado que se guarda tras procesar la instantánea: las huellas de todas
+    sus filas y, para las de 'df' (puede ser un subconjunto), la MOID final y
+    si se calculó aquí, para reutilizarla mientras la fila no cambie.
+    """
+    estado = huellas.copy()
+    estado['moid'] = np.nan
+    estado['moid_calculada'] = False
+    if 'moid' in df.columns:
+        posiciones = estado.index.get_indexer(df['spkid'].to_numpy())
+        estado.iloc[posiciones, estado.columns.get_loc('moid')] = df['moid'].to_numpy(dtype=np.float64)
+        if 'moid_calculada' in df.columns:
+            estado.iloc[posiciones, estado.columns.get_loc('moid_calculada')] = df['moid_calculada'].to_numpy(dtype=bool)
+    return estado
+
+
+def export_signature(df, huellas, opciones=""):
+    """
+    Firma de un export: las opciones con que se generó, el orden de sus filas
+    y la huella de cada una. Si no cambia, el archivo de salida ya está al
+    día y no hace falta reescribirlo.
+    """
+    filas = huellas['hash_fila'].reindex(df['spkid'].to_numpy()).to_numpy(dtype=np.uint64)
+    digest = hashlib.sha1(opciones.encode('utf-8'))
+    digest.update(df['spkid'].to_numpy(dtype=np.int64).tobytes())
+    digest.update(filas.tobytes())
+    return digest.hexdigest()
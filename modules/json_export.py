@@ -0,0 +1,187 @@
+# modules/json_export.py
+import gzip
+import time
+
+try:
+    import brotli
+except ImportError:  # Opcional: solo hace falta para generar el .br
+    brotli = None
+
+from modules.data_loader import peak_memory_mb
+
+# Nombres de las columnas en el JSON de la web
+WEB_COLUMN_NAMES = {
+    'is_pha': 'es_peligroso',
+    'H': 'magnitud_absoluta',
+    'rot_per': 'periodo_rotacion_horas',
+    'moid': 'distancia_min_orbita_au',
+    'per_y': 'periodo_orbital_anios',
+}
+WEB_COLUMNS = [
+    'identificador', 'full_name', 'es_peligroso', 'magnitud_absoluta', 'diameter',
+    'albedo', 'periodo_rotacion_horas', 'distancia_min_orbita_au',
+    'a', 'e', 'i', 'om', 'w', 'ma', 'q', 'ad', 'periodo_orbital_anios',
+]
+# Filas que se serializan de cada vez; la memoria depende de esto, no del total
+DEFAULT_BLOCK_ROWS = 50_000
+COMPRESSIONS = ('gzip', 'br')
+GZIP_LEVEL = 9
+BROTLI_QUALITY = 9
+
+
+class _BrotliFile:
+    """
+    Envoltorio mínimo para escribir un .br por partes, como gzip.open.
+    """
+    def __init__(self, path):
+        self._f = open(path, 'wb')
+        self._compresor = brotli.Compressor(quality=BROTLI_QUALITY)
+
+    def write(self, datos):
+        self._f.write(self._compresor.process(datos))
+
+    def close(self):
+        self._f.write(self._compresor.finish())
+        self._f.close()
+
+
+def open_outputs(filename, comprimir):
+    """
+    Abre el JSON sin comprimir y una copia precomprimida por cada formato de
+    'comprimir' ('<filename>.gz', '<filename>.br').
+    """
+    salidas = {filename: open(filename, 'wb')}
+    for formato in comprimir:
+        if formato == 'gzip':
+            salidas[f"{filename}.gz"] = gzip.open(f"{filename}.gz", 'wb', compresslevel=GZIP_LEVEL)
+        elif formato == 'br':
+            if brotli is None:
+                print("⚠️ El paquete 'brotli' no está instalado; no se genera el .br.")
+                continue
+            salidas[f"{filename}.br"] = _BrotliFile(f"{filename}.br")
+        else:
+            raise ValueError(f"Compresión desconocida: {formato!r} (disponibles: {', '.join(COMPRESSIONS)})")
+    return salidas
+
+
+def output_paths(filename, comprimir):
+    """
+    Archivos que escribe open_outputs(filename, comprimir): el JSON y sus
+    copias precomprimidas (el .br solo si 'brotli' está instalado).
+    """
+    sufijos = {'gzip': '.gz', 'br': '.br'}
+    return [filename] + [f"{filename}{sufijos[formato]}" for formato in comprimir
+                         if formato in sufijos and (formato != 'br' or brotli is not None)]
+
+
+def web_block(bloque):
+    """
+    Prepara un bloque de filas para la web: identificador robusto (nombre
+    completo o, si falta, el SPK-ID), nombres de columna del JSON y solo las
+    columnas publicadas. Los tipos numéricos se conservan.
+    """
+    if 'spkid' in bloque.columns:
+        spkid = bloque['spkid'].astype(str)
+    else:
+        spkid = bloque.index.to_series(index=bloque.index).astype(str)
+    identificador = bloque['full_name'].fillna(spkid) if 'full_name' in bloque.columns else spkid
+    bloque = bloque.rename(columns=WEB_COLUMN_NAMES)
+    columnas = [col for col in WEB_COLUMNS if col in bloque.columns or col == 'identificador']
+    return bloque.assign(identificador=identificador)[columnas]
+
+
+def web_source_columns(df):
+    """
+    Columnas de 'df' que hacen falta para construir los registros de la web.
+    """
+    return [col for col in df.columns
+            if col in ('spkid', 'full_name') or WEB_COLUMN_NAMES.get(col, col) in WEB_COLUMNS]
+
+
+def records_fragment(bloque, indent=4):
+    """
+    Registros JSON de un bloque de filas (ya pasado por web_block) sin los
+    corchetes de la lista, listos para unirlos con los de otros bloques.
+    """
+    return bloque.to_json(orient='records', indent=indent)[1:-1].strip()
+
+
+def write_record_fragments(filename, fragmentos, indent=4, comprimir=()):
+    """
+    Une en 'filename' (y sus copias comprimidas) los fragmentos de
+    records_fragment, que llegan como pares (texto, filas) en orden, con el
+    mismo separador que pone to_json dentro de un bloque: el resultado es
+    idéntico a serializar todas las filas de una vez. Devuelve las filas
+    escritas y los nombres de los archivos.
+    """
+    separador = f",\n{' ' * indent}" if indent else ","
+    salidas = open_outputs(filename, comprimir)
+    try:
+        def escribir(texto):
+            datos = texto.encode('utf-8')
+            for salida in salidas.values():
+                salida.write(datos)
+
+        escribir("[")
+        filas = 0
+        for registros, n in fragmentos:
+            if not registros:
+                continue
+            escribir((separador if filas else separador.lstrip(',')) + registros)
+            filas += n
+        escribir("\n]" if indent and filas else "]")
+    finally:
+        for salida in salidas.values():
+            salida.close()
+    return filas, list(salidas)
+
+
+def report_export(filas, archivos, inicio):
+    """Imprime filas, tiempo, filas/s y pico de memoria de un export."""
+    duracion = time.perf_counter() - inicio
+    pico = peak_memory_mb()
+    memoria = f", pico de memoria {pico:.0f} MB" if pico is not None else ""
+    print(f"💾 {filas} registros en {', '.join(archivos)} en {duracion:.2f} s "
+          f"({filas / max(duracion, 1e-9):,.0f} filas/s{memoria}).")
+
+
+def write_records_json(df, filename, indent=4, comprimir=(), block_rows=DEFAULT_BLOCK_ROWS):
+    """
+    Escribe 'df' como una lista JSON de registros (orient='records') bloque a
+    bloque, sin copiar el DataFrame entero ni pasarlo a tipo object: cada
+    bloque se serializa con to_json, que ya escribe los NaN como null.
+    'indent=None' da el JSON compacto. 'comprimir' añade copias gzip/brotli
+    del mismo contenido para servirlas directamente desde un hosting
+    estático. Devuelve el número de filas escritas.
+    """
+    inicio = time.perf_counter()
+    if 'spkid' not in df.columns:
+        print("⚠️ No se encontró la columna 'spkid'; se usa el índice como identificador.")
+    origen = web_source_columns(df)
+    fragmentos = (
+        (records_fragment(web_block(df.iloc[desde:desde + block_rows][origen]), indent),
+         min(block_rows, len(df) - desde))
+        for desde in range(0, len(df), block_rows)
+    )
+    filas, archivos = write_record_fragments(filename, fragmentos, indent, comprimir)
+    report_export(filas, archivos, inicio)
+    return filas
+
+
+def _records_partition(bloque, indent):
+    return records_fragment(web_block(bloque), indent), len(bloque)
+
+
+def write_records_json_partitioned(frame, filas, filename, ejecutor, indent=4, comprimir=()):
+    """
+    Como write_records_json, pero las filas 'filas' (posiciones, en el orden
+    de salida) de un SharedFrame se serializan por particiones en los
+    procesos de 'ejecutor' (ver modules/pipeline.py). Aquí solo se unen los
+    fragmentos en orden y se comprimen, así que el JSON es idéntico byte a
+    byte. El frame debe tener las columnas de web_source_columns.
+    """
+    inicio = time.perf_counter()
+    fragmentos = ejecutor.map(_records_partition, frame, filas, args=(indent,))
+    filas, archivos = write_record_fragments(filename, fragmentos, indent, comprimir)
+    report_export(filas, archivos, inicio)
+    return filas
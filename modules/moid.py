@@ -0,0 +1,403 @@
+# modules/moid.py
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from modules.orbits import orbital_plane_axes
+from modules.pipeline import PartitionExecutor
+from modules.propagator import EARTH_ELEMENTS
+
+# Error máximo por defecto de la MOID calculada (AU)
+DEFAULT_MOID_TOLERANCE_AU = 1e-6
+# Malla gruesa de anomalías verdaderas: (puntos del asteroide, puntos del planeta)
+DEFAULT_GRID = (36, 24)
+# Mínimos locales de la malla que se refinan por cuerpo: todos los que tenga,
+# hasta este máximo (dos elipses tienen pocos mínimos reales; el resto son
+# escalones de la malla en los valles casi planos de órbitas parecidas)
+REFINED_MINIMA = 16
+# Memoria máxima (aprox.) de los temporales de cada bloque de cuerpos
+DEFAULT_BLOCK_BYTES = 128 * 1024 * 1024
+ELEMENT_COLUMNS = ['a', 'e', 'i', 'om', 'w']
+# Filas mínimas por partición: cada cuerpo ya cuesta lo suyo, así que se
+# reparte en particiones más pequeñas que las del resto del pipeline
+MIN_PARTITION_ROWS = 256
+
+# Vecinos de la búsqueda por patrones en el plano (nu_cuerpo, nu_planeta)
+_VECINOS = np.array([(d1, d2) for d1 in (-1, 0, 1) for d2 in (-1, 0, 1) if d1 or d2], dtype=np.float64)
+_MAX_ITER = 200
+# La búsqueda por patrones solo acerca cada candidato a su mínimo (hasta este
+# desplazamiento, en AU); Newton, que converge cuadráticamente, llega a la tolerancia
+PATTERN_TOLERANCE_AU = 1e-3
+# Iteraciones de Newton que pulen cada candidato tras la búsqueda por patrones
+_NEWTON_ITER = 12
+
+
+def planet_elements(nombre):
+    """
+    Elementos (a, e, i, om, w) de un planeta. La Tierra usa los elementos
+    medios J2000 del propagador; el resto, la tabla PLANETS_DATA de
+    generar_coordenadas_3D.py.
+    """
+    if nombre == "Earth":
+        return {col: EARTH_ELEMENTS[col] for col in ELEMENT_COLUMNS}
+    from generar_coordenadas_3D import PLANETS_DATA
+    if nombre not in PLANETS_DATA:
+        raise ValueError(f"Planeta desconocido: {nombre!r} (disponibles: {', '.join(PLANETS_DATA)})")
+    datos = PLANETS_DATA[nombre]
+    return {'a': datos['a'], 'e': datos['e'], 'i': datos['i_deg'], 'om': datos['om_deg'], 'w': datos['w_deg']}
+
+
+def _conic(a, e, q=None):
+    """
+    Semilado recto p y límite de anomalía verdadera de cada cónica. Las
+    elipses recorren toda la vuelta; en las hipérbolas (y parábolas) solo la
+    rama hasta 'r_lim', que se fija después por planeta.
+    """
+    a, e = np.asarray(a, dtype=np.float64), np.asarray(e, dtype=np.float64)
+    if q is None:
+        q = np.abs(a) * np.abs(1 - e)
+    else:
+        q = np.where(np.isfinite(q), q, np.abs(a) * np.abs(1 - e))
+    return q * (1 + e), q
+
+
+def _positions(p, e, ejes, nu):
+    """
+    Posiciones (..., K, 3) en las anomalías verdaderas 'nu' (..., K) de cónicas
+    con semilado recto 'p' y excentricidad 'e' (...) y ejes P, Q (..., 2, 3).
+    """
+    c, s = np.cos(nu), np.sin(nu)
+    r = p[..., None] / (1 + e[..., None] * c)
+    return (r * c)[..., None] * ejes[..., None, 0, :] + (r * s)[..., None] * ejes[..., None, 1, :]
+
+
+def _derivatives(p, e, ejes, nu):
+    """
+    Posición y sus dos primeras derivadas respecto a la anomalía verdadera,
+    cada una (C, 3), para C cónicas con semilado recto 'p', excentricidad 'e',
+    ejes P, Q (C, 2, 3) y anomalía 'nu' (C,).
+    """
+    c, s = np.cos(nu), np.sin(nu)
+    r = p / (1 + e * c)
+    dr = r * r * e * s / p
+    d2r = (2 * r * dr * e * s + r * r * e * c) / p
+    plano = np.stack([r * c, r * s], axis=-1)
+    d_plano = np.stack([dr * c - r * s, dr * s + r * c], axis=-1)
+    d2_plano = np.stack([d2r * c - 2 * dr * s - r * c, d2r * s + 2 * dr * c - r * s], axis=-1)
+    return tuple(np.einsum('ck,ckj->cj', v, ejes) for v in (plano, d_plano, d2_plano))
+
+
+def _mutual_nodes(ejes1, ejes2):
+    """
+    Anomalías verdaderas (B, 2) de los dos nodos mutuos, donde la órbita del
+    cuerpo corta el plano del planeta, en la órbita del cuerpo (nu1) y en la
+    del planeta (nu2, en la misma dirección desde el Sol). En órbitas
+    inclinadas la MOID está cerca de uno de ellos, aunque su cuenca sea
+    demasiado estrecha para la malla.
+    """
+    normal2 = np.cross(ejes2[0], ejes2[1])
+    nu1 = np.arctan2(-(ejes1[:, 0] @ normal2), ejes1[:, 1] @ normal2)[:, None] + np.array([0.0, np.pi])
+    direccion = np.cos(nu1)[..., None] * ejes1[:, None, 0, :] + np.sin(nu1)[..., None] * ejes1[:, None, 1, :]
+    nu2 = np.arctan2(direccion @ ejes2[1], direccion @ ejes2[0])
+    return np.remainder(nu1 + np.pi, 2 * np.pi) - np.pi, nu2
+
+
+def _speed(p, e, nu):
+    """
+    |d posición / d nu| para acotar cuánto se mueve un punto al variar nu.
+    """
+    c, s = np.cos(nu), np.sin(nu)
+    denominador = 1 + e * c
+    return p / denominador * np.sqrt(1 + (e * s / denominador) ** 2)
+
+
+def _moid_partition(a, e, i, om, w, q, planeta, tolerancia, malla, max_block_bytes):
+    """
+    MOID de una partición de cuerpos contra un planeta: búsqueda en una malla
+    (nu_cuerpo x nu_planeta) por bloques, y refinado vectorizado de todos sus
+    mínimos locales (hasta REFINED_MINIMA) y de los dos nodos mutuos con una
+    búsqueda por patrones y unas iteraciones de Newton (ver _refine).
+    """
+    n = len(a)
+    moid = np.full(n, np.nan)
+    p, q = _conic(a, e, q)
+    validos = np.isfinite(p) & np.isfinite(e) & (p > 0) & np.isfinite(i) & np.isfinite(om) & np.isfinite(w)
+    indices = np.nonzero(validos)[0]
+    if indices.size == 0:
+        return moid
+
+    p2 = np.float64(planeta['a'] * (1 - planeta['e'] ** 2))
+    e2 = np.float64(planeta['e'])
+    ejes2 = orbital_plane_axes(planeta['i'], planeta['om'], planeta['w'])[0]
+    afelio2 = planeta['a'] * (1 + planeta['e'])
+
+    n1, n2 = malla
+    t1 = np.linspace(-1, 1, n1, endpoint=False)
+    nu2_malla = np.linspace(-np.pi, np.pi, n2, endpoint=False)
+    puntos2 = _positions(p2[None], e2[None], ejes2[None], nu2_malla[None])[0]   # (K2, 3)
+    m = min(REFINED_MINIMA, n1 * n2)
+    block_size = max(1, max_block_bytes // (n1 * n2 * 8 * 6))
+
+    for inicio in range(0, indices.size, block_size):
+        idx = indices[inicio:inicio + block_size]
+        b = idx.size
+        p1, e1 = p[idx], e[idx]
+        ejes1 = orbital_plane_axes(i[idx], om[idx], w[idx])
+
+        # Rama útil de las hipérbolas: hasta r = 2 * max(afelio del planeta, q)
+        r_lim = 2 * np.maximum(afelio2, q[idx])
+        limite = np.where(e1 < 1, np.pi,
+                          np.arccos(np.clip((p1 / r_lim - 1) / np.maximum(e1, 1e-12), -1, 1)))
+        nu1_malla = limite[:, None] * t1[None, :]
+        puntos1 = _positions(p1, e1, ejes1, nu1_malla)                          # (B, K1, 3)
+
+        d2 = ((puntos1 ** 2).sum(axis=2)[:, :, None] + (puntos2 ** 2).sum(axis=1)[None, None, :]
+              - 2 * np.matmul(puntos1, puntos2.T))                               # (B, K1, K2)
+        # Mínimos locales en el toro de la malla; los demás puntos se penalizan
+        minimo = np.ones(d2.shape, dtype=bool)
+        for d1_, d2_ in _VECINOS.astype(int):
+            minimo &= d2 <= np.roll(d2, (d1_, d2_), axis=(1, 2))
+        puntuacion = np.where(minimo, d2, np.inf).reshape(b, -1)
+        mejores = np.argpartition(puntuacion, m - 1, axis=1)[:, :m]
+        # Se refinan todos los mínimos locales de cada cuerpo (el global siempre
+        # lo es) y, además, los dos nodos mutuos
+        es_minimo = np.isfinite(np.take_along_axis(puntuacion, mejores, axis=1))
+        k1, k2 = np.divmod(mejores[es_minimo], n2)
+        nodo1, nodo2 = _mutual_nodes(ejes1, ejes2)
+        fila = np.concatenate([np.nonzero(es_minimo)[0], np.repeat(np.arange(b), 2)])
+        u1 = np.concatenate([nu1_malla[np.nonzero(es_minimo)[0], k1],
+                             np.clip(nodo1, -limite[:, None], limite[:, None]).ravel()])
+        u2 = np.concatenate([nu2_malla[k2], nodo2.ravel()])
+        paso = 2 * limite[fila] / n1
+        d2_final = _refine(p1[fila], e1[fila], ejes1[fila], limite[fila], p2, e2, ejes2, u1, u2, paso,
+                           2 * np.pi / n2, tolerancia)
+        d2_cuerpo = np.full(b, np.inf)
+        np.minimum.at(d2_cuerpo, fila, d2_final)
+        moid[idx] = np.sqrt(np.maximum(d2_cuerpo, 0.0))
+    return moid
+
+
+def _refine(p1, e1, ejes1, limite1, p2, e2, ejes2, u1, u2, paso1, paso2, tolerancia):
+    """
+    Búsqueda por patrones vectorizada sobre C candidatos (u1, u2): en cada
+    vuelta se evalúan los 8 vecinos a distancia 'paso'; si alguno mejora, el
+    candidato se mueve, y si no, el paso se reduce a la mitad. Un candidato
+    termina cuando sus puntos se mueven menos de 'tolerancia' AU por paso.
+    Devuelve la distancia al cuadrado final de cada candidato.
+
+    Con órbitas casi tangentes (p. ej. parecidas a la de la Tierra) la
+    distancia forma un valle estrecho que no sigue ninguna de las 8
+    direcciones: la búsqueda reduce el paso hasta la anchura del valle y se
+    para lejos del mínimo. Por eso cada candidato se pule después con Newton
+    sobre el gradiente de la distancia, que no depende de la orientación
+    del valle.
+    """
+    c = u1.size
+    escala2 = paso2 / paso1
+    ejes2 = np.broadcast_to(ejes2, (1, 2, 3))
+    p2_, e2_ = np.atleast_1d(p2), np.atleast_1d(e2)
+
+    def distancia2(sel, v1, v2):
+        r1 = _positions(p1[sel], e1[sel], ejes1[sel], v1)
+        r2 = _positions(np.broadcast_to(p2_, (v2.shape[0],)), np.broadcast_to(e2_, (v2.shape[0],)),
+                        np.broadcast_to(ejes2, (v2.shape[0], 2, 3)), v2)
+        return ((r1 - r2) ** 2).sum(axis=-1)
+
+    todos = np.arange(c)
+    tolerancia_patron = max(tolerancia, PATTERN_TOLERANCE_AU)
+    d2 = distancia2(todos, u1[:, None], u2[:, None])[:, 0]
+    activos = todos
+    for _ in range(_MAX_ITER):
+        desplazamiento = paso1[activos] * np.maximum(
+            _speed(p1[activos], e1[activos], u1[activos]),
+            escala2[activos] * _speed(p2, e2, u2[activos]),
+        )
+        activos = activos[desplazamiento >= tolerancia_patron]
+        if activos.size == 0:
+            break
+        h1 = paso1[activos][:, None]
+        v1 = np.clip(u1[activos][:, None] + _VECINOS[None, :, 0] * h1, -limite1[activos][:, None],
+                     limite1[activos][:, None])
+        v2 = u2[activos][:, None] + _VECINOS[None, :, 1] * (escala2[activos][:, None] * h1)
+        vecinos = distancia2(activos, v1, v2)
+        mejor = np.argmin(vecinos, axis=1)
+        valor = vecinos[np.arange(activos.size), mejor]
+        mejora = valor < d2[activos]
+        mueve = activos[mejora]
+        u1[mueve] = v1[mejora, mejor[mejora]]
+        u2[mueve] = v2[mejora, mejor[mejora]]
+        d2[mueve] = valor[mejora]
+        paso1[activos[~mejora]] /= 2
+    return _newton(p1, e1, ejes1, limite1, p2_, e2_, ejes2[0], u1, u2, d2, distancia2, tolerancia)
+
+
+def _newton(p1, e1, ejes1, limite1, p2, e2, ejes2, u1, u2, d2, distancia2, tolerancia):
+    """
+    Iteraciones de Newton sobre (u1, u2) para anular el gradiente de la
+    distancia al cuadrado. Un paso solo se acepta si la Hessiana es definida
+    positiva y la distancia baja, así que nunca empeora el resultado de la
+    búsqueda por patrones. Devuelve la distancia al cuadrado final.
+    """
+    activos = np.arange(u1.size)
+    for _ in range(_NEWTON_ITER):
+        if activos.size == 0:
+            break
+        n = activos.size
+        r1, dr1, d2r1 = _derivatives(p1[activos], e1[activos], ejes1[activos], u1[activos])
+        r2, dr2, d2r2 = _derivatives(np.broadcast_to(p2, (n,)), np.broadcast_to(e2, (n,)),
+                                     np.broadcast_to(ejes2, (n, 2, 3)), u2[activos])
+        diferencia = r1 - r2
+        g1 = (diferencia * dr1).sum(axis=1)
+        g2 = -(diferencia * dr2).sum(axis=1)
+        h11 = (dr1 * dr1).sum(axis=1) + (diferencia * d2r1).sum(axis=1)
+        h22 = (dr2 * dr2).sum(axis=1) - (diferencia * d2r2).sum(axis=1)
+        h12 = -(dr1 * dr2).sum(axis=1)
+        det = h11 * h22 - h12 * h12
+        definida = (det > 0) & (h11 > 0)
+        det = np.where(definida, det, 1.0)
+        s1 = np.where(definida, -(h22 * g1 - h12 * g2) / det, 0.0)
+        s2 = np.where(definida, -(h11 * g2 - h12 * g1) / det, 0.0)
+        # Pasos acotados: Newton solo pule, no salta a otra cuenca
+        s1, s2 = np.clip(s1, -0.1, 0.1), np.clip(s2, -0.1, 0.1)
+        v1 = np.clip(u1[activos] + s1, -limite1[activos], limite1[activos])
+        v2 = u2[activos] + s2
+        nuevo = distancia2(activos, v1[:, None], v2[:, None])[:, 0]
+        acepta = definida & (nuevo < d2[activos])
+        mueve = activos[acepta]
+        u1[mueve], u2[mueve], d2[mueve] = v1[acepta], v2[acepta], nuevo[acepta]
+        desplazamiento = np.maximum(np.abs(s1) * np.sqrt((dr1 * dr1).sum(axis=1)),
+                                    np.abs(s2) * np.sqrt((dr2 * dr2).sum(axis=1)))
+        # Se sigue mientras el paso aceptado mueva los puntos más que una fracción de la tolerancia
+        activos = activos[acepta & (desplazamiento >= 1e-3 * tolerancia)]
+    return d2
+
+
+def _moid_rows(df, elementos_planeta, tolerancia, malla, max_block_bytes):
+    """Una partición de compute_moid: columnas a, e, i, om, w y q de 'df'."""
+    return _moid_partition(*(df[col].to_numpy(dtype=np.float64) for col in ELEMENT_COLUMNS + ['q']),
+                           elementos_planeta, tolerancia, malla, max_block_bytes)
+
+
+def compute_moid(a, e, i_deg, om_deg, w_deg, q=None, planeta="Earth", tolerancia=DEFAULT_MOID_TOLERANCE_AU,
+                 workers=1, malla=DEFAULT_GRID, max_block_bytes=DEFAULT_BLOCK_BYTES, ejecutor=None):
+    """
+    Distancia mínima entre órbitas (MOID, en AU) de N cuerpos contra un planeta
+    ('Earth' o cualquiera de PLANETS_DATA), calculada desde los elementos
+    orbitales. Funciona con elipses e hipérbolas; las filas con elementos
+    ausentes devuelven NaN.
+
+    'workers' reparte los cuerpos en procesos (None = todos los núcleos) que
+    leen los elementos de memoria compartida; 'ejecutor' reutiliza un
+    PartitionExecutor ya creado (ver modules/pipeline.py).
+    """
+    columnas = [np.atleast_1d(np.asarray(v, dtype=np.float64)) for v in (a, e, i_deg, om_deg, w_deg)]
+    n = columnas[0].size
+    q = np.full(n, np.nan) if q is None else np.atleast_1d(np.asarray(q, dtype=np.float64))
+    elementos = pd.DataFrame(dict(zip(ELEMENT_COLUMNS + ['q'], columnas + [q])))
+    argumentos = (planet_elements(planeta), tolerancia, malla, max_block_bytes)
+
+    propio = ejecutor is None
+    ejecutor = ejecutor or PartitionExecutor(workers)
+    try:
+        with ejecutor.share(elementos) as frame:
+            resultados = list(ejecutor.map(_moid_rows, frame, args=argumentos, min_rows=MIN_PARTITION_ROWS))
+    finally:
+        if propio:
+            ejecutor.close()
+    return np.concatenate(resultados) if resultados else np.empty(0)
+
+
+def moid_lower_bound(df, planeta="Earth"):
+    """
+    Cota inferior barata de la MOID: si una órbita queda por completo fuera (o
+    dentro) de la del planeta, la MOID no puede ser menor que la separación
+    entre el perihelio de una y el afelio de la otra.
+    """
+    el = planet_elements(planeta)
+    a, e = df['a'].to_numpy(dtype=np.float64), df['e'].to_numpy(dtype=np.float64)
+    q = np.abs(a) * np.abs(1 - e)
+    ad = np.where(e < 1, a * (1 + e), np.inf)
+    q_p, ad_p = el['a'] * (1 - el['e']), el['a'] * (1 + el['e'])
+    return np.maximum.reduce([q - ad_p, q_p - ad, np.zeros_like(q)])
+
+
+def compute_moid_catalog(df, planetas=("Earth",), tolerancia=DEFAULT_MOID_TOLERANCE_AU, workers=None, ejecutor=None):
+    """
+    Calcula la MOID de cada fila del catálogo contra cada planeta pedido.
+    Devuelve un DataFrame con una columna 'moid_<planeta>' por planeta (la de
+    la Tierra se llama 'moid') y el mismo índice que 'df'.
+    """
+    resultado = pd.DataFrame(index=df.index)
+    q = df['q'].to_numpy(dtype=np.float64) if 'q' in df.columns else None
+    for planeta in planetas:
+        inicio = time.perf_counter()
+        valores = compute_moid(*(df[col].to_numpy(dtype=np.float64) for col in ELEMENT_COLUMNS), q=q,
+                               planeta=planeta, tolerancia=tolerancia, workers=workers, ejecutor=ejecutor)
+        columna = 'moid' if planeta == "Earth" else f"moid_{planeta.lower()}"
+        resultado[columna] = valores
+        duracion = time.perf_counter() - inicio
+        print(f"🪐 MOID contra {planeta}: {len(df)} cuerpos en {duracion:.2f} s "
+              f"({len(df) / max(duracion, 1e-9):,.0f} cuerpos/s).")
+    return resultado
+
+
+def fill_missing_moid(df, tolerancia=DEFAULT_MOID_TOLERANCE_AU, workers=None, filas=None, ejecutor=None):
+    """
+    Rellena la columna 'moid' (contra la Tierra) de las filas en las que falta
+    o es incoherente con su perihelio/afelio (menor que la cota inferior), para
+    que no queden al final al ordenar por MOID. Añade 'moid_calculada' con las
+    filas rellenadas. Con 'filas' (máscara booleana) solo se revisan esas
+    filas y las demás conservan su 'moid_calculada'. Devuelve el DataFrame.
+    """
+    if df.empty or not set(ELEMENT_COLUMNS).issubset(df.columns):
+        print("⚠️ Faltan elementos orbitales; no se puede calcular la MOID.")
+        return df
+    if 'moid' not in df.columns:
+        df['moid'] = np.nan
+    moid = df['moid'].to_numpy(dtype=np.float64)
+    incoherente = moid < moid_lower_bound(df) - max(tolerancia, 1e-4)
+    pendientes = np.isnan(moid) | incoherente
+    pendientes &= df[ELEMENT_COLUMNS].notna().all(axis=1).to_numpy()
+    previas = False
+    if filas is not None:
+        pendientes &= filas
+        if 'moid_calculada' in df.columns:
+            previas = df['moid_calculada'].to_numpy(dtype=bool) & ~filas
+
+    df['moid_calculada'] = pendientes | previas
+    if not pendientes.any():
+        return df
+    print(f"Calculando la MOID de {pendientes.sum()} filas "
+          f"({np.isnan(moid).sum()} sin valor, {incoherente.sum()} incoherentes)...")
+    calculada = compute_moid_catalog(df[pendientes], tolerancia=tolerancia, workers=workers,
+                                     ejecutor=ejecutor)['moid']
+    df.loc[pendientes, 'moid'] = calculada.to_numpy().astype(df['moid'].dtype, copy=False)
+    return df
+
+
+if __name__ == "__main__":
+    from modules.catalog_cache import load_catalog_cached
+
+    parser = argparse.ArgumentParser(description="Calcula la MOID del catálogo contra la Tierra y otros planetas.")
+    parser.add_argument('--catalogo', default="jpl_catalog.csv", help="CSV del catálogo de JPL.")
+    parser.add_argument('--planetas', nargs='+', default=["Earth"], help="Planetas (nombres de PLANETS_DATA).")
+    parser.add_argument('--tolerancia', type=float, default=DEFAULT_MOID_TOLERANCE_AU, help="Error máximo en AU.")
+    parser.add_argument('--workers', type=int, default=None, help="Procesos (por defecto, todos los núcleos).")
+    parser.add_argument('--limite', type=int, default=0, help="Número máximo de filas (0 = todas).")
+    parser.add_argument('--salida', default="moid.csv", help="CSV de salida (spkid + una columna por planeta).")
+    args = parser.parse_args()
+
+    df = load_catalog_cached(args.catalogo)
+    if not df.empty:
+        if args.limite:
+            df = df.head(args.limite)
+        tabla = compute_moid_catalog(df, args.planetas, args.tolerancia, args.workers)
+        if 'moid' in tabla.columns and 'moid' in df.columns:
+            diferencia = (tabla['moid'] - df['moid']).abs()
+            print(f"📊 |MOID calculada - MOID del catálogo|: mediana {diferencia.median():.2e} AU, "
+                  f"p99 {diferencia.quantile(0.99):.2e} AU")
+        tabla.insert(0, 'spkid', df['spkid'].to_numpy())
+        tabla.to_csv(args.salida, index=False)
+        print(f"💾 MOID guardada en '{args.salida}'.")
@@ -0,0 +1,262 @@
+# modules/neows_ingest.py
+import json
+import time
+
+import numpy as np
+import pandas as pd
+
+from modules.propagator import JD_UNIX_EPOCH
+
+# Tamaño de cada lectura del archivo: la memoria del parser es este tamaño
+# más el del objeto más grande del feed, no el del feed completo.
+DEFAULT_CHUNK_CHARS = 1 << 20
+# Filas que se acumulan en listas de Python antes de pasarlas a columnas tipadas
+DEFAULT_BLOCK_ROWS = 10_000
+
+# Tabla normalizada: un acercamiento por fila. Las columnas comunes con el
+# cribado de modules/close_approach.py tienen el mismo nombre y unidad.
+CLOSE_APPROACH_DTYPES = {
+    'spkid': 'int64',
+    'name': 'object',
+    'fecha_feed': 'object',
+    'absolute_magnitude_h': 'float64',
+    'diameter_min_km': 'float64',
+    'diameter_max_km': 'float64',
+    'is_pha': 'bool',
+    'is_sentry': 'bool',
+    'close_approach_date': 'object',
+    'close_approach_date_full': 'object',
+    'epoch_date_close_approach': 'int64',
+    'jd': 'float64',
+    'miss_distance_au': 'float64',
+    'miss_distance_km': 'float64',
+    'relative_velocity_km_s': 'float64',
+    'orbiting_body': 'category',
+}
+# Un mismo acercamiento aparece en feeds que se solapan
+DEDUP_COLUMNS = ['spkid', 'epoch_date_close_approach', 'orbiting_body']
+
+
+class _StreamReader:
+    """
+    Lector incremental de JSON sobre un archivo abierto: mantiene en memoria
+    solo el trozo pendiente y decodifica valor a valor con raw_decode, leyendo
+    más cuando el valor no está completo en el buffer.
+    """
+
+    def __init__(self, f, chunk_chars=DEFAULT_CHUNK_CHARS):
+        self.f = f
+        self.chunk_chars = chunk_chars
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+        self._decoder = json.JSONDecoder()
+
+    def _fill(self):
+        """Lee otro trozo; descarta antes lo ya consumido del buffer."""
+        trozo = self.f.read(self.chunk_chars)
+        if not trozo:
+            self.eof = True
+            return False
+        self.buffer = self.buffer[self.pos:] + trozo
+        self.pos = 0
+        return True
+
+    def peek(self):
+        """Siguiente carácter que no es espacio (sin consumirlo), o '' al final."""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in " \t\r\n":
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._fill():
+                return ""
+
+    def expect(self, caracteres):
+        caracter = self.peek()
+        if caracter == "" or caracter not in caracteres:
+            raise ValueError(f"JSON inválido: se esperaba {caracteres!r} y hay {caracter!r} "
+                             f"(carácter {self.pos} del buffer)")
+        self.pos += 1
+        return caracter
+
+    def value(self):
+        """
+        Decodifica el siguiente valor completo. Solo se acepta si queda algo
+        detrás en el buffer (o se llegó al final del archivo), para no cortar
+        un número a medio leer.
+        """
+        self.peek()
+        while True:
+            try:
+                valor, fin = self._decoder.raw_decode(self.buffer, self.pos)
+                if fin < len(self.buffer) or self.eof:
+                    self.pos = fin
+                    return valor
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            if not self._fill():
+                valor, self.pos = self._decoder.raw_decode(self.buffer, self.pos)
+                return valor
+
+    def members(self):
+        """Recorre las claves de un objeto; el valor de cada una lo consume quien llama."""
+        self.expect("{")
+        if self.peek() == "}":
+            self.pos += 1
+            return
+        while True:
+            clave = self.value()
+            self.expect(":")
+            yield clave
+            if self.expect(",}") == "}":
+                return
+
+    def items(self):
+        """Recorre los elementos de un array, decodificando uno cada vez."""
+        self.expect("[")
+        if self.peek() == "]":
+            self.pos += 1
+            return
+        while True:
+            yield self.value()
+            if self.expect(",]") == "]":
+                return
+
+
+def iter_feed_objects(ruta, chunk_chars=DEFAULT_CHUNK_CHARS):
+    """
+    Produce pares (fecha, objeto) de 'near_earth_objects' de un feed de NeoWs
+    sin cargar el archivo entero: cada objeto se decodifica por separado y el
+    resto del feed (links, element_count) se salta.
+    """
+    with open(ruta, encoding='utf-8') as f:
+        lector = _StreamReader(f, chunk_chars)
+        for clave in lector.members():
+            if clave != 'near_earth_objects':
+                lector.value()
+                continue
+            for fecha in lector.members():
+                for objeto in lector.items():
+                    yield fecha, objeto
+
+
+def _float(valor):
+    return np.nan if valor is None else float(valor)
+
+
+def _approach_rows(fecha, objeto):
+    """Filas de la tabla normalizada de un objeto: una por acercamiento."""
+    diametro = objeto.get('estimated_diameter', {}).get('kilometers', {})
+    comunes = (
+        int(objeto['neo_reference_id']),
+        objeto.get('name'),
+        fecha,
+        _float(objeto.get('absolute_magnitude_h')),
+        _float(diametro.get('estimated_diameter_min')),
+        _float(diametro.get('estimated_diameter_max')),
+        bool(objeto.get('is_potentially_hazardous_asteroid')),
+        bool(objeto.get('is_sentry_object')),
+    )
+    for ca in objeto.get('close_approach_data', []):
+        epoch_ms = int(ca['epoch_date_close_approach'])
+        yield comunes + (
+            ca.get('close_approach_date'),
+            ca.get('close_approach_date_full'),
+            epoch_ms,
+            JD_UNIX_EPOCH + epoch_ms / 86400000.0,
+            _float(ca['miss_distance'].get('astronomical')),
+            _float(ca['miss_distance'].get('kilometers')),
+            _float(ca['relative_velocity'].get('kilometers_per_second')),
+            ca.get('orbiting_body'),
+        )
+
+
+def _to_columns(filas):
+    bloque = pd.DataFrame.from_records(filas, columns=list(CLOSE_APPROACH_DTYPES))
+    return bloque.astype({col: dtype for col, dtype in CLOSE_APPROACH_DTYPES.items() if dtype != 'category'})
+
+
+def _empty_table():
+    return pd.DataFrame({col: pd.Series(dtype=dtype) for col, dtype in CLOSE_APPROACH_DTYPES.items()})
+
+
+def ingest_neows_feeds(rutas, solo_tierra=False, block_rows=DEFAULT_BLOCK_ROWS, chunk_chars=DEFAULT_CHUNK_CHARS):
+    """
+    Lee uno o varios feeds de NeoWs (p. ej. varias semanas de 'feed') y los
+    aplana en una tabla tipada con un acercamiento por fila (ver
+    CLOSE_APPROACH_DTYPES). Cada feed se lee en streaming y las filas pasan a
+    columnas tipadas cada 'block_rows', así que la memoria crece con la tabla
+    resultante y no con el tamaño de los JSON. Los acercamientos repetidos
+    entre feeds solapados se quedan una sola vez.
+    """
+    if isinstance(rutas, str):
+        rutas = [rutas]
+    inicio = time.perf_counter()
+    bloques, filas, n_objetos = [], [], 0
+    for ruta in rutas:
+        for fecha, objeto in iter_feed_objects(ruta, chunk_chars):
+            n_objetos += 1
+            filas.extend(_approach_rows(fecha, objeto))
+            if len(filas) >= block_rows:
+                bloques.append(_to_columns(filas))
+                filas = []
+    if filas:
+        bloques.append(_to_columns(filas))
+
+    tabla = pd.concat(bloques, ignore_index=True) if bloques else _empty_table()
+    tabla['orbiting_body'] = tabla['orbiting_body'].astype('category')
+    if solo_tierra:
+        tabla = tabla[tabla['orbiting_body'] == 'Earth']
+    tabla = tabla.drop_duplicates(DEDUP_COLUMNS).sort_values(['jd', 'spkid'], ignore_index=True)
+
+    duracion = time.perf_counter() - inicio
+    print(f"🛰️ NeoWs: {n_objetos} objetos de {len(rutas)} feeds en {duracion:.2f} s "
+          f"({n_objetos / max(duracion, 1e-9):,.0f} objetos/s), {len(tabla)} acercamientos.")
+    return tabla
+
+
+def join_catalog(tabla, df_catalogo, columnas=('full_name', 'a', 'e', 'i', 'moid', 'diameter', 'H', 'pha')):
+    """
+    Añade a cada acercamiento las 'columnas' del catálogo de JPL con el mismo
+    SPK-ID, buscándolo en un índice hash (pd.Index) en vez de con un merge.
+    'en_catalogo' indica si se encontró; si no, las columnas quedan vacías.
+    """
+    columnas = [col for col in columnas if col in df_catalogo.columns and col != 'spkid']
+    catalogo = df_catalogo.drop_duplicates('spkid')
+    indice = pd.Index(catalogo['spkid'].to_numpy(dtype=np.int64))
+    posiciones = indice.get_indexer(tabla['spkid'].to_numpy(dtype=np.int64))
+    encontrado = posiciones >= 0
+
+    resultado = tabla.copy()
+    resultado['en_catalogo'] = encontrado
+    for col in columnas:
+        valores = catalogo[col].iloc[np.where(encontrado, posiciones, 0)].reset_index(drop=True)
+        resultado[f"jpl_{col}"] = valores.where(encontrado)
+    print(f"🔗 {encontrado.sum()} de {len(tabla)} acercamientos cruzados con el catálogo de JPL.")
+    return resultado
+
+
+if __name__ == "__main__":
+    # python3 -m modules.neows_ingest neows_data_7dpppp.json [más feeds...] [--catalogo jpl_catalog.csv]
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Normaliza feeds de NeoWs en una tabla de acercamientos.")
+    parser.add_argument('feeds', nargs='+', help="Archivos JSON del endpoint 'feed' de NeoWs.")
+    parser.add_argument('--catalogo', help="CSV del catálogo de JPL con el que cruzar por SPK-ID.")
+    parser.add_argument('--solo-tierra', action='store_true', help="Solo acercamientos a la Tierra.")
+    parser.add_argument('--salida', help="Guarda la tabla en este CSV.")
+    args = parser.parse_args()
+
+    tabla = ingest_neows_feeds(args.feeds, solo_tierra=args.solo_tierra)
+    if args.catalogo:
+        from modules.catalog_cache import load_catalog_cached
+
+        tabla = join_catalog(tabla, load_catalog_cached(args.catalogo))
+    if args.salida:
+        tabla.to_csv(args.salida, index=False)
+        print(f"💾 Tabla guardada en '{args.salida}'.")
+    else:
+        with pd.option_context('display.width', 160, 'display.max_columns', 10):
+            print(tabla.head(10))
@@ -0,0 +1,178 @@
+# modules/orbit_export.py
+import json
+import os
+import shutil
+
+import numpy as np
+
+# Versión del formato binario de órbitas (índice JSON + blob little-endian)
+ORBIT_BINARY_VERSION = 1
+INT16_MAX = 32767
+
+
+def write_orbit_binary(bloques, ruta_base="orbitas_3d", cuantizar=False):
+    """
+    Escribe las órbitas en formato binario compacto para el navegador:
+
+    - '<ruta_base>.bin': todos los puntos seguidos como x, y, z little-endian,
+      en Float32 o, si 'cuantizar' es True, en Int16 con una escala por órbita.
+    - '<ruta_base>.index.json': nombres, offset (en puntos) y número de puntos de
+      cada órbita, más las escalas si se cuantizó.
+
+    'bloques' es un iterable de pares (nombres, órbitas), donde 'órbitas' es un
+    array (B, K, 3) o una lista de arrays (K_j, 3). Los bloques se escriben a
+    medida que llegan, sin juntarlos en memoria.
+
+    En JavaScript basta con: new Float32Array(buffer, offset * 12, puntos * 3)
+    (o Int16Array y multiplicar por la escala).
+    """
+    tipo = np.dtype('<i2') if cuantizar else np.dtype('<f4')
+    ruta_datos = f"{ruta_base}.bin"
+    indice = {
+        'version': ORBIT_BINARY_VERSION,
+        'formato': 'int16' if cuantizar else 'float32',
+        'endian': 'little',
+        'componentes': 3,
+        'datos': os.path.basename(ruta_datos),
+        'nombres': [],
+        'offsets': [],
+        'puntos': [],
+    }
+    if cuantizar:
+        indice['escalas'] = []
+
+    offset = 0
+    with open(ruta_datos, 'wb') as f:
+        for nombres, orbitas in bloques:
+            if isinstance(orbitas, np.ndarray) and orbitas.ndim == 3:
+                # Bloque rectangular: se convierte y se escribe de una vez
+                puntos = [orbitas.shape[1]] * orbitas.shape[0]
+                datos, escalas = _encode_block(orbitas, cuantizar)
+                f.write(datos.astype(tipo, copy=False).tobytes())
+            else:
+                puntos, escalas = [], []
+                for orbita in orbitas:
+                    orbita = np.asarray(orbita)
+                    datos, escala = _encode_block(orbita[None], cuantizar)
+                    f.write(datos.astype(tipo, copy=False).tobytes())
+                    puntos.append(len(orbita))
+                    escalas.extend(escala)
+
+            indice['nombres'].extend(str(nombre) for nombre in nombres)
+            for n in puntos:
+                indice['offsets'].append(offset)
+                indice['puntos'].append(n)
+                offset += n
+            if cuantizar:
+                indice['escalas'].extend(float(s) for s in escalas)
+
+    indice['total_puntos'] = offset
+    ruta_indice = f"{ruta_base}.index.json"
+    with open(ruta_indice, 'w') as f:
+        json.dump(indice, f, separators=(',', ':'))
+    return ruta_indice
+
+
+def merge_orbit_binaries(indices, ruta_base="orbitas_3d"):
+    """
+    Une varios exports binarios del mismo formato (p. ej. los que escribe
+    cada proceso con su partición de órbitas) en uno solo, en el orden de
+    'indices': concatena los '.bin' y desplaza los offsets. Las partes se
+    borran al terminar. Devuelve la ruta del índice resultante.
+    """
+    indice, total = None, 0
+    ruta_datos = f"{ruta_base}.bin"
+    with open(ruta_datos, 'wb') as f:
+        for ruta_indice in indices:
+            with open(ruta_indice) as g:
+                parte = json.load(g)
+            if indice is None:
+                indice = dict(parte, datos=os.path.basename(ruta_datos), nombres=[], offsets=[], puntos=[])
+                if 'escalas' in parte:
+                    indice['escalas'] = []
+            elif parte['formato'] != indice['formato']:
+                raise ValueError(f"No se pueden unir exports {indice['formato']} y {parte['formato']}")
+            indice['nombres'].extend(parte['nombres'])
+            indice['offsets'].extend(offset + total for offset in parte['offsets'])
+            indice['puntos'].extend(parte['puntos'])
+            if 'escalas' in indice:
+                indice['escalas'].extend(parte['escalas'])
+            total += parte['total_puntos']
+            ruta_parte = os.path.join(os.path.dirname(ruta_indice), parte['datos'])
+            with open(ruta_parte, 'rb') as g:
+                shutil.copyfileobj(g, f)
+            os.remove(ruta_parte)
+            os.remove(ruta_indice)
+
+    indice['total_puntos'] = total
+    ruta_indice = f"{ruta_base}.index.json"
+    with open(ruta_indice, 'w') as f:
+        json.dump(indice, f, separators=(',', ':'))
+    return ruta_indice
+
+
+def _encode_block(orbitas, cuantizar):
+    """
+    Devuelve los datos del bloque (B, K, 3) listos para escribir y la escala
+    de cada órbita (vacía si no se cuantiza). Las órbitas sin puntos (K = 0,
+    las abiertas del muestreo adaptativo) llevan escala 1.
+    """
+    if not cuantizar:
+        return orbitas, []
+    maximos = np.abs(orbitas).reshape(len(orbitas), -1).max(axis=1, initial=0.0)
+    escalas = np.where(maximos > 0, maximos / INT16_MAX, 1.0)
+    datos = np.rint(orbitas / escalas[:, None, None])
+    return datos, escalas.tolist()
+
+
+def read_orbit_binary(ruta_indice):
+    """
+    Lee un export binario de órbitas. Devuelve el índice (dict) y un array
+    (total_puntos, 3) en float32 con todos los puntos; la órbita j son las filas
+    offsets[j] .. offsets[j] + puntos[j].
+    """
+    with open(ruta_indice) as f:
+        indice = json.load(f)
+    ruta_datos = os.path.join(os.path.dirname(ruta_indice), indice['datos'])
+
+    if indice['formato'] == 'int16':
+        datos = np.fromfile(ruta_datos, dtype='<i2').reshape(-1, 3).astype(np.float32)
+        escalas = np.repeat(np.asarray(indice['escalas'], dtype=np.float32), indice['puntos'])
+        datos *= escalas[:, None]
+    else:
+        datos = np.fromfile(ruta_datos, dtype='<f4').reshape(-1, 3)
+    return indice, datos
+
+
+def patch_orbit_binary(ruta_indice, nombres, orbitas):
+    """
+    Sobrescribe en su sitio, dentro de un export binario ya escrito, las
+    órbitas de 'nombres' ('orbitas' es un array (B, K, 3) o una lista de
+    arrays (K_j, 3)). Solo se puede cuando la órbita conserva su número de
+    puntos; devuelve los nombres que no se pudieron parchear (no están en el
+    índice o cambió su número de puntos), que obligan a regenerar el archivo.
+    """
+    with open(ruta_indice) as f:
+        indice = json.load(f)
+    cuantizar = indice['formato'] == 'int16'
+    tipo = np.dtype('<i2') if cuantizar else np.dtype('<f4')
+    posicion = {nombre: j for j, nombre in enumerate(indice['nombres'])}
+    ruta_datos = os.path.join(os.path.dirname(ruta_indice), indice['datos'])
+
+    pendientes = []
+    with open(ruta_datos, 'r+b') as f:
+        for nombre, orbita in zip(nombres, orbitas):
+            j = posicion.get(str(nombre))
+            orbita = np.asarray(orbita)
+            if j is None or indice['puntos'][j] != len(orbita):
+                pendientes.append(nombre)
+                continue
+            datos, escalas = _encode_block(orbita[None], cuantizar)
+            f.seek(indice['offsets'][j] * 3 * tipo.itemsize)
+            f.write(datos.astype(tipo, copy=False).tobytes())
+            if cuantizar:
+                indice['escalas'][j] = float(escalas[0])
+    if cuantizar:
+        with open(ruta_indice, 'w') as f:
+            json.dump(indice, f, separators=(',', ':'))
+    return pendientes
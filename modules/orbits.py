@@ -0,0 +1,285 @@
+# modules/orbits.py
+import numpy as np
+
+# Memoria máxima (aprox.) que ocupa cada bloque de órbitas en modo por bloques
+DEFAULT_BLOCK_BYTES = 64 * 1024 * 1024
+
+# Muestreo adaptativo: error de cuerda máximo por defecto (AU) y límites de puntos
+DEFAULT_TOLERANCE_AU = 1e-3
+MIN_ADAPTIVE_POINTS = 16
+MAX_ADAPTIVE_POINTS = 4096
+
+
+def anomaly_table(n_puntos=360):
+    """
+    Tabla compartida de anomalías verdaderas: devuelve (cos(theta), sin(theta))
+    para 'n_puntos' valores entre 0 y 2*pi. Se calcula una sola vez por lote.
+    """
+    theta = np.linspace(0, 2 * np.pi, n_puntos)
+    return np.cos(theta), np.sin(theta)
+
+
+def _as_radians(valores_deg, n):
+    """
+    Convierte ángulos en grados a radianes; los valores ausentes (NaN/None) se
+    tratan como 0, igual que hacían los generadores originales.
+    """
+    if valores_deg is None:
+        return np.zeros(n)
+    valores = np.broadcast_to(np.asarray(valores_deg, dtype=np.float64), (n,))
+    return np.radians(np.nan_to_num(valores, nan=0.0))
+
+
+def orbital_plane_axes(i_deg, om_deg, w_deg):
+    """
+    Construye, una vez por cuerpo, los vectores P y Q que llevan el plano de la
+    órbita al sistema eclíptico (las dos primeras columnas de la matriz de
+    rotación Rz(om) Rx(i) Rz(w)). Devuelve un array (N, 2, 3).
+    """
+    n = np.size(i_deg) if i_deg is not None else np.size(om_deg)
+    i = _as_radians(i_deg, n)
+    om = _as_radians(om_deg, n)
+    w = _as_radians(w_deg, n)
+
+    cos_w, sin_w = np.cos(w), np.sin(w)
+    cos_om, sin_om = np.cos(om), np.sin(om)
+    cos_i, sin_i = np.cos(i), np.sin(i)
+
+    ejes = np.empty((n, 2, 3))
+    ejes[:, 0, 0] = cos_w * cos_om - sin_w * cos_i * sin_om
+    ejes[:, 0, 1] = cos_w * sin_om + sin_w * cos_i * cos_om
+    ejes[:, 0, 2] = sin_w * sin_i
+    ejes[:, 1, 0] = -(sin_w * cos_om + cos_w * cos_i * sin_om)
+    ejes[:, 1, 1] = cos_w * cos_i * cos_om - sin_w * sin_om
+    ejes[:, 1, 2] = cos_w * sin_i
+    return ejes
+
+
+def generate_orbits_3d(a, e, i_deg, om_deg, w_deg, n_puntos=360, dtype=np.float32):
+    """
+    Calcula las órbitas 3D de N cuerpos en una sola pasada vectorizada.
+
+    Recibe arrays (o escalares) de elementos orbitales y devuelve un array
+    (N, n_puntos, 3) con las coordenadas x, y, z en AU.
+    """
+    a = np.atleast_1d(np.asarray(a, dtype=np.float64))
+    e = np.broadcast_to(np.asarray(e, dtype=np.float64), a.shape)
+    cos_t, sin_t = anomaly_table(n_puntos)
+
+    # Radio en el plano orbital para cada cuerpo y cada anomalía: (N, K)
+    r = (a * (1 - e ** 2))[:, None] / (1 + e[:, None] * cos_t)
+    x_plano = r * cos_t
+    y_plano = r * sin_t
+
+    return _rotate_to_ecliptic(x_plano, y_plano, orbital_plane_axes(i_deg, om_deg, w_deg), dtype)
+
+
+def _rotate_to_ecliptic(x_plano, y_plano, ejes, dtype):
+    """
+    Pasa coordenadas del plano orbital (N, K) al sistema eclíptico con los ejes
+    (N, 2, 3) de cada cuerpo. Devuelve un array (N, K, 3).
+    """
+    orbitas = np.empty(x_plano.shape + (3,), dtype=dtype)
+    for k in range(3):
+        orbitas[:, :, k] = x_plano * ejes[:, None, 0, k] + y_plano * ejes[:, None, 1, k]
+    return orbitas
+
+
+def generate_orbits_2d(a, e, w_deg, n_puntos=360, dtype=np.float32):
+    """
+    Versión 2D (plano de la eclíptica, sin inclinación ni nodo) del generador
+    por lotes. Devuelve un array (N, n_puntos, 2).
+    """
+    a = np.atleast_1d(np.asarray(a, dtype=np.float64))
+    orbitas = generate_orbits_3d(a, e, np.zeros(a.size), np.zeros(a.size), w_deg, n_puntos, dtype)
+    return orbitas[:, :, :2]
+
+
+def _quarter_density(beta, E):
+    """
+    Densidad de puntos (por radián de anomalía excéntrica) que deja el mismo
+    error de cuerda en toda la elipse, para una elipse de semieje 1 y razón de
+    semiejes beta = b/a. La sagita de un tramo dE es
+    a*b*dE^2 / (8*sqrt(a^2 sin^2 E + b^2 cos^2 E)), así que para una tolerancia
+    fija el paso debe crecer con la raíz de ese denominador.
+    """
+    g = np.sqrt(np.sin(E) ** 2 + (beta[:, None] * np.cos(E)) ** 2)
+    return np.sqrt(beta[:, None] / g)
+
+
+def _build_sampling_tables():
+    """
+    La forma de la densidad solo depende de beta = sqrt(1 - e^2) y es simétrica
+    en los cuatro cuadrantes, así que se tabula una vez para un cuarto de elipse:
+    la integral (para contar puntos) y la inversa de la función acumulada (para
+    repartirlos). Devuelve (log_betas, integrales, inversas).
+    """
+    log_betas = np.linspace(np.log(_MIN_BETA), 0.0, _BETA_NODES)
+    betas = np.exp(log_betas)
+    E = np.linspace(0, np.pi / 2, _DENSITY_NODES + 1)
+    densidad = _quarter_density(betas, E)
+    tramos = (densidad[:, 1:] + densidad[:, :-1]) / 2 * (E[1] - E[0])
+    acumulada = np.concatenate([np.zeros((len(betas), 1)), np.cumsum(tramos, axis=1)], axis=1)
+    integrales = 4 * acumulada[:, -1]
+    u = np.linspace(0, 1, _INVERSE_NODES)
+    inversas = np.array([np.interp(u, fila / fila[-1], E) for fila in acumulada])
+    return log_betas, integrales, inversas
+
+
+# Resolución de las tablas de muestreo adaptativo (se construyen al primer uso)
+_MIN_BETA = 1e-3
+_TOLERANCE_MARGIN = 0.75
+_BETA_NODES = 160
+_DENSITY_NODES = 4096
+_INVERSE_NODES = 2049
+_sampling_tables = None
+
+
+def _tables():
+    global _sampling_tables
+    if _sampling_tables is None:
+        _sampling_tables = _build_sampling_tables()
+    return _sampling_tables
+
+
+def _beta_position(e):
+    """
+    Fila (índice entero y peso) de la tabla para cada excentricidad.
+    """
+    log_betas = _tables()[0]
+    log_beta = np.log(np.clip(np.sqrt(1 - e ** 2), _MIN_BETA, 1.0))
+    pos = (log_beta - log_betas[0]) / (log_betas[1] - log_betas[0])
+    fila = np.clip(np.floor(pos).astype(np.int64), 0, len(log_betas) - 2)
+    return fila, np.clip(pos - fila, 0.0, 1.0)
+
+
+def adaptive_point_count(a, e, tolerancia=DEFAULT_TOLERANCE_AU, min_puntos=MIN_ADAPTIVE_POINTS,
+                         max_puntos=MAX_ADAPTIVE_POINTS):
+    """
+    Número de puntos que necesita cada órbita para que ninguna cuerda se separe
+    de la elipse más de 'tolerancia' (en las mismas unidades que 'a').
+    """
+    a = np.atleast_1d(np.asarray(a, dtype=np.float64))
+    e = np.broadcast_to(np.asarray(e, dtype=np.float64), a.shape)
+    fila, peso = _beta_position(e)
+    integrales = _tables()[1]
+    integral = (1 - peso) * integrales[fila] + peso * integrales[fila + 1]
+    # La sagita es una aproximación de segundo orden; el margen cubre los tramos
+    # largos del afelio en órbitas muy excéntricas
+    n = np.ceil(np.sqrt(a) * integral / np.sqrt(8 * _TOLERANCE_MARGIN * tolerancia)).astype(np.int64) + 1
+    return np.clip(n, min_puntos, max_puntos)
+
+
+def _adaptive_anomalies(e, n_puntos):
+    """
+    Reparte 'n_puntos' anomalías excéntricas (de 0 a 2*pi, incluido) para cada
+    cuerpo con la inversa tabulada de la densidad. Devuelve (N, n_puntos).
+    """
+    inversas = _tables()[2]
+    # Posición de cada punto en su cuadrante; los cuadrantes impares van al revés
+    u = np.linspace(0, 4, n_puntos)
+    cuadrante = np.minimum(np.floor(u), 3).astype(np.int64)
+    u_local = u - cuadrante
+    impar = cuadrante % 2 == 1
+    u_local[impar] = 1 - u_local[impar]
+
+    pos = u_local * (inversas.shape[1] - 1)
+    col = np.minimum(np.floor(pos).astype(np.int64), inversas.shape[1] - 2)
+    t = pos - col
+
+    # Primero se interpola la tabla en las columnas de este número de puntos
+    # (pequeña: filas de beta x n_puntos) y después entre filas de beta
+    tabla = (1 - t) * inversas[:, col] + t * inversas[:, col + 1]
+    fila, peso = _beta_position(e)
+    E_cuarto = (1 - peso)[:, None] * tabla[fila] + peso[:, None] * tabla[fila + 1]
+
+    base = np.where(impar, (cuadrante + 1) * np.pi / 2, cuadrante * np.pi / 2)
+    return base + np.where(impar, -E_cuarto, E_cuarto)
+
+
+def generate_orbits_adaptive(a, e, i_deg, om_deg, w_deg, tolerancia=DEFAULT_TOLERANCE_AU,
+                             min_puntos=MIN_ADAPTIVE_POINTS, max_puntos=MAX_ADAPTIVE_POINTS, dtype=np.float32):
+    """
+    Calcula las órbitas 3D con un número de puntos y un espaciado adaptados a
+    cada una: se muestrea en anomalía excéntrica con la densidad justa para que
+    el error de cuerda no pase de 'tolerancia' (AU). Las órbitas casi circulares
+    y pequeñas se quedan con pocos puntos; las muy excéntricas concentran los
+    puntos en el perihelio.
+
+    Devuelve una lista de N arrays (K_j, 3). Las órbitas abiertas (e >= 1) o
+    sin semieje válido no son elipses y se devuelven vacías.
+    """
+    a = np.atleast_1d(np.asarray(a, dtype=np.float64))
+    n = a.size
+    e = np.broadcast_to(np.asarray(e, dtype=np.float64), (n,))
+    ejes = orbital_plane_axes(
+        *(np.broadcast_to(np.asarray(v, dtype=np.float64), (n,)) for v in (i_deg, om_deg, w_deg))
+    )
+
+    orbitas = [np.empty((0, 3), dtype=dtype)] * n
+    cerradas = np.flatnonzero((e >= 0) & (e < 1) & (a > 0))
+    puntos = adaptive_point_count(a[cerradas], e[cerradas], tolerancia, min_puntos, max_puntos)
+
+    # Las órbitas con el mismo número de puntos se calculan juntas en un lote
+    for k in np.unique(puntos):
+        grupo = cerradas[puntos == k]
+        a_g, e_g = a[grupo], e[grupo]
+        E = _adaptive_anomalies(e_g, k)
+        x_plano = a_g[:, None] * (np.cos(E) - e_g[:, None])
+        y_plano = (a_g * np.sqrt(1 - e_g ** 2))[:, None] * np.sin(E)
+        for idx, orbita in zip(grupo, _rotate_to_ecliptic(x_plano, y_plano, ejes[grupo], dtype)):
+            orbitas[idx] = orbita
+    return orbitas
+
+
+def iter_orbit_blocks(a, e, i_deg, om_deg, w_deg, n_puntos=360, block_size=None,
+                      max_block_bytes=DEFAULT_BLOCK_BYTES, dtype=np.float32, tolerancia=None):
+    """
+    Genera las órbitas por bloques para acotar la memoria: produce tuplas
+    (inicio, bloque) donde 'bloque' es un array (B, n_puntos, 3) con las órbitas
+    de los cuerpos inicio..inicio+B. Si no se indica 'block_size', se elige
+    para que los temporales de cada bloque no pasen de 'max_block_bytes'.
+
+    Con 'tolerancia' (AU) se usa el muestreo adaptativo y cada bloque es una
+    lista de arrays (K_j, 3).
+    """
+    a = np.asarray(a, dtype=np.float64)
+    n = a.size
+    if block_size is None:
+        # r, x_plano e y_plano en float64 más la salida
+        puntos = MAX_ADAPTIVE_POINTS if tolerancia is not None else n_puntos
+        bytes_por_cuerpo = puntos * (3 * 8 + 3 * np.dtype(dtype).itemsize)
+        block_size = max(1, max_block_bytes // bytes_por_cuerpo)
+
+    elementos = [np.broadcast_to(np.asarray(v, dtype=np.float64), (n,)) for v in (e, i_deg, om_deg, w_deg)]
+    for inicio in range(0, n, block_size):
+        fin = min(inicio + block_size, n)
+        e_b, i_b, om_b, w_b = (v[inicio:fin] for v in elementos)
+        if tolerancia is not None:
+            yield inicio, generate_orbits_adaptive(a[inicio:fin], e_b, i_b, om_b, w_b, tolerancia, dtype=dtype)
+        else:
+            yield inicio, generate_orbits_3d(a[inicio:fin], e_b, i_b, om_b, w_b, n_puntos, dtype)
+
+
+def add_sampling_arguments(parser):
+    """
+    Añade a un argparse las opciones del muestreo adaptativo, compartidas por
+    los scripts de órbitas 2D y 3D.
+    """
+    parser.add_argument('--tolerancia', type=float, default=None,
+                        help="Error de cuerda máximo por órbita (AU, o píxeles con --px-por-au). "
+                             "Activa el muestreo adaptativo en lugar de 360 puntos fijos.")
+    parser.add_argument('--px-por-au', type=float, default=None,
+                        help="Escala de la vista; con ella --tolerancia se interpreta en píxeles.")
+
+
+def tolerance_from_args(args):
+    """
+    Tolerancia en AU a partir de las opciones de add_sampling_arguments
+    (None si no se pidió muestreo adaptativo).
+    """
+    if args.tolerancia is None:
+        return None
+    if args.px_por_au:
+        return args.tolerancia / args.px_por_au
+    return args.tolerancia
@@ -0,0 +1,243 @@
+# modules/pipeline.py
+import os
+import time
+from collections import deque
+from contextlib import nullcontext
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+# Por debajo de estas filas por partición, arrancar el trabajo en otro
+# proceso cuesta más de lo que ahorra
+MIN_PARTITION_ROWS = 2_000
+# Varias particiones por proceso reparten mejor las filas más costosas
+PARTITIONS_PER_WORKER = 4
+
+
+def resolve_workers(workers=None):
+    """Procesos a usar: 'workers' o, si es None/0, todos los núcleos."""
+    return max(1, workers or os.cpu_count() or 1)
+
+
+class SharedFrame:
+    """
+    Columnas de un DataFrame copiadas una sola vez a memoria compartida, para
+    que los procesos del pool lean sus filas sin recibirlas serializadas.
+    Cada partición solo viaja como la lista de sus posiciones.
+
+    Como en la caché binaria (modules/catalog_cache.py), las columnas
+    numéricas se guardan tal cual, las categóricas como códigos y las de texto
+    como un blob UTF-8 con offsets y máscara de nulos.
+
+    Con compartir=False (un solo proceso) no se reserva memoria compartida y
+    las particiones se toman directamente de 'df'.
+    """
+
+    def __init__(self, df, columnas=None, compartir=True):
+        self.df = df if columnas is None else df[list(columnas)]
+        self.spec = None
+        self._memorias = []
+        if compartir:
+            self.spec = {col: self._compartir_columna(self.df[col]) for col in self.df.columns}
+
+    def _compartir_columna(self, serie):
+        if isinstance(serie.dtype, pd.CategoricalDtype):
+            meta = {'kind': 'category', 'categories': list(serie.cat.categories)}
+            arrays = {'codigos': serie.cat.codes.to_numpy()}
+        elif pd.api.types.is_numeric_dtype(serie.dtype) and serie.to_numpy().dtype != object:
+            meta = {'kind': 'numeric'}
+            arrays = {'valores': serie.to_numpy()}
+        else:
+            nulos = serie.isna().to_numpy()
+            codificados = [texto.encode('utf-8') for texto in serie.fillna('').astype(str)]
+            offsets = np.zeros(len(codificados) + 1, dtype=np.int64)
+            np.cumsum([len(texto) for texto in codificados], out=offsets[1:])
+            meta = {'kind': 'text', 'dtype': str(serie.dtype)}
+            arrays = {'blob': np.frombuffer(b"".join(codificados), dtype=np.uint8), 'offsets': offsets,
+                      'nulos': nulos}
+        meta['arrays'] = {clave: self._compartir(array) for clave, array in arrays.items()}
+        return meta
+
+    def _compartir(self, array):
+        array = np.ascontiguousarray(array)
+        memoria = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+        self._memorias.append(memoria)
+        np.ndarray(array.shape, array.dtype, buffer=memoria.buf)[...] = array
+        return memoria.name, array.dtype.str, array.shape
+
+    def refresh(self, columna):
+        """
+        Vuelve a copiar a la memoria compartida una columna numérica que se
+        modificó en 'df' (p. ej. la MOID rellenada) sin rehacer las demás.
+        """
+        if self.spec is None:
+            return
+        nombre, dtype, shape = self.spec[columna]['arrays']['valores']
+        memoria = next(m for m in self._memorias if m.name == nombre)
+        np.ndarray(shape, np.dtype(dtype), buffer=memoria.buf)[...] = self.df[columna].to_numpy()
+
+    def close(self):
+        for memoria in self._memorias:
+            memoria.close()
+            memoria.unlink()
+        self._memorias = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def read_rows(spec, filas):
+    """
+    Reconstruye (en el proceso que lo llama) un DataFrame con las filas
+    'filas' (posiciones) de un SharedFrame a partir de su 'spec'. Las filas
+    se copian, así que la memoria compartida se puede cerrar al volver.
+    """
+    filas = np.asarray(filas, dtype=np.int64)
+    memorias = []
+    columnas = {}
+
+    def vista(referencia):
+        nombre, dtype, shape = referencia
+        memoria = shared_memory.SharedMemory(name=nombre)
+        memorias.append(memoria)
+        return np.ndarray(shape, np.dtype(dtype), buffer=memoria.buf)
+
+    try:
+        for col, meta in spec.items():
+            arrays = meta['arrays']
+            if meta['kind'] == 'numeric':
+                columnas[col] = vista(arrays['valores'])[filas]
+            elif meta['kind'] == 'category':
+                columnas[col] = pd.Categorical.from_codes(vista(arrays['codigos'])[filas], meta['categories'])
+            else:
+                blob, offsets = vista(arrays['blob']), vista(arrays['offsets'])
+                valores = np.array([blob[offsets[k]:offsets[k + 1]].tobytes().decode('utf-8') for k in filas],
+                                   dtype=object)
+                valores[vista(arrays['nulos'])[filas]] = None
+                columnas[col] = valores if meta['dtype'] == 'object' else pd.array(valores, dtype=meta['dtype'])
+        # La indexación por posiciones ya copia: no queda ninguna vista a la memoria compartida
+        return pd.DataFrame(columnas)
+    finally:
+        for memoria in memorias:
+            memoria.close()
+
+
+def _run_partition(funcion, spec, filas, args):
+    return funcion(read_rows(spec, filas), *args)
+
+
+class PartitionExecutor:
+    """
+    Reparte trabajo por particiones de filas en un ProcessPoolExecutor que se
+    crea una sola vez y se reutiliza entre etapas. Con un solo proceso todo
+    corre en el proceso actual, sin memoria compartida ni pool.
+    """
+
+    def __init__(self, workers=None, min_rows=MIN_PARTITION_ROWS):
+        self.workers = resolve_workers(workers)
+        self.min_rows = min_rows
+        self._pool = None
+
+    @property
+    def paralelo(self):
+        return self.workers > 1
+
+    def share(self, df, columnas=None):
+        """SharedFrame de 'df' (en memoria compartida solo si hay varios procesos)."""
+        return SharedFrame(df, columnas, compartir=self.paralelo)
+
+    def partitions(self, n, min_rows=None):
+        """Límites [inicio, fin) de las particiones de n filas."""
+        min_rows = self.min_rows if min_rows is None else min_rows
+        partes = max(1, min(self.workers * PARTITIONS_PER_WORKER, n // max(min_rows, 1)))
+        limites = np.linspace(0, n, partes + 1).astype(np.int64)
+        return [(int(inicio), int(fin)) for inicio, fin in zip(limites[:-1], limites[1:]) if fin > inicio]
+
+    def map(self, funcion, frame, filas=None, args=(), min_rows=None):
+        """
+        Aplica funcion(df_particion, *args) a cada partición de las filas
+        'filas' (posiciones en el frame; por defecto todas, en orden) y
+        produce los resultados en el orden de las particiones, a medida que
+        están listos. 'funcion' debe ser de nivel de módulo para poder
+        enviarla a otro proceso.
+        """
+        filas = np.arange(len(frame.df)) if filas is None else np.asarray(filas, dtype=np.int64)
+        partes = self.partitions(len(filas), min_rows)
+        if not self.paralelo or frame.spec is None or len(partes) <= 1:
+            for inicio, fin in partes:
+                yield funcion(frame.df.iloc[filas[inicio:fin]], *args)
+            return
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers)
+        # Solo unas pocas particiones en vuelo: los resultados que esperan a
+        # ser consumidos en orden no se acumulan en memoria
+        pendientes = deque()
+        try:
+            for inicio, fin in partes:
+                pendientes.append(self._pool.submit(_run_partition, funcion, frame.spec, filas[inicio:fin], args))
+                if len(pendientes) >= self.workers * 2:
+                    yield pendientes.popleft().result()
+            while pendientes:
+                yield pendientes.popleft().result()
+        finally:
+            for futuro in pendientes:
+                futuro.cancel()
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class Pipeline:
+    """
+    Etapas con nombre que se ejecutan en orden sobre un mismo contexto (el
+    catálogo se carga una vez y pasa de una etapa a otra) y comparten el
+    ejecutor de particiones. Al terminar imprime el tiempo de cada etapa.
+    Con 'perfil' (un StageProfiler de modules/profiling.py) cada etapa se
+    mide también con su memoria y sus filas por segundo.
+    """
+
+    def __init__(self, etapas, workers=None, perfil=None):
+        self.etapas = list(etapas)
+        self.ejecutor = PartitionExecutor(workers)
+        self.perfil = perfil
+        self.tiempos = {}
+
+    def run(self, contexto, omitir=(), filas=None):
+        """
+        Ejecuta las etapas, cada una como funcion(contexto, ejecutor), menos
+        las de 'omitir'. Una etapa puede devolver False para parar el
+        pipeline (p. ej. si no hay datos). 'filas' ({nombre: funcion(contexto)})
+        dice al perfil cuántas filas procesó cada etapa.
+        """
+        filas = filas or {}
+        try:
+            for nombre, funcion in self.etapas:
+                if nombre in omitir:
+                    continue
+                inicio = time.perf_counter()
+                with self.perfil.stage(nombre) if self.perfil else nullcontext({}) as registro:
+                    continuar = funcion(contexto, self.ejecutor)
+                    if nombre in filas:
+                        registro['filas'] = filas[nombre](contexto)
+                self.tiempos[nombre] = time.perf_counter() - inicio
+                if continuar is False:
+                    break
+        finally:
+            self.ejecutor.close()
+        total = sum(self.tiempos.values())
+        print(f"\n⏱️ Etapas ({self.ejecutor.workers} procesos): " + ", ".join(
+            f"{nombre} {segundos:.2f} s" for nombre, segundos in self.tiempos.items()) + f"; total {total:.2f} s.")
+        return self.tiempos
@@ -0,0 +1,234 @@
+# modules/profiling.py
+import json
+import os
+import platform
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+from modules.data_loader import peak_memory_mb
+
+# Se incrementa cuando cambia el formato del informe
+REPORT_VERSION = 1
+DEFAULT_REPORT = "perfil_pipeline.json"
+# Cada cuánto se mide la memoria residente durante una etapa
+RSS_SAMPLE_SECONDS = 0.005
+# Una etapa es una regresión si tarda más que la base en esta proporción...
+DEFAULT_TOLERANCE = 0.10
+# ...y al menos estos segundos más (por debajo es ruido de medición)
+NOISE_SECONDS = 0.01
+
+try:
+    _PAGE_BYTES = os.sysconf('SC_PAGE_SIZE')
+except (AttributeError, ValueError, OSError):
+    _PAGE_BYTES = None
+
+
+def current_rss_mb():
+    """
+    Memoria residente actual del proceso en MB (de /proc/self/statm), o None
+    si el sistema no la ofrece (p. ej. macOS o Windows).
+    """
+    if _PAGE_BYTES is None:
+        return None
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * _PAGE_BYTES / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class _RSSSampler(threading.Thread):
+    """Hilo que mide la memoria residente cada 'intervalo' y guarda el máximo."""
+
+    def __init__(self, intervalo):
+        super().__init__(daemon=True)
+        self.intervalo = intervalo
+        self.pico = current_rss_mb()
+        self._parar = threading.Event()
+
+    def run(self):
+        while not self._parar.wait(self.intervalo):
+            rss = current_rss_mb()
+            if rss is not None and rss > self.pico:
+                self.pico = rss
+
+    def stop(self):
+        self._parar.set()
+        self.join()
+        rss = current_rss_mb()
+        if rss is not None and rss > self.pico:
+            self.pico = rss
+        return self.pico
+
+
+class StageProfiler:
+    """
+    Mide etapas con nombre: tiempo de reloj, filas por segundo y memoria
+    residente (al empezar y el pico durante la etapa, muestreado cada
+    RSS_SAMPLE_SECONDS). Sin /proc el pico es el máximo histórico del
+    proceso (ru_maxrss), que solo sirve para la primera etapa que lo supera.
+
+    El informe (report/write) es un JSON con el entorno y una entrada por
+    etapa, para comparar ejecuciones con compare_reports.
+    """
+
+    def __init__(self, muestreo=RSS_SAMPLE_SECONDS):
+        self.muestreo = muestreo
+        self.etapas = []
+        self._inicio = time.perf_counter()
+
+    @contextmanager
+    def stage(self, nombre, filas=None):
+        """
+        Mide el bloque 'with' como la etapa 'nombre'. Devuelve el registro de
+        la etapa, en el que se pueden fijar las 'filas' dentro del bloque.
+        """
+        registro = {'nombre': nombre, 'filas': filas}
+        muestreador = _RSSSampler(self.muestreo) if current_rss_mb() is not None else None
+        rss_inicio = muestreador.pico if muestreador else None
+        if muestreador:
+            muestreador.start()
+        inicio = time.perf_counter()
+        try:
+            yield registro
+        finally:
+            segundos = time.perf_counter() - inicio
+            pico = muestreador.stop() if muestreador else peak_memory_mb()
+            filas = registro['filas']
+            registro.update({
+                'segundos': segundos,
+                'filas_por_s': filas / segundos if filas and segundos > 0 else None,
+                'rss_inicio_mb': rss_inicio,
+                'pico_mb': pico,
+                'incremento_mb': pico - rss_inicio if pico is not None and rss_inicio is not None else None,
+            })
+            self.etapas.append(registro)
+
+    @classmethod
+    def best_of(cls, perfiles):
+        """
+        Une las mediciones de varias repeticiones: de cada etapa se queda la
+        más rápida, que es la menos afectada por el ruido del sistema.
+        """
+        mejor = cls()
+        mejor._inicio = min(perfil._inicio for perfil in perfiles)
+        por_nombre = {}
+        for perfil in perfiles:
+            for registro in perfil.etapas:
+                actual = por_nombre.get(registro['nombre'])
+                if actual is None or registro['segundos'] < actual['segundos']:
+                    por_nombre[registro['nombre']] = dict(registro, repeticiones=len(perfiles))
+        mejor.etapas = list(por_nombre.values())
+        return mejor
+
+    def report(self, **contexto):
+        """Informe con el entorno, el 'contexto' que se pase y las etapas medidas."""
+        hijos = None
+        try:
+            import resource
+
+            hijos = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / (1024 if sys.platform != 'darwin'
+                                                                               else 1024 * 1024)
+        except (ImportError, AttributeError):
+            pass
+        return {
+            'version': REPORT_VERSION,
+            'fecha': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'entorno': {
+                'python': platform.python_version(),
+                'numpy': np.__version__,
+                'pandas': pd.__version__,
+                'plataforma': platform.platform(),
+                'procesador': platform.processor() or platform.machine(),
+                'nucleos': os.cpu_count(),
+            },
+            'contexto': contexto,
+            'total_s': time.perf_counter() - self._inicio,
+            'pico_proceso_mb': peak_memory_mb(),
+            # Pico del mayor proceso hijo ya terminado (p. ej. los del pool)
+            'pico_hijos_mb': hijos or None,
+            'etapas': self.etapas,
+        }
+
+    def write(self, ruta=DEFAULT_REPORT, **contexto):
+        informe = self.report(**contexto)
+        tmp_path = ruta + ".tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(informe, f, indent=2)
+        os.replace(tmp_path, ruta)
+        print(f"📈 Informe de rendimiento guardado en '{ruta}'.")
+        return informe
+
+    def summary(self):
+        """Imprime una tabla con las etapas medidas."""
+        print(f"\n{'etapa':>22} {'filas':>11} {'tiempo (s)':>11} {'filas/s':>12} {'pico (MB)':>10} {'Δ (MB)':>8}")
+        for r in self.etapas:
+            filas = f"{r['filas']:,}" if r['filas'] is not None else "-"
+            velocidad = f"{r['filas_por_s']:,.0f}" if r['filas_por_s'] else "-"
+            pico = f"{r['pico_mb']:.0f}" if r['pico_mb'] is not None else "n/d"
+            incremento = f"{r['incremento_mb']:+.0f}" if r['incremento_mb'] is not None else "n/d"
+            print(f"{r['nombre']:>22} {filas:>11} {r['segundos']:>11.3f} {velocidad:>12} {pico:>10} {incremento:>8}")
+
+
+def load_report(ruta):
+    with open(ruta) as f:
+        informe = json.load(f)
+    if informe.get('version') != REPORT_VERSION:
+        raise ValueError(f"'{ruta}' no es un informe de rendimiento de la versión {REPORT_VERSION}.")
+    return informe
+
+
+def compare_reports(base, nuevo, tolerancia=DEFAULT_TOLERANCE, ruido=NOISE_SECONDS):
+    """
+    Compara dos informes etapa a etapa (por nombre). Devuelve una lista de
+    dicts con los segundos de cada uno, la proporción nuevo/base y si es una
+    regresión: más lenta que la base en más de 'tolerancia' y en más de
+    'ruido' segundos.
+    """
+    anteriores = {r['nombre']: r for r in base['etapas']}
+    filas = []
+    for r in nuevo['etapas']:
+        previo = anteriores.get(r['nombre'])
+        if previo is None:
+            continue
+        proporcion = r['segundos'] / previo['segundos'] if previo['segundos'] > 0 else float('inf')
+        filas.append({'nombre': r['nombre'], 'base_s': previo['segundos'], 'nuevo_s': r['segundos'],
+                      'proporcion': proporcion, 'base_pico_mb': previo.get('pico_mb'),
+                      'nuevo_pico_mb': r.get('pico_mb'),
+                      'regresion': proporcion > 1 + tolerancia and r['segundos'] - previo['segundos'] > ruido})
+    return filas
+
+
+def print_comparison(filas):
+    print(f"\n{'etapa':>22} {'base (s)':>10} {'nuevo (s)':>10} {'proporción':>11} {'pico base':>10} "
+          f"{'pico nuevo':>11}")
+    for r in filas:
+        picos = [f"{p:.0f}" if p is not None else "n/d" for p in (r['base_pico_mb'], r['nuevo_pico_mb'])]
+        marca = "  ⚠️ regresión" if r['regresion'] else ""
+        print(f"{r['nombre']:>22} {r['base_s']:>10.3f} {r['nuevo_s']:>10.3f} {r['proporcion']:>10.2f}x "
+              f"{picos[0]:>10} {picos[1]:>11}{marca}")
+
+
+if __name__ == "__main__":
+    # python3 -m modules.profiling base.json nuevo.json [--tolerancia 0.1]
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Compara dos informes de rendimiento etapa a etapa.")
+    parser.add_argument('base', help="Informe de referencia (main.py --profile o benchmarks.bench_suite).")
+    parser.add_argument('nuevo', help="Informe a comparar.")
+    parser.add_argument('--tolerancia', type=float, default=DEFAULT_TOLERANCE,
+                        help="Proporción de tiempo extra a partir de la cual una etapa es una regresión.")
+    args = parser.parse_args()
+
+    comparacion = compare_reports(load_report(args.base), load_report(args.nuevo), args.tolerancia)
+    print_comparison(comparacion)
+    regresiones = [r['nombre'] for r in comparacion if r['regresion']]
+    if regresiones:
+        print(f"\n❌ {len(regresiones)} etapas más lentas que la base: {', '.join(regresiones)}")
+        sys.exit(1)
+    print("\n✅ Sin regresiones.")
@@ -0,0 +1,219 @@
+# modules/propagator.py
+import json
+import sys
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+from modules.orbits import orbital_plane_axes
+
+# Parámetro gravitacional del Sol en AU^3/día^2 (constante de Gauss al cuadrado)
+GM_SUN = 0.01720209895 ** 2
+# Día juliano del origen de tiempos Unix (1970-01-01 00:00 UTC)
+JD_UNIX_EPOCH = 2440587.5
+
+# Elementos medios de la Tierra (baricentro Tierra-Luna) en J2000, eclíptica,
+# de las fórmulas aproximadas de posiciones planetarias de JPL (Standish).
+EARTH_ELEMENTS = {
+    'a': 1.00000261, 'e': 0.01671123, 'i': -0.00001531, 'om': 0.0,
+    'w': 102.93768193, 'ma': 100.46457166 - 102.93768193, 'epoch': 2451545.0,
+}
+
+
+def julian_date_now():
+    """
+    Día juliano del instante actual a partir del reloj del sistema. La
+    diferencia entre UTC y TDB (~69 s) es despreciable para visualización.
+    """
+    return time.time() / 86400.0 + JD_UNIX_EPOCH
+
+
+def julian_date(fecha):
+    """
+    Día juliano de una fecha ('YYYY-MM-DD', 'YYYY-MM-DDTHH:MM' o datetime).
+    Las fechas sin zona horaria se interpretan en UTC.
+    """
+    if isinstance(fecha, str):
+        fecha = datetime.fromisoformat(fecha)
+    if fecha.tzinfo is None:
+        fecha = fecha.replace(tzinfo=timezone.utc)
+    return fecha.timestamp() / 86400.0 + JD_UNIX_EPOCH
+
+
+def solve_kepler(M, e, tol=1e-12, max_iter=50):
+    """
+    Resuelve la ecuación de Kepler para arrays de anomalías medias (rad) y
+    excentricidades con iteraciones de Halley vectorizadas:
+
+    - elíptica (e < 1):    M = E - e sin E      -> devuelve E
+    - hiperbólica (e > 1): M = e sinh H - H     -> devuelve H
+
+    Los casos parabólicos (e == 1) y los datos ausentes devuelven NaN.
+    """
+    M, e = np.broadcast_arrays(np.asarray(M, dtype=np.float64), np.asarray(e, dtype=np.float64))
+    x = np.full(M.shape, np.nan)
+    eliptica = e < 1
+    hiperbolica = e > 1
+    if eliptica.all():
+        return _solve_elliptic(M, e, tol, max_iter)
+    x[eliptica] = _solve_elliptic(M[eliptica], e[eliptica], tol, max_iter)
+    x[hiperbolica] = _solve_hyperbolic(M[hiperbolica], e[hiperbolica], tol, max_iter)
+    return x
+
+
+def _solve_elliptic(M, e, tol, max_iter):
+    # En la elipse basta con M en [-pi, pi]
+    M = np.remainder(M + np.pi, 2 * np.pi) - np.pi
+    # Semilla: E = M + e sin M, o pi con el signo de M para excentricidades altas
+    E = np.where(e < 0.8, M + e * np.sin(M), np.pi * np.sign(M))
+    return _halley(E, M, e, np.sin, np.cos, 1.0, tol, max_iter)
+
+
+def _solve_hyperbolic(M, e, tol, max_iter):
+    H = np.arcsinh(M / e)
+    return _halley(H, M, e, np.sinh, np.cosh, -1.0, tol, max_iter)
+
+
+def _halley(x, M, e, seno, coseno, signo, tol, max_iter):
+    """
+    Iteraciones de Halley sobre f(x) = signo * (x - e*seno(x)) - M = 0. En
+    las dos ramas f''(x) = e*seno(x) (e sin E en la elipse, e sinh H en la
+    hipérbola), sin el signo. En cada vuelta solo se siguen iterando los
+    elementos que aún no han convergido.
+    """
+    x = x.copy()
+    activos = np.arange(x.size)
+    x_act, M_act, e_act = x.ravel(), M.ravel(), e.ravel()
+    plano = x.reshape(-1)
+    for _ in range(max_iter):
+        s, c = seno(x_act), coseno(x_act)
+        f = signo * (x_act - e_act * s) - M_act
+        df = signo * (1 - e_act * c)
+        paso = f / df
+        paso /= 1 - 0.5 * paso * (e_act * s) / df
+        x_act = x_act - paso
+        plano[activos] = x_act
+        pendientes = np.abs(paso) >= tol
+        if not pendientes.any():
+            break
+        activos, x_act, M_act, e_act = activos[pendientes], x_act[pendientes], M_act[pendientes], e_act[pendientes]
+    return x
+
+
+def _anomaly_trig(x, eliptica):
+    """
+    (sin, cos) de la anomalía excéntrica en las elipses y (sinh, cosh) de la
+    hiperbólica en el resto, sin calcular las dos cosas para todos.
+    """
+    if eliptica.all():
+        return np.sin(x), np.cos(x)
+    s, c = np.empty_like(x), np.empty_like(x)
+    s[eliptica], c[eliptica] = np.sin(x[eliptica]), np.cos(x[eliptica])
+    s[~eliptica], c[~eliptica] = np.sinh(x[~eliptica]), np.cosh(x[~eliptica])
+    return s, c
+
+
+def propagate(a, e, i_deg, om_deg, w_deg, ma_deg, epoch, epochs, velocities=False, gm=GM_SUN):
+    """
+    Propaga N cuerpos con el problema de dos cuerpos a una o varias épocas.
+
+    Recibe los elementos osculantes (a en AU, ángulos en grados, 'epoch' en
+    días julianos TDB) como arrays de N, y 'epochs' como escalar o array de T
+    días julianos. Devuelve posiciones heliocéntricas eclípticas en AU con
+    forma (N, 3) si 'epochs' es escalar o (N, T, 3) si es un array; con
+    velocities=True devuelve también las velocidades (AU/día) con la misma forma.
+    """
+    a = np.atleast_1d(np.asarray(a, dtype=np.float64))
+    n = a.size
+    e, i_deg, om_deg, w_deg, ma_deg, epoch = (
+        np.broadcast_to(np.asarray(v, dtype=np.float64), (n,)) for v in (e, i_deg, om_deg, w_deg, ma_deg, epoch)
+    )
+    escalar = np.ndim(epochs) == 0
+    epochs = np.atleast_1d(np.asarray(epochs, dtype=np.float64))
+
+    # Anomalía media en cada época: (N, T)
+    a_abs = np.abs(a)
+    movimiento_medio = np.sqrt(gm / a_abs ** 3)
+    M = np.radians(ma_deg)[:, None] + movimiento_medio[:, None] * (epochs[None, :] - epoch[:, None])
+    e_col = e[:, None]
+    x = solve_kepler(M, e_col)
+
+    eliptica = np.broadcast_to(e_col < 1, x.shape)
+    raiz = np.sqrt(np.abs(1 - e_col ** 2))
+    s, c = _anomaly_trig(x, eliptica)
+    a_col = a_abs[:, None]
+    x_plano = np.where(eliptica, a_col * (c - e_col), a_col * (e_col - c))
+    y_plano = a_col * raiz * s
+
+    ejes = orbital_plane_axes(i_deg, om_deg, w_deg)
+    posiciones = x_plano[..., None] * ejes[:, None, 0, :] + y_plano[..., None] * ejes[:, None, 1, :]
+    if escalar:
+        posiciones = posiciones[:, 0]
+    if not velocities:
+        return posiciones
+
+    r = np.where(eliptica, a_col * (1 - e_col * c), a_col * (e_col * c - 1))
+    factor = np.sqrt(gm * a_col) / r
+    vx_plano = -factor * s
+    vy_plano = factor * raiz * c
+    velocidades = vx_plano[..., None] * ejes[:, None, 0, :] + vy_plano[..., None] * ejes[:, None, 1, :]
+    if escalar:
+        velocidades = velocidades[:, 0]
+    return posiciones, velocidades
+
+
+def propagate_catalog(df, epochs, velocities=False):
+    """
+    Atajo para propagar las filas de un DataFrame del catálogo (columnas a, e,
+    i, om, w, ma y epoch). Ver propagate().
+    """
+    return propagate(
+        df['a'].to_numpy(), df['e'].to_numpy(), df['i'].to_numpy(), df['om'].to_numpy(),
+        df['w'].to_numpy(), df['ma'].to_numpy(), df['epoch'].to_numpy(), epochs, velocities,
+    )
+
+
+def earth_position(epochs, velocities=False):
+    """
+    Posición heliocéntrica aproximada de la Tierra (elementos medios J2000).
+    """
+    el = EARTH_ELEMENTS
+    resultado = propagate(el['a'], el['e'], el['i'], el['om'], el['w'], el['ma'], el['epoch'], epochs, velocities)
+    if velocities:
+        return resultado[0][0], resultado[1][0]
+    return resultado[0]
+
+
+def validate_against_fixture(ruta_fixture, tolerancia_au=1e-3):
+    """
+    Compara el propagador con vectores de Horizons grabados (ver
+    'python3 horizons.py --grabar-fixture'). El fixture guarda, por objeto, sus
+    elementos osculantes y los vectores x, y, z de Horizons en varias épocas.
+
+    Devuelve una lista de (id, error máximo en AU) e imprime el resumen.
+    """
+    with open(ruta_fixture) as f:
+        fixture = json.load(f)
+
+    resultados = []
+    for objeto in fixture['objetos']:
+        el = objeto['elementos']
+        jd = np.array([v['jd'] for v in objeto['vectores']])
+        esperado = np.array([[v['x'], v['y'], v['z']] for v in objeto['vectores']])
+        calculado = propagate(el['a'], el['e'], el['i'], el['om'], el['w'], el['ma'], el['epoch'], jd)[0]
+        error = float(np.max(np.linalg.norm(calculado - esperado, axis=1)))
+        resultados.append((objeto['id'], error))
+        estado = "✅" if error <= tolerancia_au else "❌"
+        print(f"{estado} {objeto['id']}: error máximo {error:.2e} AU en {len(jd)} épocas")
+    return resultados
+
+
+if __name__ == "__main__":
+    # Uso: python3 -m modules.propagator <fixture.json> [tolerancia_au]
+    if len(sys.argv) < 2:
+        print("Uso: python3 -m modules.propagator <fixture_horizons.json> [tolerancia_au]")
+        sys.exit(2)
+    tolerancia = float(sys.argv[2]) if len(sys.argv) > 2 else 1e-3
+    errores = validate_against_fixture(sys.argv[1], tolerancia)
+    sys.exit(0 if all(error <= tolerancia for _, error in errores) else 1)
@@ -0,0 +1,135 @@
+# modules/ranking.py
+import time
+
+import numpy as np
+
+# Perfiles de clasificación. Cada perfil es declarativo y se resuelve con
+# operaciones vectorizadas:
+# - 'claves': orden lexicográfico, lista de (columna, ascendente), como en
+#   sort_values. Los NaN van siempre al final.
+# - 'terminos': puntuación ponderada, lista de (columna, peso, transformación).
+#   Cada término se estandariza (media 0, desviación 1) antes de ponderarlo,
+#   así los pesos son comparables entre columnas; los NaN no suman nada.
+#   Se ordena por la puntuación de mayor a menor.
+RANKING_PROFILES = {
+    # Orden histórico de main.py: peligrosos primero, luego los más grandes y
+    # luego los de menor MOID.
+    'interes': {
+        'claves': [('is_pha', False), ('diameter', False), ('moid', True)],
+    },
+    # Riesgo: MOID pequeña, tamaño grande (o H pequeña si falta el diámetro).
+    'peligro': {
+        'terminos': [('is_pha', 1.0, 'lineal'), ('moid', -1.5, 'log'),
+                     ('diameter', 1.0, 'log'), ('H', -0.5, 'lineal')],
+    },
+    'grandes': {
+        'claves': [('diameter', False), ('H', True)],
+    },
+    'cercanos': {
+        'claves': [('moid', True), ('H', True)],
+    },
+}
+DEFAULT_PROFILE = 'interes'
+
+TRANSFORMS = {
+    'lineal': lambda x: x,
+    'log': lambda x: np.log10(np.maximum(x, 1e-9)),
+}
+
+
+def add_hazard_flag(df):
+    """
+    Añade la columna booleana 'is_pha' a partir de 'pha' ('Y'/'N') sin
+    recorrer las filas en Python.
+    """
+    if 'pha' in df.columns:
+        df['is_pha'] = (df['pha'] == 'Y').fillna(False).to_numpy(dtype=bool)
+    else:
+        df['is_pha'] = False
+        print("⚠️ No se encontró la columna 'pha'; no se puede priorizar por peligrosidad.")
+    return df
+
+
+def _sort_key(df, columna, ascendente):
+    """
+    Clave numérica en la que 'menor es mejor', con los NaN como +inf.
+    """
+    valores = df[columna].to_numpy(dtype=np.float64, na_value=np.nan)
+    if not ascendente:
+        valores = -valores
+    return np.where(np.isnan(valores), np.inf, valores)
+
+
+def profile_score(df, terminos):
+    """
+    Puntuación ponderada de cada fila según los 'terminos' de un perfil
+    (mayor es mejor). Las columnas ausentes se ignoran.
+    """
+    puntuacion = np.zeros(len(df))
+    for columna, peso, transformacion in terminos:
+        if columna not in df.columns:
+            continue
+        valores = TRANSFORMS[transformacion](df[columna].to_numpy(dtype=np.float64, na_value=np.nan))
+        validos = np.isfinite(valores)
+        if not validos.any():
+            continue
+        desviacion = valores[validos].std()
+        z = (valores - valores[validos].mean()) / (desviacion if desviacion > 0 else 1.0)
+        puntuacion += peso * np.where(validos, z, 0.0)
+    return puntuacion
+
+
+def _lexicographic_top_k(claves, indices, k):
+    """
+    Índices de las k mejores filas (de 'indices') en orden lexicográfico de
+    'claves', sin ordenar todo: con la primera clave se parte el conjunto con
+    np.partition; las filas que empatan en el valor frontera se deciden con
+    la clave siguiente. El coste es O(n) por clave.
+    """
+    if k <= 0 or indices.size == 0:
+        return indices[:0]
+    if k >= indices.size or not claves:
+        return indices[:k]
+    valores = claves[0][indices]
+    frontera = np.partition(valores, k - 1)[k - 1]
+    ganadores = indices[valores < frontera]
+    empates = indices[valores == frontera]
+    return np.concatenate([ganadores, _lexicographic_top_k(claves[1:], empates, k - ganadores.size)])
+
+
+def rank_top_k(df, perfil=DEFAULT_PROFILE, top=5000):
+    """
+    Devuelve las 'top' mejores filas de 'df' según un perfil de
+    RANKING_PROFILES (o un dict con la misma forma), ya ordenadas. Usa
+    selección parcial, así que solo se ordenan las k filas elegidas.
+    """
+    definicion = RANKING_PROFILES[perfil] if isinstance(perfil, str) else perfil
+    if 'terminos' in definicion:
+        claves = [-profile_score(df, definicion['terminos'])]
+    else:
+        claves = [_sort_key(df, columna, ascendente) for columna, ascendente in definicion['claves']
+                  if columna in df.columns]
+    if not claves:
+        print("⚠️ No se encontraron las columnas del perfil; se toman las primeras filas.")
+        return df.head(top)
+
+    # Se reordena la selección por posición para que los empates totales
+    # queden como en un orden estable
+    seleccion = np.sort(_lexicographic_top_k(claves, np.arange(len(df)), top))
+    # np.lexsort ordena por la última clave primero
+    orden = np.lexsort([clave[seleccion] for clave in reversed(claves)])
+    return df.iloc[seleccion[orden]]
+
+
+def rank_profiles(df, perfiles=(DEFAULT_PROFILE,), top=5000):
+    """
+    Aplica varios perfiles sobre el mismo DataFrame ya cargado. Devuelve un
+    dict {perfil: DataFrame con sus 'top' filas}.
+    """
+    resultados = {}
+    for perfil in perfiles:
+        inicio = time.perf_counter()
+        resultados[perfil] = rank_top_k(df, perfil, top)
+        print(f"🏆 Perfil '{perfil}': {len(resultados[perfil])} mejores de {len(df)} filas "
+              f"en {time.perf_counter() - inicio:.3f} s.")
+    return resultados
@@ -0,0 +1,391 @@
+# modules/spatial_index.py
+import json
+import os
+import shutil
+import time
+
+import numpy as np
+import pandas as pd
+
+from modules.catalog_cache import cache_dir_for, load_catalog_columns, source_fingerprint
+from modules.data_loader import resolve_catalog_path
+from modules.propagator import earth_position, julian_date_now, propagate
+
+# Se incrementa cuando cambia el formato de los índices guardados
+INDEX_VERSION = 1
+INDEX_SUFFIX = ".indice"
+INDEX_MANIFEST = "index.json"
+INDEX_COLUMNS = ['spkid', 'a', 'e', 'i', 'om', 'w', 'ma', 'epoch']
+# Puntos por celda que se buscan al dimensionar la rejilla
+DEFAULT_POINTS_PER_CELL = 16
+MAX_CELLS_PER_AXIS = 256
+# La rejilla cubre del cuantil 0.1 % al 99.9 % de cada eje: los objetos
+# extremos (cometas a cientos de AU) caen en las celdas del borde en vez de
+# estirar la rejilla y dejar todo el cinturón en unas pocas celdas
+BOUNDS_QUANTILE = 0.001
+# Pesos del criterio de distancia de Zappalà et al. (1990) para familias
+# (d² = 5/4 (Δa/a)² + 2 Δe² + 2 (Δ sin i)², en unidades de la velocidad orbital)
+ORBIT_WEIGHTS = (np.sqrt(5 / 4), np.sqrt(2), np.sqrt(2))
+# Umbral típico de las familias (~ 70 m/s a la velocidad del cinturón principal)
+DEFAULT_FAMILY_CUTOFF = 0.004
+
+
+def orbit_features(a, e, i_deg):
+    """
+    Coordenadas normalizadas (ln a, e, sin i) escaladas con ORBIT_WEIGHTS: la
+    distancia euclídea entre dos órbitas es la del criterio de familias
+    (Δa/a ≈ Δ ln a), así que los vecinos son órbitas parecidas.
+    """
+    a, e, i_deg = (np.asarray(v, dtype=np.float64) for v in (a, e, i_deg))
+    return np.stack([ORBIT_WEIGHTS[0] * np.log(a), ORBIT_WEIGHTS[1] * e,
+                     ORBIT_WEIGHTS[2] * np.sin(np.radians(i_deg))], axis=-1)
+
+
+class GridIndex:
+    """
+    Rejilla uniforme sobre puntos en 3D, guardada como en un CSR: 'orden' son
+    los puntos ordenados por celda e 'inicio[c]:inicio[c + 1]' el tramo de
+    la celda c. La última dimensión varía más rápido, así que cada fila de
+    celdas de una caja de búsqueda es un único tramo contiguo de 'orden'.
+
+    'filas' es la fila del catálogo de cada punto: las consultas devuelven
+    filas del catálogo y distancias, ordenadas por distancia.
+    """
+
+    def __init__(self, puntos, filas, origen, celda, forma, orden, inicio):
+        self.puntos = puntos
+        self.filas = filas
+        self.origen = np.asarray(origen, dtype=np.float64)
+        self.celda = np.asarray(celda, dtype=np.float64)
+        self.forma = np.asarray(forma, dtype=np.int64)
+        self.orden = orden
+        self.inicio = inicio
+
+    @classmethod
+    def build(cls, puntos, filas, puntos_por_celda=DEFAULT_POINTS_PER_CELL):
+        puntos = np.ascontiguousarray(puntos, dtype=np.float64)
+        n, dimensiones = puntos.shape
+        if n:
+            bajo, alto = np.quantile(puntos, [BOUNDS_QUANTILE, 1 - BOUNDS_QUANTILE], axis=0)
+        else:
+            bajo, alto = np.zeros(dimensiones), np.ones(dimensiones)
+        lados = int(np.clip(np.ceil((n / puntos_por_celda) ** (1 / dimensiones)), 1, MAX_CELLS_PER_AXIS))
+        forma = np.full(dimensiones, lados, dtype=np.int64)
+        celda = np.maximum((alto - bajo) / lados, 1e-12)
+        indice = cls(puntos, np.asarray(filas, dtype=np.int64), bajo, celda, forma, None, None)
+
+        ids = np.ravel_multi_index(indice._cell_coords(puntos).T, forma)
+        indice.orden = np.argsort(ids, kind='stable')
+        indice.inicio = np.zeros(int(forma.prod()) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(ids, minlength=int(forma.prod())), out=indice.inicio[1:])
+        return indice
+
+    def __len__(self):
+        return len(self.puntos)
+
+    def _cell_coords(self, puntos):
+        coords = np.floor((puntos - self.origen) / self.celda)
+        return np.clip(coords, 0, self.forma - 1).astype(np.int64)
+
+    def _candidates(self, lo, hi):
+        """Puntos de las celdas de la caja [lo, hi] (coordenadas de celda, inclusive)."""
+        rangos = [np.arange(bajo, alto + 1) for bajo, alto in zip(lo[:-1], hi[:-1])]
+        prefijos = np.ravel_multi_index(np.meshgrid(*rangos, indexing='ij'), self.forma[:-1]).ravel()
+        prefijos *= self.forma[-1]
+        inicios = self.inicio[prefijos + lo[-1]]
+        longitudes = self.inicio[prefijos + hi[-1] + 1] - inicios
+        total = int(longitudes.sum())
+        if total == 0:
+            return np.empty(0, dtype=np.int64)
+        # Concatena los tramos sin bucle: posición de cada tramo + contador
+        desplazamientos = np.repeat(inicios - (np.cumsum(longitudes) - longitudes), longitudes)
+        return self.orden[desplazamientos + np.arange(total)]
+
+    def _covered_radius(self, centro, lo, hi):
+        """
+        Radio alrededor de 'centro' que la caja [lo, hi] cubre por completo.
+        Las celdas del borde contienen todo lo que queda fuera de la rejilla,
+        así que por ese lado la caja cubre hasta el infinito.
+        """
+        abajo = np.where(lo > 0, centro - (self.origen + lo * self.celda), np.inf)
+        arriba = np.where(hi < self.forma - 1, self.origen + (hi + 1) * self.celda - centro, np.inf)
+        return float(min(abajo.min(), arriba.min()))
+
+    def _sorted(self, candidatos, distancias, k=None):
+        if k is not None and len(distancias) > k:
+            cerca = distancias <= np.partition(distancias, k - 1)[k - 1]
+            candidatos, distancias = candidatos[cerca], distancias[cerca]
+        # Orden por distancia y, en los empates, por fila (igual que una búsqueda exhaustiva)
+        orden = np.lexsort((self.filas[candidatos], distancias))[:k]
+        return self.filas[candidatos[orden]], distancias[orden]
+
+    def _distances(self, candidatos, centro):
+        return np.sqrt(((self.puntos[candidatos] - centro) ** 2).sum(axis=1))
+
+    def radius(self, centro, radio):
+        """Filas y distancias de los puntos a 'radio' o menos de 'centro'."""
+        centro = np.asarray(centro, dtype=np.float64)
+        lo, hi = self._cell_coords(np.stack([centro - radio, centro + radio]))
+        candidatos = self._candidates(lo, hi)
+        distancias = self._distances(candidatos, centro)
+        dentro = distancias <= radio
+        return self._sorted(candidatos[dentro], distancias[dentro])
+
+    def knn(self, centro, k):
+        """
+        Filas y distancias de los k puntos más cercanos a 'centro'. La caja de
+        búsqueda crece desde la celda del centro hasta tener k candidatos; si
+        el k-ésimo queda más lejos de lo que la caja cubre del todo, basta con
+        una segunda búsqueda en la caja de ese radio.
+        """
+        centro = np.asarray(centro, dtype=np.float64)
+        k = min(k, len(self))
+        if k <= 0:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        celda = self._cell_coords(centro[None])[0]
+        anillos = 0
+        while True:
+            lo = np.maximum(celda - anillos, 0)
+            hi = np.minimum(celda + anillos, self.forma - 1)
+            candidatos = self._candidates(lo, hi)
+            if len(candidatos) >= k:
+                break
+            anillos = anillos * 2 + 1
+        distancias = self._distances(candidatos, centro)
+        kesima = np.partition(distancias, k - 1)[k - 1]
+        if kesima > self._covered_radius(centro, lo, hi):
+            lo, hi = self._cell_coords(np.stack([centro - kesima, centro + kesima]))
+            candidatos = self._candidates(lo, hi)
+            distancias = self._distances(candidatos, centro)
+        return self._sorted(candidatos, distancias, k)
+
+    def save(self, carpeta):
+        """Guarda los arrays en 'carpeta' y devuelve su descripción para el manifiesto."""
+        os.makedirs(carpeta, exist_ok=True)
+        for nombre in ('puntos', 'filas', 'orden', 'inicio'):
+            np.save(os.path.join(carpeta, f"{nombre}.npy"), getattr(self, nombre))
+        return {'puntos': len(self), 'origen': self.origen.tolist(), 'celda': self.celda.tolist(),
+                'forma': self.forma.tolist()}
+
+    @classmethod
+    def load(cls, carpeta, meta, mmap_mode='r'):
+        arrays = {nombre: np.load(os.path.join(carpeta, f"{nombre}.npy"), mmap_mode=mmap_mode)
+                  for nombre in ('puntos', 'filas', 'orden', 'inicio')}
+        return cls(arrays['puntos'], arrays['filas'], meta['origen'], meta['celda'], meta['forma'],
+                   arrays['orden'], arrays['inicio'])
+
+
+def _result(spkid, filas, distancias):
+    return pd.DataFrame({'spkid': spkid[filas], 'distancia': distancias})
+
+
+class CatalogIndex:
+    """
+    Índices espaciales de un catálogo: una rejilla sobre los elementos
+    orbitales normalizados (orbit_features) para buscar órbitas parecidas y
+    familias, y otra sobre las posiciones heliocéntricas en la época 'epoch'
+    para consultas por región. La de posiciones se reconstruye al pedir otra
+    época. 'columnas' tiene las columnas INDEX_COLUMNS: un DataFrame del
+    catálogo o un dict de arrays (p. ej. los memmaps de load_catalog_columns).
+    """
+
+    def __init__(self, columnas, orbitas, posiciones=None, epoch=None):
+        self.columnas = {col: np.asarray(columnas[col]) for col in INDEX_COLUMNS}
+        self.spkid = self.columnas['spkid']
+        self.orbitas = orbitas
+        self.posiciones = posiciones
+        self.epoch = epoch
+        self._por_spkid = None
+
+    @classmethod
+    def build(cls, columnas, epoch=None):
+        a, e, i = (np.asarray(columnas[col], dtype=np.float64) for col in ('a', 'e', 'i'))
+        validas = np.isfinite(a) & np.isfinite(e) & np.isfinite(i) & (a > 0)
+        filas = np.flatnonzero(validas)
+        indice = cls(columnas, GridIndex.build(orbit_features(a[filas], e[filas], i[filas]), filas))
+        indice.rebuild_positions(epoch)
+        return indice
+
+    def rebuild_positions(self, epoch=None):
+        """
+        Propaga todo el catálogo a 'epoch' (por defecto, la medianoche
+        juliana de hoy) y rehace la rejilla de posiciones.
+        """
+        epoch = float(np.floor(julian_date_now() - 0.5) + 0.5) if epoch is None else float(epoch)
+        inicio = time.perf_counter()
+        elementos = [np.asarray(self.columnas[col], dtype=np.float64) for col in INDEX_COLUMNS[1:]]
+        filas = np.flatnonzero(np.logical_and.reduce([np.isfinite(v) for v in elementos]) & (elementos[0] != 0))
+        posiciones = propagate(*(v[filas] for v in elementos), epoch)
+        finitas = np.isfinite(posiciones).all(axis=1)
+        self.posiciones = GridIndex.build(posiciones[finitas], filas[finitas])
+        self.epoch = epoch
+        print(f"🧭 Rejilla de posiciones en JD {epoch}: {len(self.posiciones)} asteroides "
+              f"en {time.perf_counter() - inicio:.2f} s.")
+
+    def rows_for_ids(self, spkids):
+        if self._por_spkid is None:
+            self._por_spkid = pd.Index(self.spkid)
+        return self._por_spkid.get_indexer(np.atleast_1d(np.asarray(spkids, dtype=np.int64)))
+
+    def _orbit_point(self, spkid):
+        fila = self.rows_for_ids(spkid)[0]
+        if fila < 0:
+            raise KeyError(f"SPK-ID {spkid} no está en el catálogo.")
+        return fila, orbit_features(*(self.columnas[col][fila] for col in ('a', 'e', 'i')))
+
+    def nearest_orbits(self, a, e, i_deg, k=10):
+        """Las k órbitas del catálogo más parecidas a (a, e, i)."""
+        return _result(self.spkid, *self.orbitas.knn(orbit_features(a, e, i_deg), k))
+
+    def similar(self, spkid, k=10):
+        """Las k órbitas más parecidas a la del asteroide 'spkid' (sin él)."""
+        fila, punto = self._orbit_point(spkid)
+        filas, distancias = self.orbitas.knn(punto, k + 1)
+        otras = filas != fila
+        return _result(self.spkid, filas[otras][:k], distancias[otras][:k])
+
+    def family(self, spkid, umbral=DEFAULT_FAMILY_CUTOFF, max_miembros=10_000):
+        """
+        Familia del asteroide 'spkid' por el método de agrupamiento jerárquico
+        (amigos de amigos): todas las órbitas unidas a él por una cadena de
+        pasos de distancia <= 'umbral'. Devuelve los SPK-ID de los miembros
+        (incluido él), hasta 'max_miembros'.
+        """
+        fila, _ = self._orbit_point(spkid)
+        miembros, pendientes = {fila}, [fila]
+        a, e, i = (self.columnas[col] for col in ('a', 'e', 'i'))
+        while pendientes and len(miembros) < max_miembros:
+            actual = pendientes.pop()
+            vecinos, _ = self.orbitas.radius(orbit_features(a[actual], e[actual], i[actual]), umbral)
+            for vecino in vecinos.tolist():
+                if vecino not in miembros:
+                    miembros.add(vecino)
+                    pendientes.append(vecino)
+        return self.spkid[np.sort(np.fromiter(miembros, dtype=np.int64))[:max_miembros]]
+
+    def within(self, centro, radio, epoch=None):
+        """Asteroides a 'radio' AU o menos del punto heliocéntrico 'centro' en 'epoch'."""
+        if epoch is not None and float(epoch) != self.epoch:
+            self.rebuild_positions(epoch)
+        return _result(self.spkid, *self.posiciones.radius(centro, radio))
+
+    def near_earth(self, radio=0.05, epoch=None):
+        """Asteroides a 'radio' AU o menos de la Tierra en 'epoch'."""
+        if epoch is not None and float(epoch) != self.epoch:
+            self.rebuild_positions(epoch)
+        return _result(self.spkid, *self.posiciones.radius(earth_position(self.epoch), radio))
+
+    def save(self, carpeta, fuente, orbitas=None):
+        """
+        Guarda las dos rejillas en 'carpeta'; con 'orbitas' (la descripción
+        de una rejilla de órbitas ya guardada ahí) solo se guardan las
+        posiciones. Estas van en una subcarpeta por época, así que al
+        reconstruirlas no se sobrescriben archivos que otro proceso pueda
+        tener abiertos con memmap. Como en la caché binaria, el manifiesto se
+        escribe al final.
+        """
+        os.makedirs(carpeta, exist_ok=True)
+        manifiesto = {
+            'version': INDEX_VERSION,
+            'filas': len(self.spkid),
+            'fuente': fuente,
+            'orbitas': orbitas or self.orbitas.save(os.path.join(carpeta, 'orbitas')),
+        }
+        subcarpeta = f"posiciones_{self.epoch:.5f}"
+        manifiesto['posiciones'] = dict(self.posiciones.save(os.path.join(carpeta, subcarpeta)),
+                                        carpeta=subcarpeta, epoch=self.epoch)
+        tmp_path = os.path.join(carpeta, INDEX_MANIFEST + ".tmp")
+        with open(tmp_path, 'w') as f:
+            json.dump(manifiesto, f, indent=2)
+        os.replace(tmp_path, os.path.join(carpeta, INDEX_MANIFEST))
+        for nombre in os.listdir(carpeta):
+            if nombre.startswith('posiciones_') and nombre != subcarpeta:
+                shutil.rmtree(os.path.join(carpeta, nombre), ignore_errors=True)
+
+    @classmethod
+    def load(cls, carpeta, columnas, manifiesto):
+        posiciones = manifiesto['posiciones']
+        return cls(columnas,
+                   GridIndex.load(os.path.join(carpeta, 'orbitas'), manifiesto['orbitas']),
+                   GridIndex.load(os.path.join(carpeta, posiciones['carpeta']), posiciones),
+                   posiciones['epoch'])
+
+
+def _read_manifest(carpeta):
+    try:
+        with open(os.path.join(carpeta, INDEX_MANIFEST)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def index_dir_for(filename="jpl_catalog.csv"):
+    """Carpeta de los índices: junto a la caché del catálogo, '.catalog_cache/<nombre>.indice'."""
+    return cache_dir_for(resolve_catalog_path(filename)) + INDEX_SUFFIX
+
+
+def load_catalog_index(filename="jpl_catalog.csv", epoch=None, refresh=False):
+    """
+    Índices espaciales del catálogo. Se leen de disco (con memmap) mientras
+    el CSV no cambie; si no, se construyen desde la caché binaria y se
+    guardan. Si se pide otra 'epoch', solo se rehace la rejilla de posiciones.
+    """
+    inicio = time.perf_counter()
+    columnas = load_catalog_columns(INDEX_COLUMNS, filename)
+    if not columnas:
+        return None
+    carpeta = index_dir_for(filename)
+    huella = source_fingerprint(resolve_catalog_path(filename), with_hash=False)
+    fuente = {'size': huella['size'], 'mtime_ns': huella['mtime_ns']}
+    manifiesto = None if refresh else _read_manifest(carpeta)
+    if manifiesto and manifiesto.get('version') == INDEX_VERSION and manifiesto.get('fuente') == fuente \
+            and manifiesto.get('filas') == len(columnas['spkid']):
+        indice = CatalogIndex.load(carpeta, columnas, manifiesto)
+        if epoch is None or float(epoch) == indice.epoch:
+            print(f"🗂️ Índices espaciales cargados de '{carpeta}' en {(time.perf_counter() - inicio) * 1000:.0f} ms.")
+            return indice
+        indice.rebuild_positions(epoch)
+        indice.save(carpeta, fuente, orbitas=manifiesto['orbitas'])
+    else:
+        print("🗂️ Índices espaciales ausentes u obsoletos; se construyen desde la caché del catálogo...")
+        if os.path.isdir(carpeta):
+            shutil.rmtree(carpeta)
+        indice = CatalogIndex.build(columnas, epoch)
+        indice.save(carpeta, fuente)
+    print(f"💾 Índices espaciales guardados en '{carpeta}' ({time.perf_counter() - inicio:.2f} s).")
+    return indice
+
+
+if __name__ == "__main__":
+    # python3 -m modules.spatial_index --similares 433 --cerca-tierra 0.05 [--epoca JD]
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Consultas de vecinos y de región sobre el catálogo.")
+    parser.add_argument('--catalogo', default="jpl_catalog.csv")
+    parser.add_argument('--epoca', type=float, help="Día juliano de las posiciones (por defecto, hoy).")
+    parser.add_argument('--similares', type=int, metavar='SPKID', help="Órbitas más parecidas a la de este asteroide.")
+    parser.add_argument('--k', type=int, default=10)
+    parser.add_argument('--familia', type=int, metavar='SPKID', help="Familia de este asteroide.")
+    parser.add_argument('--umbral', type=float, default=DEFAULT_FAMILY_CUTOFF)
+    parser.add_argument('--cerca-tierra', type=float, metavar='AU', help="Asteroides a esta distancia de la Tierra.")
+    parser.add_argument('--reconstruir', action='store_true', help="Ignora los índices guardados.")
+    args = parser.parse_args()
+
+    indice = load_catalog_index(args.catalogo, epoch=args.epoca, refresh=args.reconstruir)
+    if indice is None:
+        raise SystemExit(1)
+    consultas = []
+    if args.similares is not None:
+        consultas.append((f"{args.k} órbitas más parecidas a {args.similares}",
+                          lambda: indice.similar(args.similares, args.k)))
+    if args.familia is not None:
+        consultas.append((f"familia de {args.familia} (umbral {args.umbral})",
+                          lambda: pd.DataFrame({'spkid': indice.family(args.familia, args.umbral)})))
+    if args.cerca_tierra is not None:
+        consultas.append((f"a menos de {args.cerca_tierra} AU de la Tierra en JD {indice.epoch}",
+                          lambda: indice.near_earth(args.cerca_tierra)))
+    for titulo, consulta in consultas:
+        inicio = time.perf_counter()
+        resultado = consulta()
+        print(f"\n🔎 {titulo}: {len(resultado)} resultados en {(time.perf_counter() - inicio) * 1000:.2f} ms")
+        print(resultado.head(20).to_string(index=False))
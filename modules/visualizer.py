@@ -1,53 +1,240 @@
 # modules/visualizer.py
-import matplotlib.pyplot as plt
-from matplotlib.lines import Line2D
+import json
+import os
+import time
 
-def plot_orbital_distribution(df):
+import numpy as np
+
+# matplotlib se importa dentro de las funciones que dibujan: las teselas de
+# densidad y quien solo use las constantes no pagan su importación
+
+# A partir de estas filas el modo 'auto' dibuja la densidad en vez de cada punto
+DENSITY_THRESHOLD = 50_000
+# Dominio fijo del histograma (el mismo para el PNG y las teselas de la web):
+# log10 del semieje mayor (0.2 a 100 AU) e inclinación en grados
+LOG_A_RANGE = (-0.7, 2.0)
+INCLINATION_RANGE = (0.0, 180.0)
+# Celdas del histograma del PNG: (log a, inclinación)
+DEFAULT_BINS = (600, 360)
+DENSITY_TILES_VERSION = 1
+DENSITY_MANIFEST = "index.json"
+DEFAULT_TILE_SIZE = 256
+DEFAULT_TILE_LEVELS = 3
+
+
+def _plot_columns(df):
+    """a, i y la máscara de PHAs (de 'pha' == 'Y' o de 'is_pha') de las filas con a e i."""
+    a = df['a'].to_numpy(dtype=np.float64)
+    inclinacion = df['i'].to_numpy(dtype=np.float64)
+    if 'pha' in df.columns:
+        es_pha = (df['pha'] == 'Y').to_numpy(dtype=bool)
+    else:
+        es_pha = df['is_pha'].to_numpy(dtype=bool) if 'is_pha' in df.columns else np.zeros(len(df), dtype=bool)
+    validas = np.isfinite(a) & np.isfinite(inclinacion) & (a > 0)
+    return a[validas], inclinacion[validas], es_pha[validas]
+
+
+def density_grid(a, inclinacion, es_pha, bins=DEFAULT_BINS):
     """
-    Genera un gráfico de dispersión 2D mostrando la distribución de las órbitas
-    de los asteroides del catálogo.
+    Cuenta los asteroides por celda en log10(a) x inclinación (dominio
+    LOG_A_RANGE x INCLINATION_RANGE) con np.bincount. Devuelve dos arrays
+    uint32 (filas = inclinación, columnas = log a): todos y solo los PHAs.
+    Los puntos fuera del dominio no se cuentan.
     """
-    required_cols = ['a', 'i', 'diameter', 'pha']
-    if not all(col in df.columns for col in required_cols):
-        print("Faltan columnas necesarias para el gráfico ('a', 'i', 'diameter', 'pha').")
-        return
-        
-    df_plot = df.dropna(subset=required_cols).copy()
-    if df_plot.empty:
-        print("No hay suficientes datos completos para generar el gráfico.")
-        return
+    nx, ny = bins
+    x = (np.log10(a) - LOG_A_RANGE[0]) * (nx / (LOG_A_RANGE[1] - LOG_A_RANGE[0]))
+    y = (inclinacion - INCLINATION_RANGE[0]) * (ny / (INCLINATION_RANGE[1] - INCLINATION_RANGE[0]))
+    dentro = (x >= 0) & (x < nx) & (y >= 0) & (y < ny)
+    celda = y[dentro].astype(np.int64) * nx + x[dentro].astype(np.int64)
+    total = np.bincount(celda, minlength=nx * ny).astype(np.uint32).reshape(ny, nx)
+    pha = np.bincount(celda[es_pha[dentro]], minlength=nx * ny).astype(np.uint32).reshape(ny, nx)
+    return total, pha
 
-    print(f"Graficando {len(df_plot)} asteroides con datos completos...")
 
-    plt.figure(figsize=(14, 9))
-    
-    # Asigna color basado en si es peligroso o no (el campo 'pha' es 'Y'/'N')
-    colores = df_plot['pha'].map({'Y': 'red', 'N': 'skyblue'})
-    
-    # El tamaño del punto es proporcional al diámetro, con un mínimo para visibilidad
-    sizes = (df_plot['diameter'] * 20) + 10
-    
-    plt.scatter(
-        df_plot['a'],
-        df_plot['i'],
-        c=colores,
-        s=sizes,
-        alpha=0.6,
-        edgecolors='w',
-        linewidth=0.5
-    )
-    
-    plt.title('Distribución Orbital de Asteroides del Catálogo JPL', fontsize=16)
-    plt.xlabel('Semieje Mayor (Tamaño de la órbita en AU)', fontsize=12)
-    plt.ylabel('Inclinación Orbital (grados)', fontsize=12)
-    plt.xscale('log') # Escala logarítmica para ver mejor la distribución
-    plt.grid(True, which="both", ls="--", alpha=0.5)
-    
-    # Leyenda manual
+def _legend(ax, fondo, loc='best'):
+    from matplotlib.lines import Line2D
+
     legend_elements = [
-        Line2D([0], [0], marker='o', color='w', label='No Peligroso', markerfacecolor='skyblue', markersize=12),
+        Line2D([0], [0], marker='o', color='w', label='No Peligroso', markerfacecolor=fondo, markersize=12),
         Line2D([0], [0], marker='o', color='w', label='Potencialmente Peligroso', markerfacecolor='red', markersize=12)
     ]
-    plt.legend(handles=legend_elements, title="Clasificación de Riesgo")
-    
-    plt.show()
\ No newline at end of file
+    ax.legend(handles=legend_elements, title="Clasificación de Riesgo", loc=loc)
+
+
+def _draw_points(ax, df):
+    df_plot = df.dropna(subset=['a', 'i', 'diameter', 'pha'])
+    # Asigna color basado en si es peligroso o no (el campo 'pha' es 'Y'/'N')
+    colores = np.where(df_plot['pha'].to_numpy() == 'Y', 'red', 'skyblue')
+    # El tamaño del punto es proporcional al diámetro, con un mínimo para visibilidad
+    sizes = (df_plot['diameter'].to_numpy(dtype=np.float64) * 20) + 10
+    ax.scatter(df_plot['a'], df_plot['i'], c=colores, s=sizes, alpha=0.6, edgecolors='w', linewidth=0.5)
+    ax.set_xscale('log') # Escala logarítmica para ver mejor la distribución
+    _legend(ax, 'skyblue')
+    return len(df_plot)
+
+
+def _draw_density(fig, ax, df, bins):
+    """
+    Histograma como imagen sobre el eje x en log10(a) (con las marcas
+    rotuladas en AU): una sola imagen se dibuja mucho más rápido que una
+    malla de polígonos en un eje logarítmico.
+    """
+    from matplotlib import colormaps
+    from matplotlib.colors import LogNorm
+
+    a, inclinacion, es_pha = _plot_columns(df)
+    total, _ = density_grid(a, inclinacion, es_pha, bins)
+    imagen = ax.imshow(np.ma.masked_equal(total, 0), origin='lower', aspect='auto', interpolation='nearest',
+                       extent=(*LOG_A_RANGE, *INCLINATION_RANGE), cmap='viridis',
+                       norm=LogNorm(vmin=1, vmax=max(int(total.max()), 1)))
+    fig.colorbar(imagen, ax=ax, label='Asteroides por celda')
+    # Los PHAs son pocos: se dibujan uno a uno encima de la densidad
+    ax.plot(np.log10(a[es_pha]), inclinacion[es_pha], linestyle='none', marker='.', markersize=2, color='red',
+            alpha=0.8)
+
+    marcas = [au for au in (0.2, 0.5, 1, 2, 5, 10, 20, 50, 100)
+              if LOG_A_RANGE[0] <= np.log10(au) <= LOG_A_RANGE[1]]
+    ax.set_xticks(np.log10(marcas), [f"{au:g}" for au in marcas])
+    ax.set_xlim(*LOG_A_RANGE)
+    filas_ocupadas = np.flatnonzero(total.any(axis=1))
+    if filas_ocupadas.size:
+        ax.set_ylim(INCLINATION_RANGE[0],
+                    INCLINATION_RANGE[0] + (filas_ocupadas[-1] + 1) * (INCLINATION_RANGE[1] - INCLINATION_RANGE[0]) / bins[1])
+    # Con tantos puntos, buscar la mejor posición de la leyenda es lento
+    _legend(ax, colormaps['viridis'](0.6), loc='upper right')
+    return len(a)
+
+
+def plot_orbital_distribution(df, salida=None, modo='auto', bins=DEFAULT_BINS):
+    """
+    Genera un gráfico 2D (semieje mayor frente a inclinación) de la
+    distribución de las órbitas de los asteroides del catálogo.
+
+    modo='puntos' dibuja cada asteroide (color por PHA, tamaño por diámetro);
+    'densidad' agrega las órbitas en un histograma 2D sobre log a con los
+    PHAs encima como una capa aparte, así que cuesta lo mismo con millones
+    de filas; 'auto' elige la densidad a partir de DENSITY_THRESHOLD filas.
+
+    Con 'salida' el PNG se escribe directamente (sin pyplot ni ventana, vale
+    para servidores sin pantalla); sin ella se muestra con plt.show().
+    """
+    requeridas = ['a', 'i', 'diameter', 'pha'] if modo == 'puntos' else ['a', 'i']
+    if not all(col in df.columns for col in requeridas):
+        print(f"Faltan columnas necesarias para el gráfico ({', '.join(repr(c) for c in requeridas)}).")
+        return
+    if modo == 'auto':
+        modo = 'densidad' if len(df) >= DENSITY_THRESHOLD or 'diameter' not in df.columns \
+            or 'pha' not in df.columns else 'puntos'
+
+    inicio = time.perf_counter()
+    if salida:
+        from matplotlib.figure import Figure
+
+        fig = Figure(figsize=(14, 9))
+    else:
+        import matplotlib.pyplot as plt
+
+        fig = plt.figure(figsize=(14, 9))
+    ax = fig.add_subplot()
+    n = _draw_density(fig, ax, df, bins) if modo == 'densidad' else _draw_points(ax, df)
+    if n == 0:
+        print("No hay suficientes datos completos para generar el gráfico.")
+        if not salida:
+            plt.close(fig)
+        return
+    print(f"Graficando {n} asteroides con datos completos (modo {modo})...")
+
+    ax.set_title('Distribución Orbital de Asteroides del Catálogo JPL', fontsize=16)
+    ax.set_xlabel('Semieje Mayor (Tamaño de la órbita en AU)', fontsize=12)
+    ax.set_ylabel('Inclinación Orbital (grados)', fontsize=12)
+    ax.grid(True, which="both", ls="--", alpha=0.5)
+
+    if salida:
+        fig.savefig(salida, dpi=100)
+        print(f"🖼️ Gráfico guardado en '{salida}' en {time.perf_counter() - inicio:.2f} s.")
+    else:
+        plt.show()
+
+
+def export_density_tiles(df, carpeta, niveles=DEFAULT_TILE_LEVELS, tile_size=DEFAULT_TILE_SIZE):
+    """
+    Exporta la densidad de órbitas (log10 a x inclinación, en el dominio
+    fijo LOG_A_RANGE x INCLINATION_RANGE) como teselas para el dashboard.
+
+    El nivel z cubre el dominio con 2^z x 2^z teselas de tile_size x
+    tile_size celdas. Cada tesela '<z>/<x>_<y>.bin' tiene dos capas uint32
+    little-endian seguidas: todos los asteroides y solo los PHAs (fila 0 =
+    inclinación mínima, columna 0 = a mínimo). Solo se escriben las teselas
+    con algún asteroide; 'index.json' las lista con su máximo, para fijar la
+    escala de color sin descargarlas. Los niveles gruesos se obtienen
+    sumando bloques del más fino, así que son coherentes entre sí.
+    """
+    inicio = time.perf_counter()
+    a, inclinacion, es_pha = _plot_columns(df)
+    lado = tile_size * 2 ** (niveles - 1)
+    capas = density_grid(a, inclinacion, es_pha, (lado, lado))
+
+    manifiesto = {
+        'version': DENSITY_TILES_VERSION,
+        'eje_x': {'campo': 'log10_a', 'rango': list(LOG_A_RANGE)},
+        'eje_y': {'campo': 'i', 'rango': list(INCLINATION_RANGE)},
+        'tile_size': tile_size,
+        'capas': ['total', 'pha'],
+        'dtype': 'uint32',
+        'endian': 'little',
+        'filas': int(capas[0].sum()),
+        'niveles': [],
+    }
+    os.makedirs(carpeta, exist_ok=True)
+    escritas = 0
+    for z in reversed(range(niveles)):
+        teselas = []
+        os.makedirs(os.path.join(carpeta, str(z)), exist_ok=True)
+        for ty in range(2 ** z):
+            for tx in range(2 ** z):
+                ventana = (slice(ty * tile_size, (ty + 1) * tile_size), slice(tx * tile_size, (tx + 1) * tile_size))
+                total, pha = (capa[ventana] for capa in capas)
+                if not total.any():
+                    continue
+                with open(os.path.join(carpeta, str(z), f"{tx}_{ty}.bin"), 'wb') as f:
+                    f.write(np.stack([total, pha]).astype('<u4', copy=False).tobytes())
+                teselas.append({'x': tx, 'y': ty, 'max': int(total.max()), 'max_pha': int(pha.max())})
+        manifiesto['niveles'].insert(0, {'z': z, 'celdas': tile_size * 2 ** z, 'teselas': teselas})
+        escritas += len(teselas)
+        # El nivel siguiente (más grueso) suma bloques de 2x2 celdas
+        capas = [capa.reshape(capa.shape[0] // 2, 2, capa.shape[1] // 2, 2).sum(axis=(1, 3), dtype=np.uint32)
+                 for capa in capas]
+
+    # El manifiesto se escribe al final: si algo falla antes, no apunta a teselas a medias
+    tmp_path = os.path.join(carpeta, DENSITY_MANIFEST + ".tmp")
+    with open(tmp_path, 'w') as f:
+        json.dump(manifiesto, f, separators=(',', ':'))
+    os.replace(tmp_path, os.path.join(carpeta, DENSITY_MANIFEST))
+    print(f"🗺️ {escritas} teselas de densidad ({niveles} niveles, {manifiesto['filas']} asteroides) "
+          f"en '{carpeta}' en {time.perf_counter() - inicio:.2f} s.")
+    return manifiesto
+
+
+def main(argv=None):
+    # python3 -m modules.visualizer --catalogo jpl_catalog.csv --salida distribucion.png --teselas densidad/
+    import argparse
+
+    from modules.catalog_cache import load_catalog_cached
+
+    parser = argparse.ArgumentParser(description="Gráfico de densidad orbital del catálogo completo.")
+    parser.add_argument('--catalogo', default="jpl_catalog.csv", help="CSV del catálogo de JPL.")
+    parser.add_argument('--salida', default="orbital_distribution.png", help="PNG de salida.")
+    parser.add_argument('--modo', choices=['auto', 'densidad', 'puntos'], default='auto')
+    parser.add_argument('--teselas', metavar='CARPETA', help="Exporta también las teselas de densidad para la web.")
+    parser.add_argument('--niveles', type=int, default=DEFAULT_TILE_LEVELS, help="Niveles de zoom de las teselas.")
+    args = parser.parse_args(argv)
+
+    df = load_catalog_cached(args.catalogo)
+    if not df.empty:
+        plot_orbital_distribution(df, salida=args.salida, modo=args.modo)
+        if args.teselas:
+            export_density_tiles(df, args.teselas, args.niveles)
+
+
+if __name__ == "__main__":
+    main()
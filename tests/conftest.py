@@ -0,0 +1,6 @@
+# tests/conftest.py
+import os
+import sys
+
+# Las pruebas importan 'modules', 'benchmarks' y los scripts de la raíz del proyecto
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
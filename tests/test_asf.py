@@ -0,0 +1,43 @@
+# tests/test_asf.py
+import pandas as pd
+import pytest
+
+import asf
+from modules.catalog_store import CatalogStore
+
+
+def _store(nombres, version):
+    df = pd.DataFrame({
+        'spkid': range(2000001, 2000001 + len(nombres)), 'full_name': nombres,
+        'a': 2.5, 'e': 0.1, 'i': 5.0, 'om': 80.0, 'w': 70.0, 'diameter': 10.0,
+        'H': 15.0, 'moid': 1.2, 'neo': 'N', 'pha': 'N',
+    })
+    return CatalogStore(df, version)
+
+
+@pytest.fixture
+def cliente():
+    anterior = asf._store, asf.RESPUESTAS
+    asf.configurar(store=_store(['Ceres'], 'v1'), cache=16)
+    yield asf.app.test_client()
+    asf._store, asf.RESPUESTAS = anterior
+
+
+def _nombres(respuesta):
+    return [fila['full_name'] for fila in respuesta.get_json()['asteroides']]
+
+
+def test_new_store_is_not_served_stale_responses(cliente):
+    assert _nombres(cliente.get('/api/asteroids')) == ['Ceres']
+    asf.configurar(store=_store(['Ceres', 'Pallas'], 'v2'))
+    assert _nombres(cliente.get('/api/asteroids')) == ['Ceres', 'Pallas']
+
+
+def test_cache_key_includes_store_version(cliente):
+    cliente.get('/api/asteroids')
+    # Aunque alguien cambie el store sin pasar por configurar(), la versión distingue las respuestas
+    asf._store = _store(['Vesta'], 'v3')
+    respuesta = cliente.get('/api/asteroids')
+    assert _nombres(respuesta) == ['Vesta']
+    assert respuesta.get_etag()[0].startswith('v3-')
+    assert cliente.get('/api/asteroids', headers={'If-None-Match': respuesta.get_etag()[0]}).status_code == 304
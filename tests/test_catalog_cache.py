@@ -0,0 +1,69 @@
+# tests/test_catalog_cache.py
+import os
+import threading
+
+import numpy as np
+
+from benchmarks.synthetic_catalog import write_catalog_csv
+from modules import catalog_cache
+from modules.catalog_cache import cache_dir_for, load_catalog_cached
+
+
+def _catalogo(tmp_path, n=2000, seed=1):
+    ruta = str(tmp_path / "catalogo.csv")
+    write_catalog_csv(ruta, n, seed)
+    return ruta
+
+
+def test_load_is_memmap_backed(tmp_path):
+    ruta = _catalogo(tmp_path)
+    construido = load_catalog_cached(ruta)
+    df = load_catalog_cached(ruta)
+    assert df.attrs['memmap']
+    assert catalog_cache._is_memmap_backed(df['a'].to_numpy())
+    np.testing.assert_array_equal(df['a'].to_numpy(), construido['a'].to_numpy())
+    # Escribir en el DataFrame no toca el archivo de la caché (memmap copy-on-write)
+    df.loc[df.index[:10], 'a'] = -1.0
+    assert (load_catalog_cached(ruta)['a'].to_numpy()[:10] != -1.0).all()
+
+
+def test_rebuild_keeps_previous_snapshot(tmp_path, monkeypatch):
+    ruta = _catalogo(tmp_path)
+    load_catalog_cached(ruta)
+    viejo = load_catalog_cached(ruta)
+    copia = viejo['a'].to_numpy().copy()
+
+    write_catalog_csv(ruta, 3000, seed=2)
+    nuevo = load_catalog_cached(ruta)
+    assert len(nuevo) == 3000
+    # El DataFrame abierto antes de la reconstrucción sigue leyendo su versión
+    np.testing.assert_array_equal(viejo['a'].to_numpy(), copia)
+
+    # La tercera reconstrucción ya puede borrar la primera versión
+    monkeypatch.setattr(catalog_cache, 'STALE_DATA_SECONDS', 0)
+    load_catalog_cached(ruta, refresh=True)
+    datos = [d for d in os.listdir(cache_dir_for(ruta)) if d.startswith(catalog_cache.DATA_PREFIX)]
+    assert len(datos) == 2
+
+
+def test_concurrent_readers_during_rebuilds(tmp_path):
+    ruta = _catalogo(tmp_path)
+    load_catalog_cached(ruta)
+    errores, filas = [], []
+
+    def leer():
+        try:
+            for _ in range(20):
+                filas.append(len(load_catalog_cached(ruta)))
+        except Exception as e:  # noqa: BLE001 (se comprueba que no haya ninguno)
+            errores.append(e)
+
+    lectores = [threading.Thread(target=leer) for _ in range(4)]
+    for hilo in lectores:
+        hilo.start()
+    for _ in range(5):
+        load_catalog_cached(ruta, refresh=True)
+    for hilo in lectores:
+        hilo.join()
+    assert not errores
+    assert set(filas) == {2000}
@@ -0,0 +1,24 @@
+# tests/test_catalog_shards.py
+import os
+
+from benchmarks.synthetic_catalog import generate_catalog
+from modules.catalog_shards import MANIFEST_NAME, load_manifest, shard_output_paths, write_catalog_shards
+
+
+def test_resharding_with_fewer_shards_removes_stale_files(tmp_path):
+    carpeta = str(tmp_path / "shards")
+    df = generate_catalog(1000)
+    write_catalog_shards(df, carpeta, filas_por_shard=100, comprimir=['gzip'])
+    assert len(load_manifest(carpeta)['shards']) == 10
+
+    # Un archivo ajeno a los shards no se toca
+    ajeno = os.path.join(carpeta, "LEEME.txt")
+    with open(ajeno, 'w') as f:
+        f.write("no es un shard")
+
+    write_catalog_shards(df, carpeta, filas_por_shard=300, comprimir=['gzip'])
+    manifiesto = load_manifest(carpeta)
+    assert len(manifiesto['shards']) == 4
+    esperados = {os.path.basename(ruta) for ruta in shard_output_paths(carpeta, ['gzip'])} | {"LEEME.txt"}
+    assert set(os.listdir(carpeta)) == esperados
+    assert MANIFEST_NAME in esperados and len(esperados) == 1 + 2 * 4 + 1
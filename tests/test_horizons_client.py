@@ -0,0 +1,87 @@
+# tests/test_horizons_client.py
+import json
+import os
+import time
+
+import numpy as np
+import pytest
+
+from modules.horizons_client import AstroqueryBackend, FixtureBackend, HorizonsClient
+
+FIXTURE = os.path.join(os.path.dirname(__file__), "data", "horizons_fixture.json")
+
+
+def _ceres():
+    with open(FIXTURE) as f:
+        return json.load(f)['objetos'][0]
+
+
+def test_fixture_backend_answers_recorded_vectors():
+    ceres = _ceres()
+    backend = FixtureBackend.from_fixture(FIXTURE)
+    epochs = [v['jd'] for v in ceres['vectores']][::-1]
+    vectores = backend.vectors(ceres['id'], 'smallbody', '@sun', epochs)
+    assert vectores == ceres['vectores'][::-1]
+    with pytest.raises(ValueError):
+        backend.vectors(ceres['id'], 'smallbody', '@sun', [epochs[0] + 0.25])
+
+
+def test_parallel_fetch_and_disk_cache(tmp_path):
+    ceres = _ceres()
+    latencia = 0.2
+    # El mismo objeto grabado bajo varios identificadores: cuatro consultas independientes
+    ids = ['2000001', '1', 'Ceres', 'A801 AA']
+    backend = FixtureBackend({id_objeto: ceres for id_objeto in ids}, latencia=latencia)
+    cliente = HorizonsClient(backend, cache_dir=str(tmp_path), workers=8)
+    objetos = {id_objeto: 'smallbody' for id_objeto in ids}
+    epochs = [v['jd'] for v in ceres['vectores']]
+
+    inicio = time.perf_counter()
+    resultado = cliente.vectors(objetos, epochs[:3])
+    assert time.perf_counter() - inicio < 2 * latencia
+    assert backend.consultas == len(ids) and backend.max_simultaneas == len(ids)
+    assert (cliente.aciertos, cliente.fallos) == (0, 3 * len(ids))
+    for vectores in resultado.values():
+        assert [v['x'] for v in vectores] == [v['x'] for v in ceres['vectores'][:3]]
+
+    # Otro cliente sobre la misma carpeta: las tres épocas salen del disco y solo se pide la cuarta
+    cliente = HorizonsClient(backend, cache_dir=str(tmp_path), workers=8)
+    resultado = cliente.vectors(objetos, epochs)
+    assert backend.consultas == 2 * len(ids)
+    assert (cliente.aciertos, cliente.fallos) == (3 * len(ids), len(ids))
+    assert all(vectores[3]['y'] == ceres['vectores'][3]['y'] for vectores in resultado.values())
+
+    # Todo en caché: ninguna consulta nueva
+    cliente.vectors(objetos, epochs)
+    assert backend.consultas == 2 * len(ids)
+
+    # Entradas caducadas: se vuelven a pedir
+    caducado = HorizonsClient(backend, cache_dir=str(tmp_path), ttl_s=-1)
+    caducado.vectors(objetos, epochs)
+    assert backend.consultas == 3 * len(ids) and caducado.fallos == len(epochs) * len(ids)
+
+
+class _HorizonsGrabado:
+    """Imita astroquery.jplhorizons.Horizons con los vectores grabados de Ceres."""
+
+    def __init__(self, id, location, epochs, id_type):
+        self.epochs = epochs
+
+    def vectors(self):
+        # Como Horizons: filas ordenadas por tiempo y sin épocas repetidas
+        vectores = {v['jd']: v for v in _ceres()['vectores'] if v['jd'] in self.epochs}
+        filas = [vectores[jd] for jd in sorted(vectores)]
+        return {'datetime_jd': np.array([v['jd'] for v in filas]),
+                **{k: np.array([v[k] for v in filas]) for k in 'xyz'}}
+
+
+def test_astroquery_backend_maps_rows_to_epochs(monkeypatch):
+    jplhorizons = pytest.importorskip("astroquery.jplhorizons")
+    monkeypatch.setattr(jplhorizons, 'Horizons', _HorizonsGrabado)
+    grabados = {v['jd']: v for v in _ceres()['vectores']}
+    epochs = [2459770.5, 2459740.5, 2459760.5, 2459740.5]
+    vectores = AstroqueryBackend().vectors('2000001', 'smallbody', '@sun', epochs)
+    assert [v['jd'] for v in vectores] == epochs
+    assert [v['x'] for v in vectores] == [grabados[jd]['x'] for jd in epochs]
+    with pytest.raises(ValueError):
+        AstroqueryBackend().vectors('2000001', 'smallbody', '@sun', [2459745.5])
@@ -0,0 +1,50 @@
+# tests/test_incremental_export.py
+import os
+
+import pytest
+
+import main
+from benchmarks.synthetic_catalog import write_catalog_csv
+from modules.catalog_shards import MANIFEST_NAME
+
+
+@pytest.fixture
+def exportar(tmp_path):
+    catalogo = str(tmp_path / "catalogo.csv")
+    write_catalog_csv(catalogo, 3000)
+    salida, shards = str(tmp_path / "web.json"), str(tmp_path / "shards")
+    argumentos = ['--catalog', catalogo, '--output', salida, '--shards', shards, '--shard-rows', '200',
+                  '--compress', 'gzip', '--compact', '--top', '500', '--incremental', '--workers', '1',
+                  '--skip', 'plot']
+
+    def ejecutar():
+        """Ejecuta la exportación y devuelve las fechas de modificación de sus salidas."""
+        main.main(argumentos)
+        rutas = [salida, f"{salida}.gz", os.path.join(shards, MANIFEST_NAME)]
+        return {ruta: os.stat(ruta).st_mtime_ns for ruta in rutas}
+
+    return ejecutar, salida, shards
+
+
+def _exportado(anterior, actual):
+    return any(actual[ruta] != anterior[ruta] for ruta in anterior)
+
+
+def test_unchanged_export_is_skipped(exportar):
+    ejecutar, _, _ = exportar
+    primera = ejecutar()
+    assert not _exportado(primera, ejecutar())
+
+
+@pytest.mark.parametrize("perdido", ["gz", "manifiesto", "shard"])
+def test_missing_output_forces_export(exportar, perdido):
+    ejecutar, salida, shards = exportar
+    ejecutar()
+    ruta = {
+        "gz": f"{salida}.gz",
+        "manifiesto": os.path.join(shards, MANIFEST_NAME),
+        "shard": os.path.join(shards, "shard_00001.json.gz"),
+    }[perdido]
+    os.remove(ruta)
+    ejecutar()
+    assert os.path.exists(ruta)
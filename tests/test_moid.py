@@ -0,0 +1,71 @@
+# tests/test_moid.py
+import numpy as np
+import pytest
+
+from modules.moid import DEFAULT_MOID_TOLERANCE_AU, compute_moid, planet_elements
+from modules.orbits import orbital_plane_axes
+
+
+def _puntos(a, e, i, om, w, nu):
+    ejes = orbital_plane_axes(i, om, w)[0]
+    r = a * (1 - e ** 2) / (1 + e * np.cos(nu))
+    return (r * np.cos(nu))[:, None] * ejes[0] + (r * np.sin(nu))[:, None] * ejes[1]
+
+
+def moid_exhaustiva(a, e, i, om, w, n=720, candidatos=20, zooms=4):
+    """
+    MOID de una elipse contra la Tierra por fuerza bruta: malla densa n x n
+    de anomalías verdaderas y zoom sucesivo (41 x 41) alrededor de los
+    mejores puntos de la malla.
+    """
+    tierra = planet_elements("Earth")
+    nu = np.linspace(-np.pi, np.pi, n, endpoint=False)
+    r1 = _puntos(a, e, i, om, w, nu)
+    r2 = _puntos(tierra['a'], tierra['e'], tierra['i'], tierra['om'], tierra['w'], nu)
+    d2 = (r1 ** 2).sum(axis=1)[:, None] + (r2 ** 2).sum(axis=1)[None, :] - 2 * r1 @ r2.T
+    mejor = np.inf
+    for k in np.argsort(d2.ravel())[:candidatos]:
+        c1, c2, h = nu[k // n], nu[k % n], 2 * np.pi / n
+        for _ in range(zooms):
+            v1, v2 = c1 + np.linspace(-2 * h, 2 * h, 41), c2 + np.linspace(-2 * h, 2 * h, 41)
+            s1 = _puntos(a, e, i, om, w, v1)
+            s2 = _puntos(tierra['a'], tierra['e'], tierra['i'], tierra['om'], tierra['w'], v2)
+            dd = ((s1[:, None] - s2[None]) ** 2).sum(axis=-1)
+            j = np.argmin(dd)
+            c1, c2, h = v1[j // 41], v2[j % 41], h / 10
+        mejor = min(mejor, dd.min())
+    return np.sqrt(mejor)
+
+
+def _cruzadores_excentricos(n, rng):
+    """Cruzadores de la Tierra de excentricidad alta e inclinación baja."""
+    e = rng.uniform(0.5, 0.97, n)
+    return rng.uniform(0.2, 1.0, n) / (1 - e), e, rng.uniform(0, 5, n)
+
+
+def _parecidas_a_la_tierra(n, rng):
+    """Órbitas casi tangentes a la de la Tierra: la distancia forma valles estrechos."""
+    return rng.uniform(0.8, 1.25, n), rng.uniform(0, 0.35, n), rng.uniform(0, 4, n)
+
+
+@pytest.mark.parametrize("poblacion", [_cruzadores_excentricos, _parecidas_a_la_tierra])
+def test_moid_matches_dense_brute_force(poblacion):
+    rng = np.random.default_rng(11)
+    n = 60
+    a, e, i = poblacion(n, rng)
+    om, w = rng.uniform(0, 360, n), rng.uniform(0, 360, n)
+    calculada = compute_moid(a, e, i, om, w, workers=1)
+    referencia = np.array([moid_exhaustiva(*elementos) for elementos in zip(a, e, i, om, w)])
+    np.testing.assert_allclose(calculada, referencia, rtol=0, atol=DEFAULT_MOID_TOLERANCE_AU)
+
+
+def test_moid_inclined_node_near_apsis():
+    # Cuencas más estrechas que la malla: la MOID está en un nodo mutuo
+    elementos = np.array([
+        (0.990188, 0.040224, 28.790679, 85.785855, 182.320702),
+        (0.773528, 0.096749, 28.976273, 36.974792, 6.474378),
+        (0.911015, 0.103510, 24.302974, 228.075440, 0.199060),
+    ])
+    calculada = compute_moid(*elementos.T, workers=1)
+    referencia = np.array([moid_exhaustiva(*fila) for fila in elementos])
+    np.testing.assert_allclose(calculada, referencia, rtol=0, atol=DEFAULT_MOID_TOLERANCE_AU)
@@ -0,0 +1,43 @@
+# tests/test_neows_ingest.py
+import json
+import os
+
+import pandas as pd
+
+from modules.neows_ingest import CLOSE_APPROACH_DTYPES, ingest_neows_feeds, join_catalog
+
+FEED = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "neows_data_7dpppp.json")
+
+
+def _acercamientos_del_feed():
+    with open(FEED, encoding='utf-8') as f:
+        feed = json.load(f)
+    return sum(len(objeto['close_approach_data'])
+               for objetos in feed['near_earth_objects'].values() for objeto in objetos)
+
+
+def test_ingest_bundled_feed():
+    tabla = ingest_neows_feeds(FEED)
+    assert len(tabla) == _acercamientos_del_feed() == 149
+    assert tabla.dtypes.astype(str).to_dict() == CLOSE_APPROACH_DTYPES
+
+
+def test_tiny_chunks_give_the_same_table():
+    # Trozos de 7 caracteres: casi todos los valores quedan partidos entre lecturas
+    pd.testing.assert_frame_equal(ingest_neows_feeds(FEED, chunk_chars=7, block_rows=10), ingest_neows_feeds(FEED))
+
+
+def test_overlapping_feeds_are_deduplicated():
+    pd.testing.assert_frame_equal(ingest_neows_feeds([FEED, FEED]), ingest_neows_feeds(FEED))
+
+
+def test_join_catalog_marks_present_and_missing_ids():
+    tabla = ingest_neows_feeds(FEED)
+    presentes = tabla['spkid'].unique()[:3]
+    catalogo = pd.DataFrame({'spkid': presentes, 'full_name': [f"Objeto {s}" for s in presentes],
+                             'a': 1.5, 'moid': 0.02})
+    cruzada = join_catalog(tabla, catalogo)
+    esperado = tabla['spkid'].isin(presentes)
+    assert cruzada['en_catalogo'].tolist() == esperado.tolist()
+    assert (cruzada.loc[esperado, 'jpl_full_name'] == "Objeto " + tabla.loc[esperado, 'spkid'].astype(str)).all()
+    assert cruzada.loc[~esperado, ['jpl_full_name', 'jpl_a', 'jpl_moid']].isna().all().all()
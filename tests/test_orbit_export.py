@@ -0,0 +1,54 @@
+# tests/test_orbit_export.py
+import json
+
+import numpy as np
+import pandas as pd
+
+from generar_coordenadas_2d import graficar_orbitas_2d
+from generar_coordenadas_3D import guardar_orbitas_3d
+from modules.orbit_export import read_orbit_binary
+from modules.orbits import generate_orbits_adaptive
+
+# Una elipse, una hipérbola (e >= 1) y otra elipse en el mismo bloque
+ELEMENTOS = pd.DataFrame({
+    'identificador': ['Ceres', 'Oumuamua', 'Eros'],
+    'a': [2.77, -1.27, 1.46], 'e': [0.079, 1.2, 0.223], 'i': [10.6, 122.7, 10.8],
+    'om': [80.3, 24.6, 304.3], 'w': [73.6, 241.8, 178.9],
+})
+
+
+def test_bin16_adaptive_with_open_orbit(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    ruta = guardar_orbitas_3d(ELEMENTOS, formato="bin16", tolerancia=1e-3)
+    indice, datos = read_orbit_binary(ruta)
+    puntos = dict(zip(indice['nombres'], indice['puntos']))
+    offsets = dict(zip(indice['nombres'], indice['offsets']))
+    assert puntos['Oumuamua'] == 0
+    esperadas = generate_orbits_adaptive(*(ELEMENTOS[c] for c in ('a', 'e', 'i', 'om', 'w')), 1e-3)
+    for nombre, esperada in zip(ELEMENTOS['identificador'], esperadas):
+        assert puntos[nombre] == len(esperada)
+        leida = datos[offsets[nombre]:offsets[nombre] + puntos[nombre]]
+        # Int16 con escala por órbita: error por debajo de max|x| / 32767
+        np.testing.assert_allclose(leida, esperada, rtol=0, atol=4 * ELEMENTOS['a'].abs().max() / 32767)
+
+
+def test_plot_2d_skips_open_orbit(tmp_path, monkeypatch):
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    monkeypatch.setattr(plt, 'show', lambda: None)
+
+    ceros = np.zeros(len(ELEMENTOS))
+    orbitas = generate_orbits_adaptive(ELEMENTOS['a'], ELEMENTOS['e'], ceros, ceros, ELEMENTOS['w'], 1e-3,
+                                       dtype=np.float64)
+    sistema = {'sol': {'nombre': 'Sol', 'coordenadas': [[0, 0]]},
+               'tierra': {'nombre': 'Tierra', 'coordenadas': [[1, 0], [0, 1], [-1, 0], [0, -1]]}}
+    for nombre, orbita in zip(ELEMENTOS['identificador'], orbitas):
+        sistema[nombre] = {'nombre': nombre, 'coordenadas': orbita[:, :2].tolist()}
+    assert sistema['Oumuamua']['coordenadas'] == []
+    archivo = tmp_path / "orbitas_2d.json"
+    archivo.write_text(json.dumps(sistema))
+    graficar_orbitas_2d(str(archivo))
+    # Sol, Tierra y las dos elipses
+    assert len(plt.gca().lines) == 4
+    plt.close('all')
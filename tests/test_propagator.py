@@ -0,0 +1,66 @@
+# tests/test_propagator.py
+import os
+
+import numpy as np
+import pytest
+
+from modules.propagator import GM_SUN, propagate, solve_kepler, validate_against_fixture
+
+FIXTURE = os.path.join(os.path.dirname(__file__), "data", "horizons_fixture.json")
+# Ceres a 30 días de su época osculante: el problema de dos cuerpos queda a ~3e-6 AU de Horizons
+FIXTURE_TOLERANCE_AU = 1e-5
+
+
+def test_matches_recorded_horizons_vectors():
+    errores = validate_against_fixture(FIXTURE, FIXTURE_TOLERANCE_AU)
+    assert errores
+    assert all(error <= FIXTURE_TOLERANCE_AU for _, error in errores)
+
+
+def test_solve_kepler_elliptic_residuals():
+    rng = np.random.default_rng(0)
+    e = np.concatenate([rng.uniform(0, 0.99, 50_000), 1 - 10 ** rng.uniform(-8, -2, 10_000)])
+    M = rng.uniform(-50, 50, e.size)
+    E = solve_kepler(M, e)
+    M_reducida = np.remainder(M + np.pi, 2 * np.pi) - np.pi
+    assert np.max(np.abs(E - e * np.sin(E) - M_reducida)) < 1e-12
+
+
+@pytest.mark.parametrize("e_min, e_max", [(1.0001, 5.0), (1 + 1e-8, 1.01)])
+def test_solve_kepler_hyperbolic_residuals(e_min, e_max):
+    rng = np.random.default_rng(1)
+    e = rng.uniform(e_min, e_max, 50_000)
+    M = rng.choice([-1, 1], e.size) * 10 ** rng.uniform(-6, 1.5, e.size)
+    H = solve_kepler(M, e)
+    residuo = np.abs(e * np.sinh(H) - H - M) / np.maximum(1, np.abs(M))
+    assert np.isfinite(H).all()
+    assert np.max(residuo) < 1e-12
+
+
+def test_solve_kepler_hyperbolic_high_eccentricity():
+    H = solve_kepler(1.427, 1.18)
+    assert abs(1.18 * np.sinh(H) - H - 1.427) < 1e-12
+
+
+def _integrar(r, v, dias, paso=0.05):
+    """RK4 del problema de dos cuerpos: una referencia que no pasa por la ecuación de Kepler."""
+    def aceleracion(r):
+        return -GM_SUN * r / np.linalg.norm(r) ** 3
+
+    for _ in range(int(round(dias / paso))):
+        k1r, k1v = v, aceleracion(r)
+        k2r, k2v = v + 0.5 * paso * k1v, aceleracion(r + 0.5 * paso * k1r)
+        k3r, k3v = v + 0.5 * paso * k2v, aceleracion(r + 0.5 * paso * k2r)
+        k4r, k4v = v + paso * k3v, aceleracion(r + paso * k3r)
+        r = r + paso / 6 * (k1r + 2 * k2r + 2 * k3r + k4r)
+        v = v + paso / 6 * (k1v + 2 * k2v + 2 * k3v + k4v)
+    return r
+
+
+@pytest.mark.parametrize("a, e", [(2.5, 0.3), (-1.2, 1.18), (-40.0, 1.002)])
+def test_propagation_matches_numerical_integration(a, e):
+    epoca, dias = 2460000.5, 60.0
+    r0, v0 = propagate(a, e, 25.0, 80.0, 40.0, 5.0, epoca, epoca, velocities=True)
+    esperado = _integrar(r0[0], v0[0], dias)
+    calculado = propagate(a, e, 25.0, 80.0, 40.0, 5.0, epoca, epoca + dias)[0]
+    assert np.linalg.norm(calculado - esperado) < 1e-8
@@ -0,0 +1,18 @@
+# tests/test_startup.py
+import os
+
+from benchmarks.check_startup import CASOS, comprobar_arranque
+
+# Igual que 'check_startup --escala': en máquinas lentas, STARTUP_BUDGET_SCALE=2
+ESCALA = float(os.environ.get('STARTUP_BUDGET_SCALE', '1'))
+
+
+def test_budgets_stay_under_a_second():
+    assert all(presupuesto < 1.0 for _, presupuesto, _ in CASOS)
+
+
+def test_cli_startup_within_budget():
+    fallos = [r for r in comprobar_arranque(repeticiones=2, escala=ESCALA) if not r['ok']]
+    assert not fallos, "\n".join(
+        f"{r['comando']}: {r['importacion_s']:.3f} s de {r['presupuesto_s']:.2f} s"
+        + (f", importa {', '.join(r['indebidos'])}" if r['indebidos'] else "") for r in fallos)
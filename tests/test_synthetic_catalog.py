@@ -0,0 +1,12 @@
+# tests/test_synthetic_catalog.py
+import pandas as pd
+
+from benchmarks.synthetic_catalog import generate_catalog
+
+
+def test_designations_are_unique_and_reproducible():
+    # Tres bloques como los de write_catalog_csv, más de un ciclo de designaciones
+    bloques = [generate_catalog(12_000, primera_fila=primera) for primera in (0, 12_000, 24_000)]
+    designaciones = pd.concat(bloques)['full_name'].str.extract(r'\((.+)\)$')[0]
+    assert designaciones.notna().all() and designaciones.is_unique
+    assert generate_catalog(12_000, primera_fila=12_000)['full_name'].equals(bloques[1]['full_name'])